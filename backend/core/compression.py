@@ -0,0 +1,147 @@
+# /backend/core/compression.py
+# Response compression codecs for A-DIENYNAS
+# PURPOSE: gzip (always) and brotli / zstd (when the optional packages are installed) with
+#          Accept-Encoding negotiation; whole-body and incremental (streaming) compression
+# UPDATES: Created together with core.compression_middleware
+
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli neprivalomas
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard neprivalomas
+    zstandard = None
+
+
+class GzipCodec:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        # wbits=31 - gzip antraštė (kaip gzip.compress, be failo vardo/laiko)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def compressor(self):
+        return _GzipStream(self.level)
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        # Z_SYNC_FLUSH - klientas gauna kiekvieną dalį iš karto (SSE, ilgi eksportai)
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def compressor(self):
+        return _BrotliStream(self.level)
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def chunk(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def compressor(self):
+        return _ZstdStream(self.level)
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Serverio pirmenybė, kai klientas kelis kodavimus priima vienodu q
+PREFERENCE = ('br', 'zstd', 'gzip')
+
+
+def available_codecs():
+    """Įdiegti kodekai su COMPRESSION lygiais"""
+    config = settings.COMPRESSION
+    codecs = {'gzip': GzipCodec(config['GZIP_LEVEL'])}
+    if brotli is not None:
+        codecs['br'] = BrotliCodec(config['BROTLI_LEVEL'])
+    if zstandard is not None:
+        codecs['zstd'] = ZstdCodec(config['ZSTD_LEVEL'])
+    return codecs
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding -> {kodavimas: q}"""
+    accepted = {}
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+    return accepted
+
+
+def negotiate(header, codecs):
+    """
+    Geriausias kodekas pagal Accept-Encoding (didžiausias q, lygiu atveju - PREFERENCE) arba None.
+    q=0 - kodavimas draudžiamas; '*' taikomas neišvardytiems kodavimams.
+    """
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for name in PREFERENCE:
+        if name not in codecs:
+            continue
+        quality = accepted.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = codecs[name], quality
+    return best
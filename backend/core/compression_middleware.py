@@ -0,0 +1,93 @@
+# /backend/core/compression_middleware.py
+# Negotiated response compression middleware for A-DIENYNAS
+# PURPOSE: Compress large /api/ responses (IMU plans, week schedules, lesson library) with the best
+#          Accept-Encoding codec from core.compression; streaming responses are compressed incrementally
+# UPDATES: Placed after MetricsMiddleware/SlowQueryMiddleware (metrics see the bytes on the wire).
+#          Django UpdateCacheMiddleware, if enabled, must be listed above this middleware so the
+#          cached response is the compressed one (variants are separated by Vary: Accept-Encoding)
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .compression import available_codecs, negotiate
+
+
+class CompressionMiddleware:
+    """
+    Suspaudžia atsakymą, kai:
+    - COMPRESSION['ENABLED'] ir kelias prasideda PATH_PREFIXES,
+    - turinio tipas tekstinis (CONTENT_TYPES), atsakymas dar nesuspaustas,
+    - atsakymas nenustato cookies (BREACH: slapukų/tokenų atsakymai nesuspaudžiami),
+    - įprastas atsakymas ne mažesnis nei MIN_SIZE baitų (streaming - visada),
+    - klientas priima bent vieną įdiegtą kodavimą (br, zstd, gzip).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.COMPRESSION
+        self.enabled = config['ENABLED']
+        self.min_size = config['MIN_SIZE']
+        self.prefixes = tuple(config['PATH_PREFIXES'])
+        self.content_types = tuple(config['CONTENT_TYPES'])
+        self.codecs = available_codecs()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.enabled or not request.path_info.startswith(self.prefixes):
+            return response
+        return self.compress(request, response)
+
+    def compress(self, request, response):
+        if (
+            response.has_header('Content-Encoding')
+            or response.cookies
+            or not response.get('Content-Type', '').startswith(self.content_types)
+        ):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        # Atsakymas priklauso nuo Accept-Encoding - taip pat ir nesuspaustas (proxy/cache)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.codecs)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _compress_async(codec, response.streaming_content)
+            else:
+                response.streaming_content = _compress_stream(codec, response.streaming_content)
+            # Galutinis ilgis nežinomas
+            del response.headers['Content-Length']
+        else:
+            compressed = codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # Suspaustas turinys nebėra tas pats baitų srautas - stiprus ETag tampa silpnu
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
+
+
+def _compress_stream(codec, chunks):
+    compressor = codec.compressor()
+    for chunk in chunks:
+        data = compressor.chunk(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _compress_async(codec, chunks):
+    compressor = codec.compressor()
+    async for chunk in chunks:
+        data = compressor.chunk(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
@@ -0,0 +1,116 @@
+# /backend/core/fieldsets.py
+# Sparse fieldsets and expansion control for A-DIENYNAS serializers
+# PURPOSE: `?fields=a,b` returns only the listed fields, `?expand=x,y` embeds only the listed related
+#          objects (other embeddable fields collapse to their id); the queryset loads only the columns
+#          and relations the selected fields read (select_related/only()/prefetch_related)
+# UPDATES: Used by IMUPlanSerializer, GlobalScheduleSerializer and LessonSerializer. Requests without
+#          either parameter keep the full (embedded) representation the frontend relies on
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _param_set(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def requested_fieldset(request):
+    """
+    (fields, expand) iš query parametrų. None - parametras nepateiktas.
+    Taikoma tik skaitymo užklausoms (rašymo atsakymai visada pilni).
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None, None
+    params = getattr(request, 'query_params', request.GET)
+    return _param_set(params, FIELDS_PARAM), _param_set(params, EXPAND_PARAM)
+
+
+class SparseFieldsetMixin:
+    """
+    ModelSerializer mixin. Meta aprašo:
+    - expandable: {laukas: sutraukto lauko source (pvz. 'lesson_id') arba None - laukas praleidžiamas,
+      jei neišvardytas ?fields= ar ?expand=}
+    - fieldset_paths: {laukas: only() keliai}; nenurodytas laukas - modelio laukas tuo pačiu vardu
+    - expand_paths: {laukas: only() keliai, kai laukas išplėstas}
+    - fieldset_prefetch: {laukas: prefetch_related lookup'ų vardai}; M2M laukai prefetch'inami automatiškai
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = requested_fieldset(self.context.get('request'))
+        if fields is not None or expand is not None:
+            self._apply_fieldset(fields, expand or set())
+
+    def _apply_fieldset(self, fields, expand):
+        for name, collapsed in getattr(self.Meta, 'expandable', {}).items():
+            if name in expand or name not in self.fields:
+                continue
+            if collapsed is None:
+                # Laukas be id formos grąžinamas, kai išvardytas ?fields= sąraše
+                if fields is None or name not in fields:
+                    self.fields.pop(name)
+            else:
+                self.fields[name] = serializers.ReadOnlyField(source=collapsed)
+        if fields is not None:
+            # Išplėstas laukas grąžinamas ir tada, kai jo nėra ?fields= sąraše
+            for name in list(self.fields):
+                if name not in fields and name not in expand:
+                    self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        """
+        (atvaizduojami laukai, išplėsti laukai) pagal užklausą arba (None, None) -
+        parametrų nėra, naudojamas pilnas atvaizdavimas
+        """
+        fields, expand = requested_fieldset(request)
+        if fields is None and expand is None:
+            return None, None
+        names = set(cls(context={'request': request}).fields)
+        return names, (expand or set()) & names
+
+    @classmethod
+    def restrict_queryset(cls, queryset, names, expand, prefetch=()):
+        """
+        select_related/only()/prefetch_related tik pasirinktiems laukams.
+        prefetch - Prefetch objektai (su queryset), pakeičiantys to paties vardo lookup'us
+        """
+        meta = cls.Meta
+        opts = meta.model._meta
+        field_paths = getattr(meta, 'fieldset_paths', {})
+        expand_paths = getattr(meta, 'expand_paths', {})
+        field_prefetch = getattr(meta, 'fieldset_prefetch', {})
+
+        overrides = {lookup.prefetch_to: lookup for lookup in prefetch}
+        paths = {opts.pk.name}
+        lookups = {}
+        for name in names:
+            if name in expand and name in expand_paths:
+                paths.update(expand_paths[name])
+            elif name in field_paths:
+                paths.update(field_paths[name])
+            else:
+                try:
+                    model_field = opts.get_field(name)
+                except FieldDoesNotExist:
+                    model_field = None
+                if model_field is not None and model_field.many_to_many:
+                    lookups[name] = overrides.get(name, name)
+                elif model_field is not None and model_field.concrete:
+                    paths.add(name)
+            for lookup in field_prefetch.get(name, ()):
+                lookups[lookup] = overrides.get(lookup, lookup)
+
+        related = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+        return (
+            queryset.select_related(None).prefetch_related(None)
+            .select_related(*sorted(related))
+            .only(*sorted(paths))
+            .prefetch_related(*lookups.values())
+        )
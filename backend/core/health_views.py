@@ -7,6 +7,8 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 import json
 
+from users.user_cache import user_cache
+
 
 @csrf_exempt
 @require_http_methods(["GET"])
@@ -59,7 +61,8 @@ def health_detailed(request):
             'checks': {
                 'database': db_healthy,
                 'redis': redis_healthy
-            }
+            },
+            'user_cache': user_cache.stats()
         })
     except Exception as e:
         return JsonResponse({
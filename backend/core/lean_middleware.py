@@ -0,0 +1,72 @@
+# /backend/core/lean_middleware.py
+# Path-dispatched middleware stack for A-DIENYNAS
+# PURPOSE: Give stateless JWT /api/ requests a minimal middleware stack
+#          (auth context, role, logging) while /admin/ and /accounts/ keep session/CSRF/auth/messages
+# UPDATES: Created for API request overhead; used from MIDDLEWARE in core/settings.py
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware as _AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware as _MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware as _SessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware as _CsrfViewMiddleware
+
+from users.oauth_middleware import OAuthCallbackMiddleware as _OAuthCallbackMiddleware
+
+REQUEST_ATTR = '_lean_api_request'
+
+
+def is_lean_request(request):
+    """
+    Ar užklausai taikomas trumpas (API) middleware stack'as.
+    LEAN_API_PREFIXES - keliai, kuriems session/CSRF/auth/messages middleware nereikalingi,
+    LEAN_API_EXCLUDE - išimtys (pvz. OAuth srautas, kuriam reikalinga sesija).
+    """
+    lean = getattr(request, REQUEST_ATTR, None)
+    if lean is None:
+        path = request.path_info
+        lean = (
+            getattr(settings, 'LEAN_API_ENABLED', True)
+            and path.startswith(tuple(getattr(settings, 'LEAN_API_PREFIXES', ('/api/',))))
+            and not path.startswith(tuple(getattr(settings, 'LEAN_API_EXCLUDE', ())))
+        )
+        setattr(request, REQUEST_ATTR, lean)
+    return lean
+
+
+class SkipForApiMixin:
+    """
+    Middleware praleidžiamas API užklausoms - iškart kviečiamas kitas grandinės narys.
+    Paveldėjimas (o ne apgaubimas) paliktas tyčia: Django admin sistemos patikrinimai
+    ieško Session/Authentication/Message middleware poklasių MIDDLEWARE sąraše.
+    """
+
+    def __call__(self, request):
+        if is_lean_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+# Stateful middleware, kurių /api/ užklausoms nereikia (JWT cookie autentifikacija yra stateless)
+class SessionMiddleware(SkipForApiMixin, _SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkipForApiMixin, _CsrfViewMiddleware):
+    # DRF APIView ir taip yra csrf_exempt; JWT cookie saugomas SameSite
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_lean_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(SkipForApiMixin, _AuthenticationMiddleware):
+    # API užklausoms request.user nustato RoleValidationMiddleware (JWT per AuthContext)
+    pass
+
+
+class OAuthCallbackMiddleware(SkipForApiMixin, _OAuthCallbackMiddleware):
+    pass
+
+
+class MessageMiddleware(SkipForApiMixin, _MessageMiddleware):
+    pass
@@ -0,0 +1,203 @@
+# /backend/core/log_pipeline.py
+# Asynchronous logging pipeline for A-DIENYNAS
+# PURPOSE: Move log formatting and stream I/O off the request thread (QueueHandler -> QueueListener)
+# UPDATES: Created with bounded queue + drop policy, per-logger rate limiting and JSON formatter
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+DROP_NEWEST = 'drop_newest'  # pilnoje eilėje atmetamas naujas įrašas
+DROP_OLDEST = 'drop_oldest'  # pilnoje eilėje išmetamas seniausias įrašas
+DROP_POLICIES = (DROP_NEWEST, DROP_OLDEST)
+
+# Standartiniai LogRecord atributai - JSON formatteris juos praleidžia kaip "extra"
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class AsyncStreamHandler(QueueHandler):
+    """
+    Neblokuojantis handler'is: request thread'as tik įdeda įrašą į ribotą eilę,
+    formatavimą ir rašymą į stream atlieka QueueListener foninis thread'as.
+
+    - maxsize: eilės dydis; pilnoje eilėje taikoma drop_policy (drop_newest / drop_oldest)
+    - formatter (iš LOGGING dictConfig) perduodamas tiksliniam StreamHandler'iui
+    - listener paleidžiamas tingiai kiekviename procese (gunicorn preload_app + fork)
+    """
+
+    def __init__(self, maxsize=10000, drop_policy=DROP_NEWEST, stream=None):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop_policy: {drop_policy}")
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+        self._start_lock = threading.Lock()
+        super().__init__(queue.Queue(maxsize))
+
+    # dictConfig formatter'į nustato šiam handler'iui - iš tikrųjų formatuoja tikslinis handler'is
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Žinutė (msg % args) sujungiama iš karto kviečiančiame thread'e, kaip QueueHandler.prepare:
+        # kintami args (dict, list) ar LazyStr(request) vėliau gali būti pakeisti / nebegalioti.
+        # Listener'iui lieka tik formatter'is ir rašymas į stream.
+        # Išimties tekstas paruošiamas iš karto, nes traceback objektai gali būti atlaisvinti.
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        # Kopija - kiti to paties logger'io handler'iai gauna nepakeistą įrašą
+        record = copy.copy(record)
+        record.msg = message
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.drop_policy == DROP_OLDEST:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(record)
+                except (queue.Empty, queue.Full):
+                    pass
+            self.dropped += 1
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            # Po fork'o tėvinio proceso thread'ai neegzistuoja - sukuriama nauja eilė ir listener'is
+            if self._pid is not None:
+                self.queue = queue.Queue(self.maxsize)
+            self._listener = QueueListener(self.queue, _DropReportingHandler(self), respect_handler_level=False)
+            self._listener.start()
+            self._pid = pid
+            atexit.register(self.flush_and_stop)
+
+    def flush_and_stop(self):
+        """Sustabdo listener'į išrašant likusius eilės įrašus"""
+        listener = self._listener
+        if listener is not None and self._pid == os.getpid():
+            self._listener = None
+            self._pid = None
+            try:
+                listener.stop()
+            except queue.Full:
+                # Sentinel'io nepavyko įdėti į pilną eilę - foninis thread'as (daemon) baigsis su procesu
+                pass
+        self.target.flush()
+
+    def close(self):
+        self.flush_and_stop()
+        self.target.close()
+        super().close()
+
+
+class _DropReportingHandler(logging.Handler):
+    """Listener'io handler'is: perduoda įrašus tiksliniam handler'iui ir praneša apie atmestus įrašus"""
+
+    def __init__(self, owner):
+        super().__init__()
+        self.owner = owner
+        self._reported = 0
+
+    def handle(self, record):
+        dropped = self.owner.dropped
+        if dropped != self._reported:
+            self.owner.target.handle(logging.makeLogRecord({
+                'name': __name__,
+                'levelno': logging.WARNING,
+                'levelname': 'WARNING',
+                'msg': 'Log queue full: %s records dropped (%s)',
+                'args': (dropped - self._reported, self.owner.drop_policy),
+            }))
+            self._reported = dropped
+        self.owner.target.handle(record)
+        return True
+
+    def emit(self, record):
+        self.handle(record)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per-logger ribojimas (token bucket): kiekvienam logger'iui leidžiama `rate` įrašų per sekundę,
+    su `burst` rezervu. Ribojami tik logger'iai, kurių vardas prasideda `loggers` prefiksu
+    (tuščias sąrašas - visi). WARNING ir aukštesni įrašai neribojami.
+    Praleistų įrašų skaičius pažymimas kito praleisto įrašo `suppressed` atribute.
+    """
+
+    def __init__(self, rate=20, burst=100, loggers=(), name=''):
+        super().__init__(name)
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.loggers = tuple(loggers)
+        self._buckets = {}  # logger name -> [tokens, last_time, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.loggers and not record.name.startswith(self.loggers):
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [self.burst, now, 0]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                return False
+            bucket[0] = tokens - 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Struktūrizuotas JSON formatteris (viena eilutė - vienas įrašas)"""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.thread,
+            'func': record.funcName,
+            'line': record.lineno,
+        }
+        # extra={...} laukai ir RateLimitFilter 'suppressed'
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
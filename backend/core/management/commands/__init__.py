@@ -0,0 +1,3 @@
+# backend/core/management/commands/__init__.py
+
+# Management commands package
\ No newline at end of file
@@ -0,0 +1,75 @@
+# backend/core/management/commands/benchmark_compression.py
+# Benchmark: response size and latency per Accept-Encoding
+# PURPOSE: Report payload size and p50/p95 latency of the largest endpoints uncompressed vs every
+#          installed codec (core.compression) on `manage.py seed_synthetic_school` data
+# UPDATES: Created together with core.compression_middleware
+
+import statistics
+import time
+
+from django.conf import settings
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.compression import PREFERENCE, available_codecs
+from users.user_cache import user_cache
+
+from .benchmark_endpoints import Command as EndpointBenchmarkCommand
+
+
+class Command(EndpointBenchmarkCommand):
+    help = 'Išmatuoja didžiausių endpoint\'ų atsakymo dydį ir trukmę be suspaudimo ir su kiekvienu kodeku'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=30, help='Užklausų skaičius kiekvienam matavimui')
+
+    def handle(self, *args, **options):
+        fixtures = self._fixtures()
+        targets = [
+            ('weekly_schedule', 'mentor', '/api/schedule/schedules/weekly/'),
+            ('student_schedule', 'manager', next(
+                path for name, _, _, path, _ in self._targets(fixtures) if name == 'student_schedule'
+            )),
+            ('all_lessons', 'manager', '/api/plans/sequences/all_lessons/'),
+            ('imu_plans', 'manager', '/api/plans/imu-plans/'),
+        ]
+        codecs = available_codecs()
+        encodings = ['identity'] + [name for name in PREFERENCE if name in codecs]
+
+        self.stdout.write(
+            f"{'Endpoint':<18}{'Kodavimas':>10}{'KB':>10}{'Santykis':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        )
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            for name, role, path in targets:
+                client = Client()
+                client.cookies['access_token'] = str(AccessToken.for_user(fixtures['users'][role]))
+                identity_size = None
+                for encoding in encodings:
+                    size, p50, p95 = self._measure_encoding(client, path, encoding, options['requests'])
+                    identity_size = identity_size or size
+                    self.stdout.write(
+                        f"{name:<18}{encoding:>10}{size / 1024:>10.1f}{identity_size / size:>9.1f}x"
+                        f"{p50:>10.2f}{p95:>10.2f}"
+                    )
+        user_cache.clear()
+        self.stdout.write(self.style.SUCCESS('Matavimas baigtas'))
+
+    def _measure_encoding(self, client, path, encoding, requests):
+        response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+        if response.status_code != 200:
+            self.stderr.write(self.style.WARNING(f'{path}: status {response.status_code}'))
+        if encoding != 'identity' and response.get('Content-Encoding') != encoding:
+            self.stderr.write(self.style.WARNING(f'{path}: atsakymas nesuspaustas ({encoding})'))
+
+        durations = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+            durations.append((time.perf_counter() - start) * 1000)
+        durations.sort()
+        return (
+            len(response.content),
+            statistics.median(durations),
+            durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+        )
@@ -0,0 +1,191 @@
+# backend/core/management/commands/benchmark_endpoints.py
+# Endpoint benchmark runner
+# PURPOSE: Exercise the main API endpoints against a seeded synthetic school (`manage.py seed_synthetic_school`)
+#          and report p50/p95 latency and query counts as JSON (optionally compared with a previous run)
+# UPDATES: Created together with core.synthetic
+
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.synthetic import SYNTHETIC_MARKER, synthetic_users
+from plans.models import IMUPlan, LessonSequence
+from users.user_cache import user_cache
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Išmatuoja pagrindinių endpoint\'ų p50/p95 trukmę ir SQL užklausų skaičių sintetinėje mokykloje'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Užklausų skaičius kiekvienam endpoint\'ui')
+        parser.add_argument('--warmup', type=int, default=3, help='Apšilimo užklausų skaičius')
+        parser.add_argument('--only', action='append', default=[], help='Matuoti tik nurodytus endpoint\'us (pavadinimai)')
+        parser.add_argument('--output', help='Rezultatų JSON failas (numatytai - stdout)')
+        parser.add_argument('--compare', help='Ankstesnio paleidimo JSON failas palyginimui')
+
+    def handle(self, *args, **options):
+        fixtures = self._fixtures()
+        targets = [target for target in self._targets(fixtures) if not options['only'] or target[0] in options['only']]
+        if not targets:
+            raise CommandError('Nerasta endpoint\'ų pagal --only')
+
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        results = []
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            clients = {}
+            for role, user in fixtures['users'].items():
+                clients[role] = Client()
+                clients[role].cookies['access_token'] = str(AccessToken.for_user(user))
+            for name, role, method, path, data in targets:
+                results.append(self._measure(
+                    clients[role], name, role, method, path, data, options['requests'], options['warmup']
+                ))
+        user_cache.clear()
+
+        report = {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'results': results,
+        }
+        if options['compare']:
+            report['compare'] = self._compare(results, options['compare'])
+
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as target:
+                target.write(payload)
+            self.stdout.write(self.style.SUCCESS(f'Rezultatai išsaugoti: {options["output"]}'))
+        else:
+            self.stdout.write(payload)
+
+    def _fixtures(self):
+        """Vartotojai ir objektai, kuriems kviečiami endpoint'ai (iš sintetinių duomenų)"""
+        users = {}
+        for role in ('manager', 'mentor', 'student'):
+            users[role] = synthetic_users().filter(default_role=role).order_by('id').first()
+        if not all(users.values()):
+            raise CommandError('Sintetinių duomenų nėra - paleiskite `manage.py seed_synthetic_school`')
+
+        plan = (
+            IMUPlan.objects.filter(global_schedule__user=users['mentor'], grade__isnull=False)
+            .select_related('global_schedule').order_by('id').first()
+        )
+        if plan is None:
+            raise CommandError('Sintetinis mentorius neturi įvertintų IMU planų - padidinkite --weeks')
+        slot = plan.global_schedule
+        sequence = LessonSequence.objects.filter(
+            name__startswith=SYNTHETIC_MARKER, subject_id=slot.subject_id, level_id=slot.level_id
+        ).first()
+        term = IMUPlan.objects.filter(global_schedule__user=users['mentor'])
+        return {
+            'users': users,
+            'plan': plan,
+            'slot': slot,
+            'sequence': sequence,
+            'start_date': term.order_by('global_schedule__date').values_list('global_schedule__date', flat=True).first(),
+            'end_date': term.order_by('-global_schedule__date').values_list('global_schedule__date', flat=True).first(),
+        }
+
+    def _targets(self, fixtures):
+        """(pavadinimas, rolė, metodas, kelias, POST duomenys)"""
+        plan, slot = fixtures['plan'], fixtures['slot']
+        week_start = (slot.date - timedelta(days=slot.date.weekday())).isoformat()
+        targets = [
+            ('weekly_schedule', 'mentor', 'get', '/api/schedule/schedules/weekly/', None),
+            ('daily_schedule', 'mentor', 'get', f'/api/schedule/schedules/daily/?date={slot.date.isoformat()}', None),
+            ('student_schedule', 'manager', 'get',
+             f'/api/schedule/schedules/student-schedule/?student_id={plan.student_id}&week_start={week_start}', None),
+            ('attendance_stats', 'manager', 'get',
+             f'/api/plans/imu-plans/attendance_stats/?student_id={plan.student_id}&subject_id={slot.subject_id}', None),
+            ('bulk_attendance_stats', 'manager', 'get',
+             f'/api/plans/imu-plans/bulk_attendance_stats/?subject_id={slot.subject_id}', None),
+            ('grades_student_summary', 'manager', 'get',
+             f'/api/grades/grades/student_summary/?student_id={plan.student_id}', None),
+            ('grades_lesson_summary', 'manager', 'get',
+             f'/api/grades/grades/lesson_summary/?lesson_id={plan.lesson_id}', None),
+            ('violation_stats', 'manager', 'get', '/api/violations/stats/', None),
+            ('violation_category_stats', 'manager', 'get', '/api/violations/category-stats/', None),
+        ]
+        if fixtures['sequence'] is not None:
+            targets.append(('generate_student_plan', 'mentor', 'post',
+                            '/api/plans/sequences/generate_student_plan_optimized/', {
+                                'student_id': plan.student_id,
+                                'subject_id': slot.subject_id,
+                                'level_id': slot.level_id,
+                                'lesson_sequence_id': fixtures['sequence'].id,
+                                'start_date': fixtures['start_date'].isoformat(),
+                                'end_date': fixtures['end_date'].isoformat(),
+                            }))
+        return targets
+
+    def _call(self, client, method, path, data):
+        if method == 'get':
+            return client.get(path)
+        # Rašančios užklausos atšaukiamos - kiekvienas kartojimas mato tą pačią būseną
+        with transaction.atomic():
+            response = client.post(path, data, content_type='application/json')
+            transaction.set_rollback(True)
+        return response
+
+    def _measure(self, client, name, role, method, path, data, requests, warmup):
+        for _ in range(warmup):
+            self._call(client, method, path, data)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._call(client, method, path, data)
+        # request_started signalas išvalo queries_log, todėl skaičius fiksuojamas iš karto
+        query_count = len(queries)
+        if response.status_code >= 400:
+            self.stderr.write(self.style.WARNING(f'{name}: status {response.status_code}'))
+
+        durations = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            self._call(client, method, path, data)
+            durations.append((time.perf_counter() - start) * 1000)
+
+        durations.sort()
+        return {
+            'name': name,
+            'role': role,
+            'method': method.upper(),
+            'path': path,
+            'status': response.status_code,
+            'queries': query_count,
+            'mean_ms': round(statistics.fmean(durations), 3),
+            'p50_ms': round(_percentile(durations, 0.50), 3),
+            'p95_ms': round(_percentile(durations, 0.95), 3),
+        }
+
+    def _compare(self, results, baseline_path):
+        """Skirtumai lyginant su ankstesniu paleidimu (teigiamas - lėčiau / daugiau užklausų)"""
+        try:
+            with open(baseline_path) as source:
+                baseline = {result['name']: result for result in json.load(source)['results']}
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Nepavyko nuskaityti {baseline_path}: {e}')
+
+        compare = {}
+        for result in results:
+            previous = baseline.get(result['name'])
+            if previous is None:
+                continue
+            compare[result['name']] = {
+                'queries': result['queries'] - previous['queries'],
+                'p50_ms': round(result['p50_ms'] - previous['p50_ms'], 3),
+                'p95_ms': round(result['p95_ms'] - previous['p95_ms'], 3),
+            }
+        return compare
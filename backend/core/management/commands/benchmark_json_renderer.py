@@ -0,0 +1,80 @@
+# backend/core/management/commands/benchmark_json_renderer.py
+# Micro-benchmark: DRF JSONRenderer/JSONParser vs core.renderers (orjson)
+# PURPOSE: Measure render/parse time on representative payloads (IMU plans, week schedule, lesson library)
+# UPDATES: Created together with core.renderers; payloads come from `manage.py seed_synthetic_school` data
+
+import statistics
+import time
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import ORJSON_AVAILABLE, ORJSONParser, ORJSONRenderer
+from curriculum.models import Lesson
+from curriculum.serializers import LessonSerializer
+from plans.serializers import IMUPlanSerializer
+from plans.views import IMUPlanViewSet
+from schedule.models import GlobalSchedule
+from schedule.serializers import GlobalScheduleSerializer
+
+
+class Command(BaseCommand):
+    help = 'Palygina standartinio DRF JSON renderer/parser ir orjson (core.renderers) greitį'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=50, help='Matavimų skaičius kiekvienam payload')
+        parser.add_argument('--limit', type=int, default=2000, help='Daugiausia įrašų viename payload')
+
+    def handle(self, *args, **options):
+        if not ORJSON_AVAILABLE:
+            raise CommandError('orjson neįdiegtas (pip install orjson)')
+
+        payloads = self._payloads(options['limit'])
+        if not any(data for data in payloads.values()):
+            raise CommandError('Duomenų nėra - paleiskite `manage.py seed_synthetic_school`')
+
+        self.stdout.write(
+            f"{'Payload':<18}{'Įrašų':>7}{'KB':>9}{'Veiksmas':>10}{'DRF ms':>10}{'orjson ms':>11}{'Greičiau':>10}"
+        )
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            for action, baseline, fast in (
+                ('render', lambda: JSONRenderer().render(data), lambda: ORJSONRenderer().render(data)),
+                ('parse', lambda: JSONParser().parse(BytesIO(body)), lambda: ORJSONParser().parse(BytesIO(body))),
+            ):
+                baseline_ms = self._measure(baseline, options['rounds'])
+                fast_ms = self._measure(fast, options['rounds'])
+                self.stdout.write(
+                    f"{name:<18}{len(data):>7}{len(body) / 1024:>9.1f}{action:>10}{baseline_ms:>10.2f}"
+                    f"{fast_ms:>11.2f}{baseline_ms / fast_ms:>9.1f}x"
+                )
+
+        self.stdout.write(self.style.SUCCESS('Matavimas baigtas'))
+
+    def _payloads(self, limit):
+        """Serializuoti duomenys tokie pat, kokius grąžina endpoint'ai"""
+        plans = IMUPlanViewSet.queryset.order_by('-created_at')[:limit]
+        first = GlobalSchedule.objects.order_by('date').values_list('date', flat=True).first()
+        week = GlobalSchedule.objects.none()
+        if first:
+            week = GlobalSchedule.objects.filter(date__range=[first, first + timedelta(days=6)])
+        lessons = LessonSerializer.optimize_queryset(Lesson.objects.all())[:limit]
+        return {
+            'imu_plans': IMUPlanSerializer(plans, many=True).data,
+            'week_schedule': GlobalScheduleSerializer(
+                GlobalScheduleSerializer.optimize_queryset(week)[:limit], many=True
+            ).data,
+            'lesson_library': LessonSerializer(lessons, many=True).data,
+        }
+
+    def _measure(self, func, rounds):
+        func()
+        durations = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations)
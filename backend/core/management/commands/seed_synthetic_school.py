@@ -0,0 +1,49 @@
+# backend/core/management/commands/seed_synthetic_school.py
+# Synthetic school seeder
+# PURPOSE: Fill the database with a realistic school (core.synthetic) for benchmarks and profiling
+# UPDATES: Created together with core.synthetic and `manage.py benchmark_endpoints`
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.synthetic import build_synthetic_school, delete_synthetic_school, synthetic_users
+
+
+class Command(BaseCommand):
+    help = 'Sugeneruoja sintetinę mokyklą (vartotojai, tvarkaraštis, IMU planai, vertinimai, pažeidimai)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200, help='Mokinių skaičius')
+        parser.add_argument('--mentors', type=int, default=20, help='Mentorių skaičius')
+        parser.add_argument('--weeks', type=int, default=4, help='Tvarkaraščio savaičių skaičius')
+        parser.add_argument('--class-size', type=int, default=15, help='Daugiausia mokinių vienoje pamokoje')
+        parser.add_argument('--seed', type=int, default=1, help='Atsitiktinių skaičių generatoriaus sėkla')
+        parser.add_argument('--flush', action='store_true', help='Prieš generuojant pašalinti ankstesnius sintetinius duomenis')
+
+    def handle(self, *args, **options):
+        if settings.PRODUCTION_MODE:
+            raise CommandError('Sintetiniai duomenys negeneruojami production režime')
+        if options['students'] < 1 or options['mentors'] < 1 or options['weeks'] < 1:
+            raise CommandError('--students, --mentors ir --weeks turi būti teigiami')
+
+        if options['flush']:
+            deleted = delete_synthetic_school()
+            self.stdout.write(f'Pašalinta sintetinių įrašų: {deleted}')
+        elif synthetic_users().exists():
+            raise CommandError('Sintetiniai duomenys jau yra - naudokite --flush')
+
+        start = time.perf_counter()
+        counts = build_synthetic_school(
+            students=options['students'],
+            mentors=options['mentors'],
+            weeks=options['weeks'],
+            class_size=options['class_size'],
+            seed=options['seed'],
+        )
+        elapsed = time.perf_counter() - start
+
+        for name, value in counts.items():
+            self.stdout.write(f'{name:<24}{value}')
+        self.stdout.write(self.style.SUCCESS(f'Sintetinė mokykla sugeneruota per {elapsed:.1f} s'))
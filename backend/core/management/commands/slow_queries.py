@@ -0,0 +1,50 @@
+# backend/core/management/commands/slow_queries.py
+# Slow SQL report (core.slow_queries)
+# PURPOSE: List top slow queries captured by all gunicorn workers, optionally with EXPLAIN plans
+# UPDATES: Created together with core.slow_query_middleware
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import ORDERINGS, reset, top_offenders
+
+
+class Command(BaseCommand):
+    help = 'Parodo lėčiausias SQL užklausas (pagal bendrą laiką) iš visų worker\'ių'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Kiek užklausų parodyti')
+        parser.add_argument('--order-by', choices=ORDERINGS, default='total_ms', help='Rikiavimo laukas')
+        parser.add_argument('--plans', action='store_true', help='Rodyti EXPLAIN planus')
+        parser.add_argument('--json', action='store_true', help='Išvesti JSON formatu')
+        parser.add_argument('--reset', action='store_true', help='Išvalyti sukauptus duomenis')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset()
+            self.stdout.write(self.style.SUCCESS('Lėtų užklausų duomenys išvalyti'))
+            return
+
+        entries = top_offenders(limit=options['limit'], order_by=options['order_by'])
+        if options['json']:
+            self.stdout.write(json.dumps(entries, indent=2, ensure_ascii=False))
+            return
+        if not entries:
+            self.stdout.write('Lėtų užklausų nerasta')
+            return
+
+        self.stdout.write(f"{'total ms':>10}{'count':>7}{'avg ms':>9}{'max ms':>9}  SQL")
+        for entry in entries:
+            self.stdout.write(
+                f"{entry['total_ms']:>10.1f}{entry['count']:>7}{entry['avg_ms']:>9.1f}{entry['max_ms']:>9.1f}"
+                f"  {entry['sql'][:200]}"
+            )
+            views = ', '.join(f'{view} ({count})' for view, count in sorted(
+                entry['views'].items(), key=lambda item: item[1], reverse=True
+            ))
+            self.stdout.write(f"{'':>37}views: {views}")
+            self.stdout.write(f"{'':>37}params: {entry['last_params']}")
+            if options['plans'] and entry['plan']:
+                for line in entry['plan'].splitlines():
+                    self.stdout.write(f"{'':>37}| {line}")
@@ -0,0 +1,272 @@
+# /backend/core/metrics.py
+# Request metrics for A-DIENYNAS (Prometheus text format)
+# PURPOSE: Per-view latency, DB query count/time, response size and status metrics,
+#          aggregated across gunicorn workers through per-process files in a shared directory
+# UPDATES: Created together with core.metrics_middleware and /api/metrics (no external service needed)
+
+import atexit
+import fcntl
+import glob
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), 'dienynas-metrics')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Metrikos pavadinimas -> (tipas, aprašymas, label'ių pavadinimai, histogramos ribos)
+METRICS = {
+    'http_requests_total': (
+        'counter', 'HTTP requests by view, method and status.', ('view', 'method', 'status'), None),
+    'http_request_duration_seconds': (
+        'histogram', 'HTTP request latency in seconds.', ('view', 'method'), LATENCY_BUCKETS),
+    'http_request_db_queries': (
+        'histogram', 'DB queries executed per HTTP request.', ('view', 'method'), QUERY_COUNT_BUCKETS),
+    'http_request_db_duration_seconds': (
+        'histogram', 'Total DB time per HTTP request in seconds.', ('view', 'method'), DB_TIME_BUCKETS),
+    'http_response_size_bytes': (
+        'histogram', 'HTTP response body size in bytes.', ('view', 'method'), SIZE_BUCKETS),
+}
+
+PROCESS_FILE = 'metrics_{pid}.json'
+ARCHIVE_FILE = 'metrics_archive.json'  # baigusių darbą worker'ių suvestinė
+LOCK_FILE = '.lock'
+
+
+def get_metrics_dir():
+    """
+    Bendras visų worker'ių katalogas. gunicorn hook'ai (on_starting) kviečiami
+    prieš Django nustatymų užkrovimą, todėl tada naudojamas METRICS_MULTIPROC_DIR.
+    """
+    if settings.configured:
+        return settings.METRICS['DIR']
+    return os.getenv('METRICS_MULTIPROC_DIR', DEFAULT_DIR)
+
+
+def _new_value(kind, buckets):
+    # Histograma: [kiekvieno intervalo skaičiai (+Inf paskutinis), suma, kiekis]
+    if kind == 'histogram':
+        return [[0] * (len(buckets) + 1), 0.0, 0]
+    return 0.0
+
+
+def _bucket_index(buckets, value):
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            return index
+    return len(buckets)
+
+
+class MetricsStore:
+    """
+    Vieno proceso metrikos atmintyje. Į savo failą (metrics_<pid>.json) išrašomos
+    ne dažniau nei kas FLUSH_INTERVAL sekundžių ir proceso pabaigoje,
+    todėl užklausos kelyje nėra failų I/O.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._data = {}
+        self._dirty = False
+        self._last_flush = 0.0
+
+    def _ensure_process(self):
+        # Po fork'o (gunicorn preload_app) tėvinio proceso reikšmės nekopijuojamos į naują failą
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._data = {}
+            self._dirty = False
+            self._last_flush = time.monotonic()
+            atexit.register(self.flush)
+
+    def _value(self, name, labels):
+        kind, _, _, buckets = METRICS[name]
+        series = self._data.setdefault(name, {})
+        value = series.get(labels)
+        if value is None:
+            value = series[labels] = _new_value(kind, buckets)
+        return value
+
+    def inc(self, name, labels, amount=1):
+        with self._lock:
+            self._ensure_process()
+            series = self._data.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + amount
+            self._dirty = True
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][3]
+        with self._lock:
+            self._ensure_process()
+            histogram = self._value(name, labels)
+            histogram[0][_bucket_index(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+            self._dirty = True
+
+    def maybe_flush(self):
+        interval = settings.METRICS['FLUSH_INTERVAL']
+        if self._dirty and time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        """Atomiškai perrašo šio proceso failą (tmp + os.replace)"""
+        with self._lock:
+            if self._pid != os.getpid() or not self._dirty:
+                return
+            directory = get_metrics_dir()
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+            with os.fdopen(fd, 'w') as tmp:
+                json.dump(_serialize(self._data), tmp)
+            os.replace(tmp_path, os.path.join(directory, PROCESS_FILE.format(pid=self._pid)))
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._data = {}
+            self._dirty = False
+
+
+def _serialize(data):
+    return {name: [[list(labels), value] for labels, value in series.items()] for name, series in data.items()}
+
+
+def _merge_into(merged, payload):
+    for name, rows in payload.items():
+        if name not in METRICS:
+            continue
+        kind, _, _, buckets = METRICS[name]
+        series = merged.setdefault(name, {})
+        for labels, value in rows:
+            labels = tuple(labels)
+            if kind == 'histogram':
+                current = series.get(labels)
+                if current is None:
+                    current = series[labels] = _new_value(kind, buckets)
+                current[0] = [a + b for a, b in zip(current[0], value[0])]
+                current[1] += value[1]
+                current[2] += value[2]
+            else:
+                series[labels] = series.get(labels, 0.0) + value
+
+
+def _read(path):
+    try:
+        with open(path) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return {}
+
+
+class _DirectoryLock:
+    """fcntl užraktas: archyvo sujungimas ir skaitymas nevyksta vienu metu"""
+
+    def __init__(self, directory, exclusive):
+        self.path = os.path.join(directory, LOCK_FILE)
+        self.operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        fcntl.flock(self.file, self.operation)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def collect():
+    """Sujungia visų procesų (ir archyvo) metrikas"""
+    store.flush()
+    directory = get_metrics_dir()
+    merged = {}
+    if not os.path.isdir(directory):
+        return merged
+    with _DirectoryLock(directory, exclusive=False):
+        paths = glob.glob(os.path.join(directory, 'metrics_*.json'))
+        for path in sorted(paths):
+            _merge_into(merged, _read(path))
+    return merged
+
+
+def mark_process_dead(pid):
+    """
+    gunicorn child_exit hook'as: baigusio worker'io failas sujungiamas į archyvą,
+    kad failų skaičius neaugtų (max_requests perkrauna worker'ius), o counter'iai nemažėtų.
+    """
+    directory = get_metrics_dir()
+    path = os.path.join(directory, PROCESS_FILE.format(pid=pid))
+    if not os.path.exists(path):
+        return
+    with _DirectoryLock(directory, exclusive=True):
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        merged = {}
+        _merge_into(merged, _read(archive_path))
+        _merge_into(merged, _read(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+        with os.fdopen(fd, 'w') as tmp:
+            json.dump(_serialize(merged), tmp)
+        os.replace(tmp_path, archive_path)
+        os.remove(path)
+
+
+def reset_metrics_dir():
+    """gunicorn on_starting hook'as: ankstesnio paleidimo metrikos išvalomos"""
+    directory = get_metrics_dir()
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render(merged):
+    """Prometheus text exposition format 0.0.4"""
+    lines = []
+    for name, (kind, help_text, label_names, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(merged.get(name, {}).items()):
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(label_names, labels)} {_format_number(value)}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip((*buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else _format_number(float(bound))
+                lines.append(f'{name}_bucket{_format_labels(label_names, labels, ("le", le))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(label_names, labels)} {_format_number(total)}')
+            lines.append(f'{name}_count{_format_labels(label_names, labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+# Proceso metrikų saugykla (viena kiekviename worker'yje)
+store = MetricsStore()
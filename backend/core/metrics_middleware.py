@@ -0,0 +1,103 @@
+# /backend/core/metrics_middleware.py
+# Request instrumentation middleware for A-DIENYNAS
+# PURPOSE: Record latency, DB query count/time (connection.execute_wrapper), response size and status
+#          per DRF view/action into core.metrics
+# UPDATES: Created together with /api/metrics; first in MIDDLEWARE so the whole stack is measured
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from users.request_logging import response_size
+
+from .metrics import store
+
+logger = logging.getLogger(__name__)
+
+KNOWN_METHODS = frozenset(('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS'))
+
+
+class QueryTimer:
+    """connection.execute_wrapper: užklausų skaičius ir bendra DB trukmė"""
+
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def view_label(request):
+    """
+    Žemo kardinalumo view pavadinimas: DRF ViewSet -> 'Klasė.action',
+    APIView / @api_view -> klasės (funkcijos) pavadinimas, kiti -> URL pavadinimas.
+    Middleware atsakymai (pvz. auth fast path) nurodo request.metrics_view.
+    """
+    label = getattr(request, 'metrics_view', None)
+    if label:
+        return label
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    func = match.func
+    cls = getattr(func, 'cls', None)
+    if cls is None:
+        return match.view_name or getattr(func, '__name__', 'unknown')
+    actions = getattr(func, 'actions', None)
+    if actions:
+        return f"{cls.__name__}.{actions.get(request.method.lower(), 'not_allowed')}"
+    return cls.__name__
+
+
+class MetricsMiddleware:
+    """
+    Matuoja kiekvieną užklausą ir įrašo į proceso metrikų saugyklą.
+    Failų I/O vyksta ne dažniau nei kas METRICS['FLUSH_INTERVAL'] sekundžių.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.METRICS['ENABLED']
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        try:
+            self._record(request, response, duration, timer)
+        except Exception:
+            # Metrikos niekada neturi sugadinti atsakymo
+            logger.exception("Failed to record request metrics")
+        return response
+
+    def _record(self, request, response, duration, timer):
+        method = request.method if request.method in KNOWN_METHODS else 'OTHER'
+        labels = (view_label(request), method)
+
+        store.inc('http_requests_total', (*labels, str(response.status_code)))
+        store.observe('http_request_duration_seconds', labels, duration)
+        store.observe('http_request_db_queries', labels, timer.count)
+        store.observe('http_request_db_duration_seconds', labels, timer.duration)
+
+        size = response_size(
+            response, lambda streamed: store.observe('http_response_size_bytes', labels, streamed)
+        )
+        if size is not None:
+            store.observe('http_response_size_bytes', labels, size)
+        store.maybe_flush()
@@ -0,0 +1,37 @@
+# /backend/core/metrics_views.py
+# Prometheus scrape endpoint for A-DIENYNAS
+# PURPOSE: Expose core.metrics aggregated across all gunicorn workers at /api/metrics
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from .metrics import collect, render
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _authorized(request):
+    """
+    METRICS['TOKEN'] nustatytas - reikalingas 'Authorization: Bearer <token>';
+    nenustatytas - endpoint'as pasiekiamas tik ne production režime.
+    """
+    token = settings.METRICS['TOKEN']
+    if not token:
+        return not settings.PRODUCTION_MODE
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return hmac.compare_digest(header, f'Bearer {token}')
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Prometheus text format metrikos (visų worker'ių suma)
+    """
+    if not _authorized(request):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,146 @@
+# /backend/core/profiling.py
+# On-demand request profiler for A-DIENYNAS
+# PURPOSE: Run a single manager-requested request under cProfile, capture its SQL with timings
+#          and build a text report (returned as attachment or stored for later download)
+# UPDATES: Created together with core.profiling_middleware and /api/profiles/
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+REPORT_SUFFIX = '.txt'
+STATS_SUFFIX = '.prof'
+PROFILE_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# SQL normalizavimas dublikatų (N+1) grupavimui: skaičiai ir eilutės -> ?
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class SQLRecorder:
+    """connection.execute_wrapper: kiekviena užklausa su trukme (tik profiliuojamai užklausai)"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, params, time.perf_counter() - start, many))
+
+    @property
+    def total_time(self):
+        return sum(query[2] for query in self.queries)
+
+
+class RequestProfile:
+    """Vienos užklausos profilis: cProfile + SQL įrašai"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.profiler = cProfile.Profile()
+        self.sql = SQLRecorder()
+        self.duration = 0.0
+        self._started = None
+
+    def start(self):
+        # ValueError, jei kitas profiliuotojas jau aktyvus
+        self.profiler.enable()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self._started
+
+    def report(self, request, response):
+        config = settings.PROFILING
+        out = io.StringIO()
+        user = getattr(request, 'user', None)
+        out.write(f"Profile {self.id}\n")
+        out.write(f"Request: {request.method} {request.get_full_path()}\n")
+        out.write(f"User: {getattr(user, 'id', None)} ({getattr(request, 'current_role', None)})\n")
+        out.write(f"Status: {response.status_code}\n")
+        out.write(f"Duration: {self.duration * 1000:.1f} ms\n")
+        out.write(f"SQL: {len(self.sql.queries)} queries, {self.sql.total_time * 1000:.1f} ms\n")
+
+        # Pasikartojančios užklausos (tipiškas N+1 požymis)
+        groups = defaultdict(lambda: [0, 0.0])
+        for sql, _, duration, _ in self.sql.queries:
+            group = groups[_SQL_LITERALS.sub('?', sql)]
+            group[0] += 1
+            group[1] += duration
+        repeated = sorted(((count, total, sql) for sql, (count, total) in groups.items() if count > 1), reverse=True)
+        if repeated:
+            out.write("\n== Repeated SQL (count, total ms) ==\n")
+            for count, total, sql in repeated[:config['TOP_SQL']]:
+                out.write(f"{count:>5} {total * 1000:>9.1f}  {sql}\n")
+
+        out.write("\n== Slowest SQL (ms) ==\n")
+        slowest = sorted(self.sql.queries, key=lambda query: query[2], reverse=True)
+        for sql, params, duration, many in slowest[:config['TOP_SQL']]:
+            suffix = ' [executemany]' if many else ''
+            out.write(f"{duration * 1000:>9.2f}  {sql}  -- params: {params!r}{suffix}\n")
+
+        out.write(f"\n== cProfile (top {config['TOP_FUNCTIONS']} by cumulative time) ==\n")
+        stats = pstats.Stats(self.profiler, stream=out)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(config['TOP_FUNCTIONS'])
+        return out.getvalue()
+
+    def save(self, report):
+        """Išsaugo ataskaitą ir pstats failą PROFILING['DIR'] kataloge (bendras visiems worker'iams)"""
+        directory = settings.PROFILING['DIR']
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, self.id + REPORT_SUFFIX), 'w') as target:
+            target.write(report)
+        self.profiler.dump_stats(os.path.join(directory, self.id + STATS_SUFFIX))
+        prune_reports(directory, settings.PROFILING['MAX_REPORTS'])
+
+
+def _stored_reports(directory):
+    """Ataskaitų failai, naujausi pirmi"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(REPORT_SUFFIX)),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+
+
+def prune_reports(directory, keep):
+    """Paliekamos tik naujausios `keep` ataskaitos"""
+    for entry in _stored_reports(directory)[keep:]:
+        profile_id = entry.name[:-len(REPORT_SUFFIX)]
+        for suffix in (REPORT_SUFFIX, STATS_SUFFIX):
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def stored_profile_path(profile_id, suffix=REPORT_SUFFIX):
+    """Išsaugoto profilio kelias arba None (id tikrinamas, kad nebūtų path traversal)"""
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILING['DIR'], profile_id + suffix)
+    return path if os.path.exists(path) else None
+
+
+def list_profiles():
+    return [
+        {
+            'id': entry.name[:-len(REPORT_SUFFIX)],
+            'created_at': datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc).isoformat(),
+            'size': entry.stat().st_size,
+        }
+        for entry in _stored_reports(settings.PROFILING['DIR'])
+    ]
@@ -0,0 +1,78 @@
+# /backend/core/profiling_middleware.py
+# On-demand profiling middleware for A-DIENYNAS
+# PURPOSE: Profile a single request when a manager asks for it (X-Profile header or ?_profile= parameter)
+# UPDATES: Created together with core.profiling; placed after RoleValidationMiddleware (needs validated role)
+
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+
+from .profiling import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_X_PROFILE'
+QUERY_PARAM = '_profile'
+MODE_DOWNLOAD = 'download'  # ataskaita grąžinama vietoj atsakymo (attachment)
+MODE_STORE = 'store'  # atsakymas grąžinamas įprastai, ataskaita išsaugoma (X-Profile-Id)
+
+
+def requested_mode(request):
+    """Profiliavimo režimas iš antraštės ar query parametro (None - neprašoma)"""
+    value = request.META.get(HEADER) or request.GET.get(QUERY_PARAM)
+    if not value:
+        return None
+    return MODE_DOWNLOAD if value == MODE_DOWNLOAD else MODE_STORE
+
+
+class ProfilingMiddleware:
+    """
+    Užklausa profiliuojama (cProfile + SQL su trukmėmis) tik kai:
+    - PROFILING['ENABLED'],
+    - pateikta X-Profile antraštė arba ?_profile= parametras,
+    - vartotojas prisijungęs ir jo validuota rolė yra manager.
+    Kitais atvejais - tik antraštės ir query eilutės patikrinimas, jokio papildomo darbo.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.PROFILING['ENABLED']
+
+    def __call__(self, request):
+        if not self.enabled or (HEADER not in request.META and QUERY_PARAM not in request.META.get('QUERY_STRING', '')):
+            return self.get_response(request)
+
+        mode = requested_mode(request)
+        user = getattr(request, 'user', None)
+        if mode is None or not (user and user.is_authenticated and getattr(request, 'current_role', None) == 'manager'):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        try:
+            profile.start()
+        except ValueError as e:
+            # Kitas profiliuotojas jau aktyvus - užklausa vykdoma įprastai
+            logger.warning("Request profiling unavailable: %s", e)
+            return self.get_response(request)
+        try:
+            with connection.execute_wrapper(profile.sql):
+                response = self.get_response(request)
+        finally:
+            profile.stop()
+
+        report = profile.report(request, response)
+        logger.info("Profiled %s %s for user %s: %.1f ms, %s queries (profile %s)",
+                    request.method, request.path, user.id, profile.duration * 1000,
+                    len(profile.sql.queries), profile.id)
+
+        if mode == MODE_DOWNLOAD:
+            download = HttpResponse(report, content_type='text/plain; charset=utf-8')
+            download['Content-Disposition'] = f'attachment; filename="profile-{profile.id}.txt"'
+            download['X-Profile-Id'] = profile.id
+            return download
+
+        profile.save(report)
+        response['X-Profile-Id'] = profile.id
+        return response
@@ -0,0 +1,38 @@
+# /backend/core/profiling_views.py
+# Stored request profiles for A-DIENYNAS
+# PURPOSE: Manager-only list and download of profiles stored by core.profiling_middleware
+
+from django.http import FileResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from curriculum.permissions import ManagerOnlyPermission
+
+from .profiling import STATS_SUFFIX, list_profiles, stored_profile_path
+
+
+@api_view(['GET'])
+@permission_classes([ManagerOnlyPermission])
+def profile_list(request):
+    """
+    Išsaugotų profilių sąrašas (naujausi pirmi)
+    """
+    return Response(list_profiles())
+
+
+@api_view(['GET'])
+@permission_classes([ManagerOnlyPermission])
+def profile_download(request, profile_id):
+    """
+    Profilio ataskaita (tekstas) arba ?format=pstats - cProfile failas (snakeviz, pstats)
+    """
+    if request.query_params.get('format') == 'pstats':
+        path = stored_profile_path(profile_id, STATS_SUFFIX)
+        filename, content_type = f'profile-{profile_id}.prof', 'application/octet-stream'
+    else:
+        path = stored_profile_path(profile_id)
+        filename, content_type = f'profile-{profile_id}.txt', 'text/plain; charset=utf-8'
+
+    if path is None:
+        return Response({'error': 'Profilis nerastas'}, status=404)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
@@ -0,0 +1,62 @@
+# /backend/core/renderers.py
+# Fast JSON renderer/parser for A-DIENYNAS API
+# PURPOSE: orjson based drop-in replacements for DRF JSONRenderer/JSONParser (large IMUPlan, schedule
+#          and lesson payloads); output matches rest_framework.utils.encoders.JSONEncoder
+# UPDATES: Used from REST_FRAMEWORK in core/settings.py when FAST_JSON_ENABLED and orjson is installed
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson neprivalomas
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+
+# datetime/date/time perduodami DRF enkoderiui (tas pats formatas: ms tikslumas, 'Z' UTC laikui);
+# raktai ne eilutės (pvz. int) leidžiami kaip ir stdlib json
+OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if ORJSON_AVAILABLE else 0
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Decimal, datetime, UUID, QuerySet, lazy vertimai ir kt. - kaip DRF JSONRenderer
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer per orjson. Lietuviški simboliai rašomi UTF-8 (kaip UNICODE_JSON=True), kompaktiškai.
+    Užklausos su indent (naršomas API, Accept: application/json; indent=N) ir reikšmės,
+    kurių orjson nepalaiko (pvz. > 64 bitų int), perduodamos standartiniam JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(data, default=_default, option=OPTIONS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser per orjson (tik UTF-8 - kitos koduotės perduodamos standartiniam JSONParser)"""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -14,6 +14,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import os
+import tempfile
+from importlib.util import find_spec
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -124,6 +126,7 @@ INSTALLED_APPS = [
     'django.contrib.sites',  # Required for django-allauth
     
     # Local apps
+    'core',  # projekto lygio management komandos (sintetiniai duomenys, benchmark'ai, lėtos užklausos)
     'users',
     'crm',
     'schedule',
@@ -148,22 +151,45 @@ INSTALLED_APPS = [
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
+# core.lean_middleware.* - tie patys Django middleware, bet praleidžiami /api/ užklausoms
+# (JWT cookie autentifikacija stateless - sesija, CSRF ir messages API nereikalingi)
 MIDDLEWARE = [
+    'core.metrics_middleware.MetricsMiddleware',  # Request metrics (/api/metrics) - first, measures the whole stack
+    'core.slow_query_middleware.SlowQueryMiddleware',  # Slow SQL capture with sampled EXPLAIN
+    'core.compression_middleware.CompressionMiddleware',  # Accept-Encoding negotiated br/zstd/gzip for /api/
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.lean_middleware.SessionMiddleware',  # Not for /api/
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
+    'users.fast_auth_middleware.AuthFastPathMiddleware',  # AuthManager fast path (auth/validate/, me/) - after CORS, before the rest
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'allauth.account.middleware.AccountMiddleware',  # django-allauth middleware
+    'core.lean_middleware.CsrfViewMiddleware',  # Not for /api/
+    'core.lean_middleware.AuthenticationMiddleware',  # Not for /api/ (RoleValidationMiddleware authenticates via JWT)
+    'allauth.account.middleware.AccountMiddleware',  # django-allauth middleware (allauth requires this exact path)
     'users.middleware.RoleValidationMiddleware',  # SEC-011: Secure role validation (after auth)
+    'core.profiling_middleware.ProfilingMiddleware',  # On-demand manager profiling (needs validated role)
     'users.enhanced_logging_middleware.EnhancedLoggingMiddleware',  # Enhanced logging with user details
     'users.auth_logging_middleware.AuthLoggingMiddleware',  # Authentication-specific logging
-    'users.oauth_middleware.OAuthCallbackMiddleware',  # OAuth JWT token generation
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'core.lean_middleware.OAuthCallbackMiddleware',  # OAuth JWT token generation, not for /api/
+    'core.lean_middleware.MessageMiddleware',  # Not for /api/
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Atsakymų suspaudimas (core.compression_middleware); br/zstd - jei įdiegti brotli/zstandard paketai
+COMPRESSION = {
+    'ENABLED': os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true',
+    'MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', 1024)),  # baitai; mažesni atsakymai nesuspaudžiami
+    'PATH_PREFIXES': ('/api/',),
+    'CONTENT_TYPES': ('application/json', 'text/', 'application/javascript'),
+    'GZIP_LEVEL': int(os.getenv('COMPRESSION_GZIP_LEVEL', 6)),
+    'BROTLI_LEVEL': int(os.getenv('COMPRESSION_BROTLI_LEVEL', 5)),
+    'ZSTD_LEVEL': int(os.getenv('COMPRESSION_ZSTD_LEVEL', 3)),
+}
+
+# API (lean) middleware stack'as: prefiksai ir išimtys (OAuth srautui reikalinga sesija)
+LEAN_API_ENABLED = os.getenv('LEAN_API_ENABLED', 'True').lower() == 'true'
+LEAN_API_PREFIXES = ('/api/',)
+LEAN_API_EXCLUDE = ('/api/users/oauth/',)
+
 # Add production-specific middleware
 if PRODUCTION_MODE:
     MIDDLEWARE.append('django.middleware.common.BrokenLinkEmailsMiddleware')  # Broken link notifications for production
@@ -266,6 +292,9 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 # REST Framework settings
+# orjson JSON renderer/parser (core.renderers); be orjson paketo - standartiniai DRF klasės
+FAST_JSON_ENABLED = os.getenv('FAST_JSON_ENABLED', 'True').lower() == 'true' and find_spec('orjson') is not None
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'users.authentication.JWTCookieAuthentication',  # SEC-001: Cookie-based authentication
@@ -274,8 +303,12 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer' if FAST_JSON_ENABLED else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        'core.renderers.ORJSONParser' if FAST_JSON_ENABLED else 'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ),
@@ -319,6 +352,113 @@ SIMPLE_JWT = {
     'AUTH_COOKIE_DOMAIN_DEV': None,  # No domain restriction for development
 }
 
+# Cache configuration
+# Redis (docker-compose REDIS_URL) naudojamas bendrai talpyklai tarp gunicorn worker'ių,
+# be REDIS_URL (lokalus development) - proceso atmintis
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'dienynas',
+            'TIMEOUT': 300,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'dienynas-default',
+            'TIMEOUT': 300,
+        }
+    }
+
+# AuthManager trumpasis kelias (users.fast_auth_middleware)
+AUTH_FAST_PATH_ENABLED = os.getenv('AUTH_FAST_PATH_ENABLED', 'True').lower() == 'true'
+
+# Vartotojų LRU+TTL talpykla autentifikacijos keliui (users.user_cache)
+USER_CACHE = {
+    'ENABLED': os.getenv('USER_CACHE_ENABLED', 'True').lower() == 'true',
+    'MAX_SIZE': int(os.getenv('USER_CACHE_MAX_SIZE', 2048)),
+    'TTL': int(os.getenv('USER_CACHE_TTL', 300)),  # sekundės
+}
+
+# crm.scope: kuruojamų studentų / vaikų id rinkinių talpyklos trukmė sekundėmis (0 - tik per užklausą).
+# Talpykla valoma crm.signals, kai pasikeičia StudentParent / StudentCurator ryšiai.
+ROLE_SCOPE_CACHE_TTL = int(os.getenv('ROLE_SCOPE_CACHE_TTL', 60))
+
+# Užklausų metrikos (core.metrics, /api/metrics Prometheus formatu).
+# DIR - bendras gunicorn worker'ių katalogas (kiekvienas procesas rašo savo failą);
+# TOKEN - Bearer token'as Prometheus scrape'ui (nenustačius endpoint'as veikia tik ne production režime)
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'True').lower() == 'true',
+    'DIR': os.getenv('METRICS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'dienynas-metrics')),
+    'FLUSH_INTERVAL': float(os.getenv('METRICS_FLUSH_INTERVAL', 5)),  # sekundės
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+}
+
+# Užklausų profiliavimas pagal poreikį (core.profiling_middleware): tik manager rolei,
+# su X-Profile antrašte arba ?_profile= parametru ('download' - ataskaita kaip attachment)
+PROFILING = {
+    'ENABLED': os.getenv('PROFILING_ENABLED', 'True').lower() == 'true',
+    'DIR': os.getenv('PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'dienynas-profiles')),
+    'MAX_REPORTS': int(os.getenv('PROFILING_MAX_REPORTS', 50)),
+    'TOP_SQL': 20,
+    'TOP_FUNCTIONS': 40,
+}
+
+# Lėtų SQL užklausų fiksavimas (core.slow_queries): slenkstis, EXPLAIN atranka, ribota saugykla.
+# Peržiūra: `manage.py slow_queries` arba /api/slow-queries/ (manager)
+SLOW_QUERIES = {
+    'ENABLED': os.getenv('SLOW_QUERIES_ENABLED', 'True').lower() == 'true',
+    'THRESHOLD_MS': float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100)),
+    'EXPLAIN_SAMPLE_RATE': float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1)),
+    'MAX_ENTRIES': int(os.getenv('SLOW_QUERY_MAX_ENTRIES', 200)),  # kiekviename worker'yje
+    'DIR': os.getenv('SLOW_QUERIES_DIR', os.path.join(tempfile.gettempdir(), 'dienynas-slow-queries')),
+    'FLUSH_INTERVAL': float(os.getenv('SLOW_QUERIES_FLUSH_INTERVAL', 10)),  # sekundės
+    'RETENTION': int(os.getenv('SLOW_QUERIES_RETENTION', 7 * 24 * 3600)),  # sekundės
+}
+
+# Pasiekimų lygių perskaičiavimas (grades.recalculation): vienas UPDATE kiekvienai BATCH_SIZE vertinimų partijai.
+# BACKGROUND - recalculate_all endpoint'as vykdo darbą foniniame thread'e ir grąžina darbo id (būsena - cache);
+# LOCK_TTL - ilgiausia vieno darbo trukmė (užraktas nuimamas ir nutrūkus procesui)
+GRADE_RECALCULATION = {
+    'BATCH_SIZE': int(os.getenv('GRADE_RECALCULATION_BATCH_SIZE', 5000)),
+    'BACKGROUND': os.getenv('GRADE_RECALCULATION_BACKGROUND', 'True').lower() == 'true',
+    'LOCK_TTL': int(os.getenv('GRADE_RECALCULATION_LOCK_TTL', 3600)),  # sekundės
+    'STATUS_TTL': 24 * 3600,  # sekundės
+}
+
+# Pasiekimų lygio skaičiuoklės (calculate_level) GradeCalculation įrašai (grades.audit): kaupiami worker'io
+# atmintyje ir įrašomi bulk_create foniniame thread'e, kai sukaupiama BATCH_SIZE arba praeina FLUSH_INTERVAL,
+# bei worker'iui baigiantis. SAMPLE_RATE - įrašoma skaičiavimų dalis (0-1); MAX_PENDING - riba, kai DB nepasiekiama;
+# BACKGROUND=False - be thread'o, slenkstis tikrinamas ir įrašoma įrašymo metu (testai, komandos)
+GRADE_CALCULATION_AUDIT = {
+    'ENABLED': os.getenv('GRADE_CALCULATION_AUDIT_ENABLED', 'True').lower() == 'true',
+    'SAMPLE_RATE': float(os.getenv('GRADE_CALCULATION_AUDIT_SAMPLE_RATE', 1.0)),
+    'BATCH_SIZE': int(os.getenv('GRADE_CALCULATION_AUDIT_BATCH_SIZE', 200)),
+    'FLUSH_INTERVAL': float(os.getenv('GRADE_CALCULATION_AUDIT_FLUSH_INTERVAL', 10)),  # sekundės
+    'MAX_PENDING': int(os.getenv('GRADE_CALCULATION_AUDIT_MAX_PENDING', 10000)),  # kiekviename worker'yje
+    'BACKGROUND': os.getenv('GRADE_CALCULATION_AUDIT_BACKGROUND', 'True').lower() == 'true',
+}
+
+# Kohortų vertinimų analitika (grades.analytics, /api/grades/grades/analytics/): ROLLING_WINDOW - paskutinių
+# vertinimų skaičius slenkančiam vidurkiui; RISK_THRESHOLD - mokinys "rizikoje", kai slenkantis vidurkis žemesnis;
+# CACHE_TTL - atsakymo talpykla (sekundės; raktas keičiasi pasikeitus vertinimams)
+GRADE_ANALYTICS = {
+    'ROLLING_WINDOW': int(os.getenv('GRADE_ANALYTICS_ROLLING_WINDOW', 5)),
+    'RISK_THRESHOLD': float(os.getenv('GRADE_ANALYTICS_RISK_THRESHOLD', 50)),
+    'MAX_AT_RISK': int(os.getenv('GRADE_ANALYTICS_MAX_AT_RISK', 100)),
+    'CACHE_TTL': int(os.getenv('GRADE_ANALYTICS_CACHE_TTL', 300)),
+}
+
+# Pažeidimų statistika (violation.stats): atsakymų talpykla pagal filtrų parametrus (sekundės; 0 - išjungta),
+# raktas keičiasi pasikeitus pažeidimams ar kategorijoms (violation.signals)
+VIOLATION_STATS = {
+    'CACHE_TTL': int(os.getenv('VIOLATION_STATS_CACHE_TTL', 60)),
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -406,6 +546,19 @@ CSRF_COOKIE_SAMESITE = 'Strict'
 # SEC-001: Enhanced CORS configuration for cookie support
 CORS_ALLOW_CREDENTIALS = os.getenv('CORS_ALLOW_CREDENTIALS', 'True').lower() == 'true'
 
+# Užklausų log'ų atranka (users.enhanced_logging_middleware)
+# SAMPLE_RATES: {kelio prefiksas: dalis 0.0-1.0}; klaidų atsakymai (>= 400) registruojami visada
+REQUEST_LOGGING = {
+    'DEFAULT_SAMPLE_RATE': float(os.getenv('REQUEST_LOG_SAMPLE_RATE', 1.0)),
+    'SAMPLE_RATES': {
+        '/api/health/': 0.0,
+        '/api/metrics': 0.0,
+        '/api/users/auth/validate/': 0.05,
+        '/api/users/me/': 0.05,
+        '/static/': 0.0,
+    },
+}
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -427,11 +580,28 @@ LOGGING = {
             'format': '[{asctime}] {levelname} | {name} | {process:d} | {thread:d} | {funcName}:{lineno} | {message}',
             'style': '{',
         },
+        # Struktūrizuoti log'ai (LOG_FORMAT=json)
+        'json': {
+            '()': 'core.log_pipeline.JsonFormatter',
+        },
+    },
+    'filters': {
+        # Per-logger ribojimas "plepiems" logger'iams (WARNING+ neribojami)
+        'rate_limit': {
+            '()': 'core.log_pipeline.RateLimitFilter',
+            'rate': int(os.getenv('LOG_RATE_LIMIT', 20)),  # įrašų per sekundę vienam logger'iui
+            'burst': int(os.getenv('LOG_RATE_BURST', 100)),
+            'loggers': ['plans', 'curriculum', 'schedule', 'grades', 'violation', 'crm', 'django.db.backends'],
+        },
     },
     'handlers': {
+        # Log I/O vyksta foniniame thread'e: request thread'as tik įdeda įrašą į ribotą eilę
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'enhanced',
+            '()': 'core.log_pipeline.AsyncStreamHandler',
+            'maxsize': int(os.getenv('LOG_QUEUE_SIZE', 10000)),
+            'drop_policy': os.getenv('LOG_DROP_POLICY', 'drop_newest'),  # drop_newest | drop_oldest
+            'formatter': 'json' if os.getenv('LOG_FORMAT', 'enhanced') == 'json' else 'enhanced',
+            'filters': ['rate_limit'],
             'level': 'INFO' if PRODUCTION_MODE else 'DEBUG',  # Production-safe logging level
         },
     },
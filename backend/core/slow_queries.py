@@ -0,0 +1,246 @@
+# /backend/core/slow_queries.py
+# Slow SQL capture for A-DIENYNAS
+# PURPOSE: Record statements slower than SLOW_QUERIES['THRESHOLD_MS'] (normalized SQL, params,
+#          calling view/action, sampled EXPLAIN plan) in a bounded per-process store
+#          shared across gunicorn workers through per-process files
+# UPDATES: Created together with core.slow_query_middleware, `manage.py slow_queries` and /api/slow-queries/
+
+import atexit
+import glob
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+PROCESS_FILE = 'slow_{pid}.json'
+
+# Normalizavimas: eilutės ir skaičiai -> ?, IN (?, ?, ...) -> IN (...), tarpai sutraukiami
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+# EXPLAIN be ANALYZE (užklausa nevykdoma dar kartą) pagal DB tipą
+EXPLAIN_PREFIXES = {
+    'postgresql': 'EXPLAIN (ANALYZE off, FORMAT TEXT) ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'mysql': 'EXPLAIN ',
+}
+
+MAX_PARAMS_LENGTH = 500
+
+# Leidžiami top_offenders rikiavimo laukai
+ORDERINGS = ('total_ms', 'max_ms', 'avg_ms', 'count')
+
+
+def normalize_sql(sql):
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def explain(connection, sql, params):
+    """Užklausos planas (be ANALYZE) arba None, jei DB nepalaikoma ar teiginys ne SELECT"""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    statement = sql.split(None, 1)[0].upper() if sql.strip() else ''
+    if prefix is None or statement not in ('SELECT', 'WITH'):
+        return None
+    # Savepoint: nepavykęs EXPLAIN neturi sugadinti vykdomos transakcijos (PostgreSQL)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+class SlowQueryStore:
+    """
+    Vieno proceso lėtų užklausų suvestinė pagal normalizuotą SQL.
+    Ribota MAX_ENTRIES įrašų: pilnoje saugykloje išmetamas įrašas su mažiausiu bendru laiku.
+    Į savo failą išrašoma ne dažniau nei kas FLUSH_INTERVAL sekundžių.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._entries = {}
+        self._dirty = False
+        self._last_flush = 0.0
+
+    def _ensure_process(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._entries = {}
+            self._dirty = False
+            self._last_flush = time.monotonic()
+            atexit.register(self.flush)
+
+    def needs_plan(self, key):
+        entry = self._entries.get(key)
+        return entry is None or entry['plan'] is None
+
+    def record(self, normalized, params, duration_ms, view, plan=None):
+        key = fingerprint(normalized)
+        with self._lock:
+            self._ensure_process()
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= settings.SLOW_QUERIES['MAX_ENTRIES']:
+                    smallest = min(self._entries, key=lambda k: self._entries[k]['total_ms'])
+                    del self._entries[smallest]
+                entry = self._entries[key] = {
+                    'fingerprint': key, 'sql': normalized, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'last_params': None, 'views': {}, 'plan': None, 'last_seen': None,
+                }
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['last_params'] = repr(params)[:MAX_PARAMS_LENGTH]
+            entry['views'][view] = entry['views'].get(view, 0) + 1
+            entry['last_seen'] = time.time()
+            if plan is not None:
+                entry['plan'] = plan
+            self._dirty = True
+
+    def maybe_flush(self):
+        if self._dirty and time.monotonic() - self._last_flush >= settings.SLOW_QUERIES['FLUSH_INTERVAL']:
+            self.flush()
+
+    def flush(self):
+        """Atomiškai perrašo šio proceso failą (tmp + os.replace)"""
+        with self._lock:
+            if self._pid != os.getpid() or not self._dirty:
+                return
+            directory = settings.SLOW_QUERIES['DIR']
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+            with os.fdopen(fd, 'w') as tmp:
+                json.dump(list(self._entries.values()), tmp)
+            os.replace(tmp_path, os.path.join(directory, PROCESS_FILE.format(pid=self._pid)))
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+
+
+def _read(path):
+    try:
+        with open(path) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return []
+
+
+def top_offenders(limit=20, order_by='total_ms'):
+    """
+    Visų procesų lėtos užklausos, sujungtos pagal fingerprint, surikiuotos mažėjančiai.
+    Failai, neatnaujinti ilgiau nei RETENTION sekundžių (baigę darbą worker'iai), pašalinami.
+    """
+    store.flush()
+    directory = settings.SLOW_QUERIES['DIR']
+    retention = settings.SLOW_QUERIES['RETENTION']
+    merged = {}
+    for path in glob.glob(os.path.join(directory, PROCESS_FILE.format(pid='*'))):
+        try:
+            if time.time() - os.path.getmtime(path) > retention:
+                os.remove(path)
+                continue
+        except OSError:
+            continue
+        for entry in _read(path):
+            current = merged.get(entry['fingerprint'])
+            if current is None:
+                merged[entry['fingerprint']] = entry
+                continue
+            current['count'] += entry['count']
+            current['total_ms'] += entry['total_ms']
+            current['max_ms'] = max(current['max_ms'], entry['max_ms'])
+            for view, count in entry['views'].items():
+                current['views'][view] = current['views'].get(view, 0) + count
+            if (entry['last_seen'] or 0) > (current['last_seen'] or 0):
+                current['last_params'] = entry['last_params']
+                current['last_seen'] = entry['last_seen']
+            current['plan'] = current['plan'] or entry['plan']
+
+    for entry in merged.values():
+        entry['avg_ms'] = entry['total_ms'] / entry['count']
+    return sorted(merged.values(), key=lambda entry: entry[order_by], reverse=True)[:limit]
+
+
+def reset():
+    """Išvalo visų procesų lėtų užklausų failus (ir šio proceso atmintį)"""
+    store.clear()
+    for path in glob.glob(os.path.join(settings.SLOW_QUERIES['DIR'], PROCESS_FILE.format(pid='*'))):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class SlowQueryRecorder:
+    """
+    connection.execute_wrapper vienai užklausai: įrašo teiginius, lėtesnius nei THRESHOLD_MS.
+    EXPLAIN vykdomas su EXPLAIN_SAMPLE_RATE tikimybe tik fingerprint'ams, kurie dar neturi plano.
+    """
+
+    def __init__(self, connection, view_resolver):
+        config = settings.SLOW_QUERIES
+        self.connection = connection
+        self.view_resolver = view_resolver
+        self.threshold = config['THRESHOLD_MS'] / 1000
+        self.sample_rate = config['EXPLAIN_SAMPLE_RATE']
+        self._explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explaining:
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration >= self.threshold:
+            try:
+                self._record(sql, params, many, duration)
+            except Exception:
+                logger.exception("Failed to record slow query")
+        return result
+
+    def _record(self, sql, params, many, duration):
+        normalized = normalize_sql(sql)
+        plan = None
+        if not many and store.needs_plan(fingerprint(normalized)) and random.random() < self.sample_rate:
+            self._explaining = True
+            try:
+                plan = explain(self.connection, sql, params)
+            except Exception as e:
+                logger.debug("EXPLAIN failed: %s", e)
+            finally:
+                self._explaining = False
+
+        view = self.view_resolver()
+        store.record(normalized, None if many else params, duration * 1000, view, plan)
+        logger.info("Slow query (%.1f ms) in %s: %s", duration * 1000, view, normalized[:300])
+
+
+# Proceso lėtų užklausų saugykla (viena kiekviename worker'yje)
+store = SlowQueryStore()
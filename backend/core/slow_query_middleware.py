@@ -0,0 +1,31 @@
+# /backend/core/slow_query_middleware.py
+# Slow SQL capture middleware for A-DIENYNAS
+# PURPOSE: Install core.slow_queries.SlowQueryRecorder as connection.execute_wrapper for each request
+# UPDATES: Created together with core.slow_queries
+
+from django.conf import settings
+from django.db import connection
+
+from .metrics_middleware import view_label
+from .slow_queries import SlowQueryRecorder, store
+
+
+class SlowQueryMiddleware:
+    """
+    Lėtos SQL užklausos įrašomos su view/action pavadinimu (tas pats label kaip /api/metrics).
+    Greitoms užklausoms - tik laiko matavimas wrapper'yje.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.SLOW_QUERIES['ENABLED']
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = SlowQueryRecorder(connection, lambda: view_label(request))
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        store.maybe_flush()
+        return response
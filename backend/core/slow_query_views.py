@@ -0,0 +1,27 @@
+# /backend/core/slow_query_views.py
+# Slow SQL report endpoint for A-DIENYNAS
+# PURPOSE: Manager-only list of top slow queries captured by core.slow_queries
+
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from curriculum.permissions import ManagerOnlyPermission
+
+from .slow_queries import ORDERINGS, top_offenders
+
+
+@api_view(['GET'])
+@permission_classes([ManagerOnlyPermission])
+def slow_query_list(request):
+    """
+    Lėčiausios užklausos (visų worker'ių suma).
+    Parametrai: ?limit= (numatyta 20, max 200), ?order_by=total_ms|max_ms|avg_ms|count
+    """
+    order_by = request.query_params.get('order_by', 'total_ms')
+    if order_by not in ORDERINGS:
+        return Response({'error': f'order_by turi būti vienas iš: {", ".join(ORDERINGS)}'}, status=400)
+    try:
+        limit = min(int(request.query_params.get('limit', 20)), 200)
+    except ValueError:
+        return Response({'error': 'limit turi būti skaičius'}, status=400)
+    return Response(top_offenders(limit=limit, order_by=order_by))
@@ -0,0 +1,271 @@
+# /backend/core/synthetic.py
+# Synthetic school dataset for A-DIENYNAS performance work
+# PURPOSE: Generate a realistic school (users, CRM links, schedule term, IMU plans, grades, violations)
+#          with bulk inserts; used by `manage.py seed_synthetic_school`, endpoint benchmarks and query-budget tests
+# UPDATES: Created for performance testing; all users share SYNTHETIC_EMAIL_DOMAIN so they can be removed
+
+import io
+import random
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import transaction
+
+from crm.models import MentorSubject, StudentCurator, StudentParent, StudentSubjectLevel
+from curriculum.models import Lesson, Level, Subject
+from grades.models import AchievementLevel, Grade
+from grades.summaries import rebuild_summaries
+from plans.models import IMUPlan, LessonSequence, LessonSequenceItem
+from schedule.models import Classroom, GlobalSchedule, Period
+from violation.counters import rebuild_counters
+from violation.models import Violation, ViolationCategory
+
+User = get_user_model()
+
+SYNTHETIC_EMAIL_DOMAIN = 'synthetic.invalid'
+SYNTHETIC_MARKER = 'Sintetiniai duomenys'
+BATCH_SIZE = 500
+
+SUBJECTS = [
+    'Matematika', 'Lietuvių kalba', 'Anglų kalba', 'Fizika',
+    'Chemija', 'Biologija', 'Istorija', 'Informatika',
+]
+LEVELS = ['Pradinis', 'Bendrasis', 'Išplėstinis']
+VIOLATION_CATEGORIES = ['Vėlavimas', 'Uniforma', 'Inventorius', 'Elgesys']
+FIRST_NAMES = ['Jonas', 'Ona', 'Petras', 'Rūta', 'Mantas', 'Eglė', 'Tomas', 'Ieva', 'Lukas', 'Gabija']
+LAST_NAMES = ['Kazlauskas', 'Petrauskienė', 'Jankauskas', 'Stankevičiūtė', 'Vasiliauskas', 'Žukauskaitė']
+
+# Tokie pat pavadinimai kaip GlobalSchedule.save() (bulk_create save() nekviečia)
+WEEKDAY_NAMES = ['Pirmadienis', 'Antradienis', 'Trečiadienis', 'Ketvirtadienis', 'Penktadienis']
+
+PERIODS_PER_DAY = 8
+SUBJECTS_PER_STUDENT = 5
+LESSONS_PER_SEQUENCE = 12
+ATTENDANCE_WEIGHTS = (('present', 82), ('absent', 9), ('left', 3), ('excused', 6))
+
+
+def synthetic_users():
+    return User.objects.filter(email__endswith='@' + SYNTHETIC_EMAIL_DOMAIN)
+
+
+def delete_synthetic_school():
+    """Pašalina sugeneruotus vartotojus (ir per CASCADE - jų ryšius, tvarkaraštį, planus, vertinimus)"""
+    with transaction.atomic():
+        LessonSequence.objects.filter(name__startswith=SYNTHETIC_MARKER).delete()
+        Lesson.objects.filter(mentor__in=synthetic_users()).delete()
+        return synthetic_users().delete()[0]
+
+
+def _bulk(model, objects):
+    return model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+
+def _make_users(rng, role, count, password):
+    users = []
+    for index in range(count):
+        users.append(User(
+            email=f'{role}-{index}@{SYNTHETIC_EMAIL_DOMAIN}',
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            roles=[role],
+            default_role=role,
+            password=password,
+        ))
+    return _bulk(User, users)
+
+
+def build_synthetic_school(students=200, mentors=20, weeks=4, class_size=15, seed=1, today=None):
+    """
+    Sugeneruoja mokyklą viena transakcija ir grąžina sukurtų įrašų skaičius.
+    Terminas apima `weeks` savaičių: pusė praeityje (lankomumas, vertinimai), pusė ateityje (suplanuota),
+    todėl einamosios savaitės ir dienos endpoint'ai turi duomenų.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    start = today - timedelta(days=today.weekday(), weeks=weeks // 2)
+
+    with transaction.atomic():
+        if not AchievementLevel.objects.exists():
+            call_command('init_achievement_levels', stdout=io.StringIO())
+
+        subjects = [Subject.objects.get_or_create(name=name)[0] for name in SUBJECTS]
+        levels = [Level.objects.get_or_create(name=name)[0] for name in LEVELS]
+        categories = [
+            ViolationCategory.objects.get_or_create(name=name)[0].name for name in VIOLATION_CATEGORIES
+        ]
+
+        # --- Vartotojai ---
+        password = make_password(None)
+        student_users = _make_users(rng, 'student', students, password)
+        mentor_users = _make_users(rng, 'mentor', mentors, password)
+        curator_users = _make_users(rng, 'curator', max(1, students // 25), password)
+        parent_users = _make_users(rng, 'parent', max(1, students // 2), password)
+        manager_users = _make_users(rng, 'manager', 1, password)
+
+        # --- CRM ryšiai ---
+        _bulk(StudentParent, [
+            StudentParent(student=student, parent=parent_users[index // 2 % len(parent_users)])
+            for index, student in enumerate(student_users)
+        ])
+        _bulk(StudentCurator, [
+            StudentCurator(student=student, curator=curator_users[index % len(curator_users)], start_date=start)
+            for index, student in enumerate(student_users)
+        ])
+
+        student_levels = {}  # student.id -> [(subject, level)]
+        subject_level_objects = []
+        for student in student_users:
+            pairs = [(subject, rng.choice(levels)) for subject in rng.sample(subjects, SUBJECTS_PER_STUDENT)]
+            student_levels[student.id] = pairs
+            subject_level_objects += [
+                StudentSubjectLevel(student=student, subject=subject, level=level) for subject, level in pairs
+            ]
+        _bulk(StudentSubjectLevel, subject_level_objects)
+
+        # Kiekvienas dalykas turi bent vieną mentorių; mentorius dėsto 1-2 dalykus
+        mentor_subjects = {}
+        for index, mentor in enumerate(mentor_users):
+            taught = {subjects[index % len(subjects)]}
+            if rng.random() < 0.5:
+                taught.add(rng.choice(subjects))
+            mentor_subjects[mentor.id] = sorted(taught, key=lambda subject: subject.id)
+        _bulk(MentorSubject, [
+            MentorSubject(mentor=mentor, subject=subject)
+            for mentor in mentor_users for subject in mentor_subjects[mentor.id]
+        ])
+
+        # --- Pamokos ir ugdymo planai (sekos) kiekvienai dalyko/lygio porai ---
+        # Tik dėstomiems dalykams (pamokos pašalinamos kartu su jų mentoriumi)
+        teachers = {}
+        for mentor in mentor_users:
+            for subject in mentor_subjects[mentor.id]:
+                teachers.setdefault(subject, mentor)
+        lessons = {}  # (subject.id, level.id) -> [Lesson]
+        lesson_objects, lesson_keys = [], []
+        for subject, mentor in teachers.items():
+            for level in levels:
+                for number in range(1, LESSONS_PER_SEQUENCE + 1):
+                    lesson_objects.append(Lesson(
+                        title=f'{subject.name} {level.name} #{number}', subject=subject, mentor=mentor,
+                        topic=f'Tema {number}',
+                    ))
+                    lesson_keys.append((subject.id, level.id))
+        lesson_objects = _bulk(Lesson, lesson_objects)
+        level_links = []
+        for lesson, key in zip(lesson_objects, lesson_keys):
+            lessons.setdefault(key, []).append(lesson)
+            level_links.append(Lesson.levels.through(lesson_id=lesson.id, level_id=key[1]))
+        _bulk(Lesson.levels.through, level_links)
+
+        sequences = _bulk(LessonSequence, [
+            LessonSequence(
+                name=f'{SYNTHETIC_MARKER}: {subject.name} {level.name}',
+                subject=subject, level=level, created_by=manager_users[0],
+            )
+            for subject in teachers for level in levels
+        ])
+        _bulk(LessonSequenceItem, [
+            LessonSequenceItem(sequence=sequence, lesson=lesson, position=position)
+            for sequence in sequences
+            for position, lesson in enumerate(lessons[(sequence.subject_id, sequence.level_id)], start=1)
+        ])
+
+        # --- Tvarkaraštis ---
+        # Periodai ir klasės pernaudojami tarp paleidimų (pašalinami tik vartotojai ir jų duomenys)
+        periods = [
+            Period.objects.get_or_create(
+                name=f'{number} pamoka',
+                defaults={'starttime': time(8 + (number - 1) * 55 // 60, (number - 1) * 55 % 60), 'duration': 45},
+            )[0]
+            for number in range(1, PERIODS_PER_DAY + 1)
+        ]
+        classrooms = [
+            Classroom.objects.get_or_create(name=f'S-{100 + index}', defaults={'description': SYNTHETIC_MARKER})[0]
+            for index in range(mentors)
+        ]
+
+        schedule_objects = []
+        for week in range(weeks):
+            for weekday in range(5):
+                day = start + timedelta(weeks=week, days=weekday)
+                for period_index, period in enumerate(periods):
+                    for mentor_index, mentor in enumerate(mentor_users):
+                        # ~2/3 mentoriaus periodų užimta; kiekvienas mentorius turi savo klasę
+                        if (mentor_index + period_index + weekday) % 3 == 0:
+                            continue
+                        schedule_objects.append(GlobalSchedule(
+                            date=day, weekday=WEEKDAY_NAMES[weekday], period=period,
+                            classroom=classrooms[mentor_index], user=mentor,
+                            subject=rng.choice(mentor_subjects[mentor.id]), level=rng.choice(levels),
+                            plan_status='completed' if day < today else 'planned',
+                        ))
+        schedule_objects = _bulk(GlobalSchedule, schedule_objects)
+
+        # --- IMU planai, lankomumas ir vertinimai ---
+        students_by_pair = {}
+        for student in student_users:
+            for subject, level in student_levels[student.id]:
+                students_by_pair.setdefault((subject.id, level.id), []).append(student)
+
+        statuses, weights = zip(*ATTENDANCE_WEIGHTS)
+        plan_objects = []
+        for slot in schedule_objects:
+            candidates = students_by_pair.get((slot.subject_id, slot.level_id), [])
+            past = slot.date < today
+            pair_lessons = lessons[(slot.subject_id, slot.level_id)]
+            for student in rng.sample(candidates, min(class_size, len(candidates))):
+                plan_objects.append(IMUPlan(
+                    student=student, global_schedule=slot, lesson=rng.choice(pair_lessons),
+                    attendance_status=rng.choices(statuses, weights)[0] if past else None,
+                ))
+        plan_objects = _bulk(IMUPlan, plan_objects)
+
+        slot_mentors = {slot.id: slot.user_id for slot in schedule_objects}
+        grade_objects = []
+        for plan in plan_objects:
+            if plan.attendance_status != 'present' or rng.random() > 0.4:
+                continue
+            percentage = rng.randint(40, 100)
+            grade_objects.append(Grade(
+                student_id=plan.student_id, lesson_id=plan.lesson_id, mentor_id=slot_mentors[plan.global_schedule_id],
+                imu_plan=plan, percentage=percentage,
+                achievement_level=AchievementLevel.get_level_by_percentage(percentage),
+            ))
+        _bulk(Grade, grade_objects)
+        # bulk_create nekviečia Grade signalų
+        rebuild_summaries(student_ids=[student.id for student in student_users])
+
+        violation_objects = []
+        for index in range(max(1, students * 3 // 10)):
+            student = rng.choice(student_users)
+            completed = rng.random() < 0.5
+            violation_objects.append(Violation(
+                student=student, category=rng.choice(categories), description='Sintetinis pažeidimas',
+                status='completed' if completed else 'pending',
+                penalty_status='paid' if completed and rng.random() < 0.7 else 'unpaid',
+                violation_count=index % 5 + 1, penalty_amount=Decimal(rng.choice([0, 2, 5, 10])),
+                created_by=rng.choice(mentor_users), todos=[{'text': 'Atlikti užduotį', 'completed': completed}],
+            ))
+        _bulk(Violation, violation_objects)
+        # bulk_create nekviečia Violation.save() - mokinių skaitikliai perskaičiuojami
+        rebuild_counters(student_ids=[student.id for student in student_users])
+
+    return {
+        'students': len(student_users),
+        'mentors': len(mentor_users),
+        'curators': len(curator_users),
+        'parents': len(parent_users),
+        'managers': len(manager_users),
+        'student_subject_levels': len(subject_level_objects),
+        'lessons': len(lesson_objects),
+        'global_schedules': len(schedule_objects),
+        'imu_plans': len(plan_objects),
+        'grades': len(grade_objects),
+        'violations': len(violation_objects),
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(weeks=weeks, days=-1)).isoformat(),
+    }
+
@@ -0,0 +1,41 @@
+# /backend/core/testing.py
+# Shared test case base for A-DIENYNAS app tests
+# PURPOSE: Build the synthetic school once per TestCase class (setUpTestData) instead of once per test method
+# UPDATES: Used by core, grades and violation tests that run against core.synthetic data
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.user_cache import user_cache
+
+from .synthetic import build_synthetic_school, synthetic_users
+
+
+class SyntheticDataTestCase(TestCase):
+    """
+    Sintetinė mokykla sukuriama vieną kartą klasei (setUpTestData), kiekvieno testo pakeitimai atšaukiami.
+    - school: build_synthetic_school parametrai (mokyklos dydis)
+    - login_role: vartotojo rolė, kurio JWT slapukas nustatomas kiekvienam testui (None - neprisijungus);
+      vartotojas pasiekiamas per self.user
+    Talpyklos (Django cache ir user_cache) išvalomos prieš kiekvieną testą.
+    """
+
+    school = {'students': 10, 'mentors': 2, 'weeks': 2, 'class_size': 5}
+    login_role = 'manager'
+
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        user_cache.clear()
+        build_synthetic_school(**cls.school)
+        cls.user = synthetic_users().filter(default_role=cls.login_role).first() if cls.login_role else None
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        if self.user is not None:
+            self.login(self.user)
+
+    def login(self, user):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(user))
@@ -0,0 +1,608 @@
+# backend/core/tests.py
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import date, datetime, time, timezone as dt_timezone
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.user_cache import user_cache
+
+from . import metrics, renderers, slow_queries
+from .lean_middleware import CsrfViewMiddleware, SessionMiddleware
+from .log_pipeline import DROP_OLDEST, AsyncStreamHandler, JsonFormatter, RateLimitFilter
+from .testing import SyntheticDataTestCase
+
+
+def _record(name='plans.views', level=logging.INFO, msg='message %s', args=('x',)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class LogPipelineTestCase(SimpleTestCase):
+    """
+    Asinchroninio log'ų konvejerio testai
+    """
+
+    def test_records_are_written_by_listener_thread(self):
+        stream = io.StringIO()
+        handler = AsyncStreamHandler(maxsize=100, stream=stream)
+        handler.setFormatter(logging.Formatter('%(name)s %(message)s'))
+        handler.handle(_record())
+        handler.flush_and_stop()
+        self.assertEqual(stream.getvalue(), 'plans.views message x\n')
+
+    def test_full_queue_drops_and_reports(self):
+        stream = io.StringIO()
+        handler = AsyncStreamHandler(maxsize=2, drop_policy=DROP_OLDEST, stream=stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        # Listener'is nepaleidžiamas, kad eilė prisipildytų
+        handler._ensure_listener = lambda: None
+        for i in range(5):
+            handler.handle(_record(args=(i,)))
+        self.assertEqual(handler.dropped, 3)
+        self.assertEqual([r.getMessage() for r in list(handler.queue.queue)], ['message 3', 'message 4'])
+
+    def test_message_is_rendered_in_calling_thread(self):
+        stream = io.StringIO()
+        handler = AsyncStreamHandler(maxsize=100, stream=stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler._ensure_listener = lambda: None
+        data = {'virtues': [1, 2]}
+        handler.handle(_record(msg='data %s', args=(data,)))
+        # Kviečiantis kodas keičia args po log'inimo (pvz. validated_data.pop)
+        data.pop('virtues')
+        queued = handler.queue.get_nowait()
+        self.assertIsNone(queued.args)
+        self.assertEqual(handler.target.format(queued), "data {'virtues': [1, 2]}")
+
+    def test_rate_limit_filter_limits_only_configured_loggers(self):
+        rate_limit = RateLimitFilter(rate=0, burst=2, loggers=['plans'])
+        results = [rate_limit.filter(_record()) for _ in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        self.assertTrue(rate_limit.filter(_record(level=logging.WARNING)))
+        self.assertTrue(rate_limit.filter(_record(name='users.views')))
+
+    def test_json_formatter_includes_extra_fields(self):
+        record = _record()
+        record.suppressed = 5
+        payload = json.loads(JsonFormatter().format(record))
+        self.assertEqual(payload['message'], 'message x')
+        self.assertEqual(payload['logger'], 'plans.views')
+        self.assertEqual(payload['suppressed'], 5)
+
+
+@override_settings(LEAN_API_ENABLED=True, LEAN_API_EXCLUDE=('/api/users/oauth/',))
+class LeanMiddlewareTestCase(SimpleTestCase):
+    """
+    Trumpo (API) middleware stack'o testai
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _run(self, middleware_class, path):
+        request = self.factory.get(path)
+        seen = {}
+
+        def get_response(request):
+            seen['session'] = hasattr(request, 'session')
+            return HttpResponse()
+
+        middleware_class(get_response)(request)
+        return seen['session']
+
+    def test_api_requests_skip_session(self):
+        self.assertFalse(self._run(SessionMiddleware, '/api/plans/imu-plans/'))
+
+    def test_admin_and_excluded_paths_keep_session(self):
+        self.assertTrue(self._run(SessionMiddleware, '/admin/'))
+        self.assertTrue(self._run(SessionMiddleware, '/api/users/oauth/success/'))
+
+    def test_csrf_view_check_skipped_for_api(self):
+        middleware = CsrfViewMiddleware(lambda request: HttpResponse())
+        api_request = self.factory.post('/api/grades/grades/')
+        self.assertIsNone(middleware.process_view(api_request, lambda r: None, (), {}))
+        admin_request = self.factory.post('/admin/login/')
+        self.assertEqual(middleware.process_view(admin_request, lambda r: None, (), {}).status_code, 403)
+
+
+class MetricsTestCase(TestCase):
+    """
+    Užklausų metrikų (core.metrics, /api/metrics) testai
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(METRICS={
+            'ENABLED': True, 'DIR': self.tmp.name, 'FLUSH_INTERVAL': 0, 'TOKEN': 'secret',
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        metrics.store.clear()
+        self.addCleanup(metrics.store.clear)
+
+    def _scrape(self, token='secret'):
+        return self.client.get('/api/metrics', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_requires_token(self):
+        self.assertEqual(self._scrape(token='wrong').status_code, 403)
+
+    def test_records_drf_action_latency_queries_and_status(self):
+        self.client.get('/api/grades/achievement-levels/')
+        self.client.get('/api/health/detailed/')
+        response = self._scrape()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+
+        self.assertIn(
+            'http_requests_total{view="AchievementLevelViewSet.list",method="GET",status="401"} 1', body
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{view="AchievementLevelViewSet.list",method="GET"} 1', body
+        )
+        self.assertIn('http_request_db_queries_count{view="health_detailed",method="GET"} 1', body)
+        # health_detailed vykdo SELECT 1 - patenka į >= 1 intervalą, bet ne į 0
+        self.assertIn('http_request_db_queries_bucket{view="health_detailed",method="GET",le="0"} 0', body)
+        self.assertIn('http_response_size_bytes_count{view="health_detailed",method="GET"} 1', body)
+
+    def test_collect_merges_process_files_and_archive(self):
+        labels = ('GradeViewSet.list', 'GET')
+        metrics.store.inc('http_requests_total', (*labels, '200'))
+        metrics.store.observe('http_request_duration_seconds', labels, 0.02)
+        metrics.store.flush()
+
+        # Kito worker'io failas, vėliau perkeltas į archyvą
+        other_pid = os.getpid() + 100000
+        with open(os.path.join(self.tmp.name, f'metrics_{other_pid}.json'), 'w') as target:
+            json.dump({
+                'http_requests_total': [[[*labels, '200'], 2]],
+                'http_request_duration_seconds': [[list(labels), [[0] * 11 + [1], 12.0, 1]]],
+            }, target)
+        metrics.mark_process_dead(other_pid)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, f'metrics_{other_pid}.json')))
+
+        merged = metrics.collect()
+        self.assertEqual(merged['http_requests_total'][(*labels, '200')], 3)
+        counts, total, count = merged['http_request_duration_seconds'][labels]
+        self.assertEqual((counts[2], counts[-1], count), (1, 1, 2))
+
+        body = metrics.render(merged)
+        self.assertIn('http_request_duration_seconds_bucket{view="GradeViewSet.list",method="GET",le="+Inf"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="GradeViewSet.list",method="GET",le="0.025"} 1', body)
+
+
+class ProfilingTestCase(TestCase):
+    """
+    Profiliavimo pagal poreikį (core.profiling_middleware) testai
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(PROFILING={**settings.PROFILING, 'DIR': self.tmp.name})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        user_cache.clear()
+        User = get_user_model()
+        self.manager = User.objects.create_user(
+            email='manager@test.com', password=None, first_name='Man', last_name='Ager',
+            roles=['manager', 'mentor'], default_role='manager'
+        )
+        self.mentor = User.objects.create_user(
+            email='mentor@test.com', password=None, first_name='Men', last_name='Tor',
+            roles=['mentor'], default_role='mentor'
+        )
+
+    def _login(self, user):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(user))
+
+    def test_download_mode_returns_report_with_sql(self):
+        self._login(self.manager)
+        response = self.client.get('/api/grades/achievement-levels/?_profile=download')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        report = response.content.decode()
+        self.assertIn('Request: GET /api/grades/achievement-levels/', report)
+        self.assertIn('grades_achievementlevel', report)
+        self.assertIn('cProfile', report)
+
+    def test_stored_profile_can_be_downloaded_later(self):
+        self._login(self.manager)
+        response = self.client.get('/api/grades/achievement-levels/', HTTP_X_PROFILE='1')
+        profile_id = response['X-Profile-Id']
+
+        self.assertEqual([p['id'] for p in self.client.get('/api/profiles/').json()], [profile_id])
+        download = self.client.get(f'/api/profiles/{profile_id}/')
+        self.assertEqual(download.status_code, 200)
+        self.assertIn(profile_id, b''.join(download.streaming_content).decode())
+        self.assertEqual(self.client.get('/api/profiles/..%2F..%2Fetc%2Fpasswd/').status_code, 404)
+
+    def test_non_manager_is_not_profiled(self):
+        self._login(self.mentor)
+        response = self.client.get('/api/grades/achievement-levels/?_profile=download', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(self.client.get('/api/profiles/').status_code, 403)
+
+
+class SlowQueryTestCase(TestCase):
+    """
+    Lėtų SQL užklausų fiksavimo (core.slow_queries) testai
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(SLOW_QUERIES={
+            **settings.SLOW_QUERIES,
+            'THRESHOLD_MS': 0, 'EXPLAIN_SAMPLE_RATE': 1.0, 'DIR': self.tmp.name, 'FLUSH_INTERVAL': 0,
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        slow_queries.store.clear()
+        self.addCleanup(slow_queries.store.clear)
+        cache.clear()
+        user_cache.clear()
+
+    def test_normalize_sql_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            slow_queries.normalize_sql("SELECT *  FROM t WHERE a = 'x' AND b IN (%s, %s, %s) AND c > 10"),
+            'SELECT * FROM t WHERE a = ? AND b IN (...) AND c > ?',
+        )
+
+    def test_records_view_params_and_plan(self):
+        self.client.get('/api/health/detailed/')
+        entries = slow_queries.top_offenders()
+        entry = next(e for e in entries if e['sql'] == 'SELECT ?')
+        self.assertEqual(entry['views'], {'health_detailed': 1})
+        self.assertEqual(entry['count'], 1)
+        self.assertTrue(entry['plan'])
+
+    def test_endpoint_is_manager_only(self):
+        User = get_user_model()
+        mentor = User.objects.create_user(
+            email='mentor@test.com', password=None, first_name='Men', last_name='Tor',
+            roles=['mentor'], default_role='mentor'
+        )
+        self.client.cookies['access_token'] = str(AccessToken.for_user(mentor))
+        self.assertEqual(self.client.get('/api/slow-queries/').status_code, 403)
+
+
+class SyntheticSchoolTestCase(TestCase):
+    """
+    Sintetinės mokyklos generatoriaus (core.synthetic) testai
+    """
+
+    def test_build_and_delete(self):
+        from plans.models import IMUPlan
+        from schedule.models import GlobalSchedule
+
+        from .synthetic import build_synthetic_school, delete_synthetic_school, synthetic_users
+
+        counts = build_synthetic_school(students=20, mentors=3, weeks=2)
+        self.assertEqual(counts['students'], 20)
+        self.assertEqual(GlobalSchedule.objects.count(), counts['global_schedules'])
+        self.assertGreater(counts['imu_plans'], 0)
+        self.assertGreater(counts['grades'], 0)
+        # Praeities pamokose pažymėtas lankomumas, ateities - ne
+        self.assertTrue(IMUPlan.objects.filter(attendance_status__isnull=False).exists())
+        self.assertTrue(IMUPlan.objects.filter(attendance_status__isnull=True).exists())
+
+        delete_synthetic_school()
+        self.assertFalse(synthetic_users().exists())
+        self.assertFalse(GlobalSchedule.objects.exists())
+
+
+# Užklausų biudžetas kiekvienam endpoint'ui ir rolei: (rolė, kelias, daugiausia SQL užklausų).
+# Biudžetas nepriklauso nuo duomenų kiekio - tikrinama su maža ir didele sintetine mokykla.
+QUERY_BUDGETS = [
+    ('manager', '/api/users/users/', 1),
+    ('manager', '/api/users/students/{student}/', 1),
+    ('manager', '/api/crm/student-parents/', 1),
+    ('manager', '/api/crm/student-curators/', 1),
+    ('manager', '/api/crm/student-subject-levels/', 1),
+    ('manager', '/api/crm/mentor-subjects/', 1),
+    ('manager', '/api/curriculum/lessons/', 5),
+    ('mentor', '/api/curriculum/lessons/', 5),
+    ('manager', '/api/schedule/schedules/', 1),
+    ('mentor', '/api/schedule/schedules/', 1),
+    ('mentor', '/api/schedule/schedules/weekly/', 1),
+    ('mentor', '/api/schedule/schedules/daily/?date={date}', 1),
+    ('manager', '/api/schedule/schedules/student-schedule/?student_id={student}&week_start={week}', 4),
+    ('student', '/api/schedule/schedules/student-schedule/?student_id={student}&week_start={week}', 4),
+    ('manager', '/api/plans/sequences/', 4),
+    ('manager', '/api/plans/sequence-items/', 1),
+    ('manager', '/api/plans/imu-plans/', 1),
+    ('mentor', '/api/plans/imu-plans/', 1),
+    ('curator', '/api/plans/imu-plans/', 1),
+    ('parent', '/api/plans/imu-plans/', 1),
+    ('student', '/api/plans/imu-plans/', 1),
+    ('manager', '/api/plans/imu-plans/attendance_stats/?student_id={student}&subject_id={subject}', 5),
+    ('manager', '/api/plans/imu-plans/bulk_attendance_stats/?subject_id={subject}', 1),
+    ('manager', '/api/grades/grades/', 1),
+    ('mentor', '/api/grades/grades/', 1),
+    ('parent', '/api/grades/grades/', 1),
+    ('student', '/api/grades/grades/', 1),
+    ('manager', '/api/grades/grades/student_summary/?student_id={student}', 6),
+    ('manager', '/api/grades/grades/lesson_summary/?lesson_id={lesson}', 7),
+    ('manager', '/api/violations/', 1),
+    ('curator', '/api/violations/', 1),
+    ('parent', '/api/violations/', 1),
+    ('student', '/api/violations/', 1),
+    ('manager', '/api/plans/imu-plans/?fields=id,lesson_title,global_schedule_date', 1),
+    ('manager', '/api/plans/imu-plans/?expand=global_schedule', 1),
+    ('mentor', '/api/schedule/schedules/weekly/?fields=id,date,period,has_imu_plan&expand=period', 1),
+    ('manager', '/api/curriculum/lessons/?fields=id,title,skills_list', 2),
+    ('manager', '/api/violations/stats/', 3),
+    ('manager', '/api/violations/category-stats/', 2),
+]
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Užklausų biudžeto regresijos testai: kiekvienas endpoint'as turi fiksuotą SQL užklausų skaičių,
+    nepriklausantį nuo mokinių, tvarkaraščio ir planų kiekio (N+1 apsauga)
+    """
+
+    SMALL = {'students': 10, 'mentors': 2, 'weeks': 2, 'class_size': 5}
+    LARGE = {'students': 40, 'mentors': 4, 'weeks': 4, 'class_size': 15}
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+
+    def _fixtures(self):
+        from datetime import timedelta
+
+        from crm.models import StudentParent
+        from plans.models import IMUPlan
+
+        from .synthetic import synthetic_users
+
+        users = {
+            role: synthetic_users().filter(default_role=role).order_by('id').first()
+            for role in ('manager', 'mentor', 'curator', 'parent')
+        }
+        users['student'] = StudentParent.objects.filter(parent=users['parent']).first().student
+        plan = (
+            IMUPlan.objects.filter(student=users['student'], grade__isnull=False)
+            .select_related('global_schedule').order_by('id').first()
+        )
+        slot = plan.global_schedule
+        context = {
+            'student': users['student'].id,
+            'date': slot.date.isoformat(),
+            'week': (slot.date - timedelta(days=slot.date.weekday())).isoformat(),
+            'subject': slot.subject_id,
+            'lesson': plan.lesson_id,
+        }
+        return users, context
+
+    def _measure(self, size):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from .synthetic import build_synthetic_school, delete_synthetic_school
+
+        delete_synthetic_school()
+        build_synthetic_school(**size)
+        cache.clear()
+        user_cache.clear()
+        users, context = self._fixtures()
+
+        results = {}
+        for role, template, _ in QUERY_BUDGETS:
+            self.client.cookies['access_token'] = str(AccessToken.for_user(users[role]))
+            path = template.format(**context)
+            # Pirma užklausa apšildo vartotojo ir rolės cache - matuojama antra
+            self.client.get(path)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(path)
+            results[(role, template)] = (response.status_code, [query['sql'] for query in queries.captured_queries])
+        return results
+
+    def _report(self, queries):
+        """Užklausos sugrupuotos pagal normalizuotą SQL (pasikartojančios - N+1 kandidatai pirmos)"""
+        groups = {}
+        for sql in queries:
+            # Stulpelių sąrašas sutraukiamas - matosi FROM/WHERE dalis
+            normalized = re.sub(r'^SELECT .*? FROM ', 'SELECT ... FROM ', slow_queries.normalize_sql(sql))
+            groups[normalized] = groups.get(normalized, 0) + 1
+        lines = sorted(groups.items(), key=lambda item: item[1], reverse=True)
+        return '\n'.join(f'{count:>5}x {sql[:400]}' for sql, count in lines)
+
+    def test_query_budgets_are_constant_in_n(self):
+        small = self._measure(self.SMALL)
+        large = self._measure(self.LARGE)
+
+        for role, template, budget in QUERY_BUDGETS:
+            key = (role, template)
+            with self.subTest(role=role, path=template):
+                for label, (status_code, queries) in (('small', small[key]), ('large', large[key])):
+                    self.assertEqual(status_code, 200, f'{label}: {role} {template}')
+                    self.assertLessEqual(
+                        len(queries), budget,
+                        f'{label}: {role} {template} - {len(queries)} užklausų, biudžetas {budget}\n'
+                        f'{self._report(queries)}'
+                    )
+                self.assertEqual(
+                    len(small[key][1]), len(large[key][1]),
+                    f'{role} {template}: užklausų skaičius priklauso nuo N '
+                    f'({len(small[key][1])} -> {len(large[key][1])})\n{self._report(large[key][1])}'
+                )
+
+
+class SparseFieldsetTestCase(SyntheticDataTestCase):
+    """
+    ?fields= / ?expand= (core.fieldsets) testai IMUPlan, GlobalSchedule ir Lesson endpoint'ams
+    """
+
+    def _first(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return (data['results'] if isinstance(data, dict) else data)[0]
+
+    def test_without_parameters_keeps_full_representation(self):
+        plan = self._first('/api/plans/imu-plans/')
+        self.assertIsInstance(plan['global_schedule'], dict)
+        self.assertIsInstance(plan['global_schedule']['period'], dict)
+        self.assertIsInstance(plan['lesson'], dict)
+        self.assertIn('student_name', plan)
+
+        schedule = self._first('/api/schedule/schedules/')
+        self.assertIsInstance(schedule['period'], dict)
+        self.assertIsInstance(schedule['user'], dict)
+
+        lesson = self._first('/api/curriculum/lessons/')
+        self.assertIn('skills_list', lesson)
+        self.assertIn('competency_atcheve_details', lesson)
+
+    def test_fields_limits_output(self):
+        plan = self._first('/api/plans/imu-plans/?fields=id,lesson_title,global_schedule_date,unknown')
+        self.assertEqual(set(plan), {'id', 'lesson_title', 'global_schedule_date'})
+
+        lesson = self._first('/api/curriculum/lessons/?fields=id,title,skills_list')
+        self.assertEqual(set(lesson), {'id', 'title', 'skills_list'})
+
+    def test_expand_is_opt_in(self):
+        from plans.models import IMUPlan
+
+        plan = self._first('/api/plans/imu-plans/?expand=lesson')
+        stored = IMUPlan.objects.get(pk=plan['id'])
+        self.assertEqual(plan['global_schedule'], stored.global_schedule_id)
+        self.assertEqual(plan['lesson']['id'], stored.lesson_id)
+        self.assertIn('title', plan['lesson'])
+
+        schedule = self._first('/api/schedule/schedules/?fields=id,period,subject&expand=period')
+        self.assertEqual(set(schedule), {'id', 'period', 'subject'})
+        self.assertEqual(set(schedule['period']), {'id', 'name', 'starttime', 'endtime'})
+        self.assertIsInstance(schedule['subject'], int)
+
+        # Pavadinimų sąrašai be id formos praleidžiami, kai neprašomi
+        lesson = self._first('/api/curriculum/lessons/?expand=skills_list')
+        self.assertIn('skills_list', lesson)
+        self.assertIn('skills', lesson)
+        self.assertNotIn('virtues_names', lesson)
+        self.assertNotIn('competency_atcheve_details', lesson)
+
+    def test_queryset_loads_only_selected_columns(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/plans/imu-plans/?fields=id,lesson_title')
+        sql = next(query['sql'] for query in queries.captured_queries if 'FROM "plans_imuplan"' in query['sql'])
+        self.assertIn('"curriculum_lesson"."title"', sql)
+        self.assertNotIn('"plans_imuplan"."notes"', sql)
+        self.assertNotIn('schedule_globalschedule', sql)
+
+
+@skipUnless(renderers.ORJSON_AVAILABLE, 'orjson neįdiegtas')
+class ORJSONRendererTestCase(SimpleTestCase):
+    """
+    orjson renderer/parser (core.renderers) testai - rezultatas toks pat kaip DRF JSONRenderer
+    """
+
+    DATA = {
+        'title': 'Lietuvių kalba: žodžių darybą',
+        'date': date(2025, 9, 1),
+        'time': time(8, 0, 15, 123456),
+        'created_at': datetime(2025, 9, 1, 8, 0, 15, 123456, tzinfo=dt_timezone.utc),
+        'amount': Decimal('12.50'),
+        'levels': {1: 'Pradinis'},
+        'items': [{'nested': None}],
+    }
+
+    def test_render_matches_drf_renderer(self):
+        from rest_framework.renderers import JSONRenderer
+
+        fast = renderers.ORJSONRenderer().render(self.DATA)
+        self.assertEqual(json.loads(fast), json.loads(JSONRenderer().render(self.DATA)))
+        # Lietuviški simboliai - UTF-8, ne \\u escape
+        self.assertIn('žodžių'.encode(), fast)
+
+    def test_indent_falls_back_to_drf_renderer(self):
+        body = renderers.ORJSONRenderer().render({'a': 1}, 'application/json; indent=4', {})
+        self.assertEqual(body, b'{\n    "a": 1\n}')
+
+    def test_parser(self):
+        from rest_framework.exceptions import ParseError
+
+        parser = renderers.ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"vardas": "Jonas Ąžuolas"}'.encode())), {'vardas': 'Jonas Ąžuolas'})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"a": NaN}'))
+
+
+class CompressionTestCase(SimpleTestCase):
+    """
+    Atsakymų suspaudimo (core.compression_middleware) testai
+    """
+
+    BODY = json.dumps([{'dalykas': 'Matematika', 'klasė': '101', 'periodas': i} for i in range(200)]).encode()
+
+    def _middleware(self, response, **config):
+        from .compression_middleware import CompressionMiddleware
+
+        with override_settings(COMPRESSION={**settings.COMPRESSION, **config}):
+            return CompressionMiddleware(lambda request: response)
+
+    def _get(self, middleware, accept_encoding='gzip, deflate, br', path='/api/plans/imu-plans/'):
+        return middleware(RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding))
+
+    def test_negotiation(self):
+        from .compression import GzipCodec, negotiate
+
+        codecs = {'gzip': GzipCodec(6)}
+        self.assertEqual(negotiate('gzip;q=0.5, br', codecs).name, 'gzip')
+        self.assertIsNone(negotiate('gzip;q=0, identity', codecs))
+        self.assertEqual(negotiate('*', codecs).name, 'gzip')
+        self.assertIsNone(negotiate('', codecs))
+
+    def test_gzip_large_json(self):
+        import gzip
+
+        response = self._get(self._middleware(HttpResponse(self.BODY, content_type='application/json')))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), self.BODY)
+
+    def test_skips_small_unaccepted_and_non_api(self):
+        small = self._get(self._middleware(HttpResponse(b'{}', content_type='application/json')))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        identity = self._get(self._middleware(HttpResponse(self.BODY, content_type='application/json')), 'identity')
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        self.assertEqual(identity['Vary'], 'Accept-Encoding')
+        admin = self._get(self._middleware(HttpResponse(self.BODY, content_type='application/json')), path='/admin/')
+        self.assertFalse(admin.has_header('Content-Encoding'))
+
+    def test_skips_responses_setting_cookies(self):
+        response = HttpResponse(self.BODY, content_type='application/json')
+        response.set_cookie('access_token', 'secret')
+        self.assertFalse(self._get(self._middleware(response)).has_header('Content-Encoding'))
+
+    def test_streaming_response(self):
+        import zlib
+
+        from django.http import StreamingHttpResponse
+
+        chunks = [self.BODY[:1000], self.BODY[1000:]]
+        response = self._get(self._middleware(StreamingHttpResponse(iter(chunks), content_type='application/json')))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(zlib.decompress(body, 31), self.BODY)
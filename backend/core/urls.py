@@ -3,12 +3,22 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from .health_views import health_check, health_detailed
+from .metrics_views import metrics
+from .profiling_views import profile_download, profile_list
+from .slow_query_views import slow_query_list
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     # Health check endpoints
     path("api/health/", health_check, name="health_check"),
     path("api/health/detailed/", health_detailed, name="health_detailed"),
+    # Prometheus metrics (core.metrics)
+    path("api/metrics", metrics, name="metrics"),
+    # On-demand request profiles (core.profiling, manager only)
+    path("api/profiles/", profile_list, name="profile_list"),
+    path("api/profiles/<str:profile_id>/", profile_download, name="profile_download"),
+    # Slow SQL report (core.slow_queries, manager only)
+    path("api/slow-queries/", slow_query_list, name="slow_query_list"),
     # API endpoints
     path("api/users/", include("users.urls")),
     path("api/crm/", include("crm.urls")),
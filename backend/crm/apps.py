@@ -5,3 +5,9 @@ from django.apps import AppConfig
 class CrmConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crm'
+
+    def ready(self):
+        """
+        Import signal handlers when the app is ready
+        """
+        import crm.signals  # noqa
@@ -0,0 +1,168 @@
+# /backend/crm/scope.py
+# Per-request role scope resolver for A-DIENYNAS
+# PURPOSE: Compute what the caller may see (students, subjects, subject/level pairs) once per request
+#          and expose it as subqueries that every viewset filters through
+# UPDATES: Created to replace per-viewset StudentParent/StudentCurator/MentorSubject/StudentSubjectLevel queries
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.utils.functional import cached_property
+
+from .models import MentorSubject, StudentCurator, StudentParent, StudentSubjectLevel
+
+# Atributas, kuriame scope saugomas ant Django HttpRequest objekto
+REQUEST_ATTR = '_role_scope'
+
+# Trumpalaikės talpyklos raktas (kuruojamų / vaikų / dalykų id rinkiniams)
+CACHE_KEY = 'crm:scope:{user_id}:{kind}'
+
+
+def scope_cache_key(user_id, kind):
+    return CACHE_KEY.format(user_id=user_id, kind=kind)
+
+
+class RoleScope:
+    """
+    Vienos užklausos vartotojo matomumo sritis pagal validuotą current_role.
+    Visi metodai grąžina QuerySet'us (SQL subquery), o ne sąrašus -
+    ryšių lentelės užklausiamos kaip filtruojamos užklausos dalis.
+    """
+
+    def __init__(self, user, role):
+        self.user = user
+        self.role = role
+
+    @property
+    def is_manager(self):
+        return self.role == 'manager'
+
+    # --- Subquery'iai ---
+
+    @cached_property
+    def children_ids(self):
+        """Tėvo vaikų id (subquery)"""
+        return StudentParent.objects.filter(parent=self.user).values('student_id')
+
+    @cached_property
+    def curated_student_ids(self):
+        """Kuratoriaus kuruojamų studentų id (subquery)"""
+        return StudentCurator.objects.filter(curator=self.user).values('student_id')
+
+    @cached_property
+    def mentor_subject_ids(self):
+        """Mentoriaus dėstomų dalykų id (subquery)"""
+        return MentorSubject.objects.filter(mentor=self.user).values('subject_id')
+
+    @cached_property
+    def student_ids(self):
+        """
+        Matomų studentų id (subquery) rolėms student/parent/curator.
+        None - neribojama (manager); tuščias QuerySet - nieko nematoma.
+        """
+        if self.is_manager:
+            return None
+        if self.role == 'student':
+            return type(self.user).objects.filter(pk=self.user.pk).values('pk')
+        if self.role == 'parent':
+            return self.children_ids
+        if self.role == 'curator':
+            return self.curated_student_ids
+        return StudentParent.objects.none().values('student_id')
+
+    @cached_property
+    def subject_levels(self):
+        """Matomų studentų StudentSubjectLevel įrašai (subject/level poros)"""
+        if self.role == 'student':
+            return StudentSubjectLevel.objects.filter(student=self.user)
+        if self.role in ('parent', 'curator'):
+            return StudentSubjectLevel.objects.filter(student__in=self.student_ids)
+        if self.is_manager:
+            return StudentSubjectLevel.objects.all()
+        return StudentSubjectLevel.objects.none()
+
+    # --- Filtrai ---
+
+    def filter_students(self, queryset, field='student'):
+        """
+        Filtruoja queryset pagal matomus studentus (student/parent/curator/manager).
+        Kitoms rolėms grąžinamas tuščias queryset.
+        """
+        if self.is_manager:
+            return queryset
+        if self.role == 'student':
+            return queryset.filter(**{field: self.user})
+        if self.role in ('parent', 'curator'):
+            return queryset.filter(**{f'{field}__in': self.student_ids})
+        return queryset.none()
+
+    def subject_level_exists(self, subject_ref='subject', level_ref='level'):
+        """
+        Exists() išraiška: eilutės (subject, level) pora sutampa su matomų studentų
+        StudentSubjectLevel pora. Naudojama vietoj Q(...) | Q(...) grandinės.
+        """
+        return Exists(self.subject_levels.filter(
+            subject=OuterRef(subject_ref),
+            level=OuterRef(level_ref),
+        ))
+
+    # --- Narystės patikrinimai (vienam objektui) ---
+
+    def can_view_student(self, student_id):
+        """Ar vartotojas gali matyti nurodyto studento duomenis"""
+        if self.is_manager:
+            return True
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            return False
+        if self.role == 'student':
+            return student_id == self.user.pk
+        if self.role == 'parent':
+            return student_id in self._id_set('children', self.children_ids, 'student_id')
+        if self.role == 'curator':
+            return student_id in self._id_set('curated', self.curated_student_ids, 'student_id')
+        return False
+
+    def _id_set(self, kind, queryset, field):
+        """
+        Materializuotas id rinkinys - vienas kartas per užklausą,
+        pasirinktinai trumpalaikėje talpykloje (ROLE_SCOPE_CACHE_TTL, sekundės; 0 - išjungta).
+        Talpykla valoma crm.signals, kai pasikeičia ryšių lentelės.
+        """
+        cache_attr = f'_ids_{kind}'
+        ids = getattr(self, cache_attr, None)
+        if ids is not None:
+            return ids
+
+        ttl = getattr(settings, 'ROLE_SCOPE_CACHE_TTL', 0)
+        key = scope_cache_key(self.user.pk, kind)
+        if ttl:
+            ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(queryset.values_list(field, flat=True))
+            if ttl:
+                cache.set(key, ids, ttl)
+
+        setattr(self, cache_attr, ids)
+        return ids
+
+
+def get_current_role(request):
+    """SEC-011: validuota rolė iš RoleValidationMiddleware, kitu atveju vartotojo default_role"""
+    return getattr(request, 'current_role', None) or getattr(request.user, 'default_role', None)
+
+
+def get_role_scope(request):
+    """
+    Grąžina (ir prireikus sukuria) užklausos RoleScope.
+    Veikia tiek su Django HttpRequest, tiek su DRF Request.
+    """
+    http_request = getattr(request, '_request', request)
+    scope = getattr(http_request, REQUEST_ATTR, None)
+    user = request.user
+    role = get_current_role(request)
+    if scope is None or scope.user is not user or scope.role != role:
+        scope = RoleScope(user, role)
+        setattr(http_request, REQUEST_ATTR, scope)
+    return scope
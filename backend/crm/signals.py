@@ -0,0 +1,55 @@
+# /backend/crm/signals.py
+# CRM relationship signal handlers for A-DIENYNAS
+# PURPOSE: Invalidate crm.scope id-set cache when parent/curator relationships change
+# UPDATES: Created together with the per-request role scope resolver
+#          Keys are deleted again on commit (concurrent _id_set before commit would cache the old id set)
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import StudentCurator, StudentParent
+from .scope import scope_cache_key
+
+# Modelis -> (savininko FK laukas, scope rinkinio pavadinimas)
+SCOPE_OWNERS = {
+    StudentParent: ('parent_id', 'children'),
+    StudentCurator: ('curator_id', 'curated'),
+}
+
+SNAPSHOT_ATTR = '_scope_owner_id'
+
+
+def _invalidate(sender, *owner_ids):
+    field, kind = SCOPE_OWNERS[sender]
+    keys = {scope_cache_key(owner_id, kind) for owner_id in owner_ids if owner_id is not None}
+    if keys:
+        keys = list(keys)
+        cache.delete_many(keys)
+        # Lygiagreti užklausa galėjo užkrauti seną id rinkinį dar nepatvirtintos transakcijos metu
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@receiver(post_init, sender=StudentParent)
+@receiver(post_init, sender=StudentCurator)
+def remember_scope_owner(sender, instance, **kwargs):
+    """Įsimena savininką (tėvą/kuratorių), kad perkėlus ryšį būtų išvalyta ir senojo talpykla"""
+    field, _ = SCOPE_OWNERS[sender]
+    setattr(instance, SNAPSHOT_ATTR, instance.__dict__.get(field))
+
+
+@receiver(post_save, sender=StudentParent)
+@receiver(post_save, sender=StudentCurator)
+def invalidate_scope_on_save(sender, instance, **kwargs):
+    field, _ = SCOPE_OWNERS[sender]
+    current = getattr(instance, field)
+    _invalidate(sender, current, getattr(instance, SNAPSHOT_ATTR, None))
+    setattr(instance, SNAPSHOT_ATTR, current)
+
+
+@receiver(post_delete, sender=StudentParent)
+@receiver(post_delete, sender=StudentCurator)
+def invalidate_scope_on_delete(sender, instance, **kwargs):
+    field, _ = SCOPE_OWNERS[sender]
+    _invalidate(sender, getattr(instance, field))
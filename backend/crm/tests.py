@@ -1,4 +1,121 @@
 # /backend/crm/tests.py
-from django.test import TestCase
+from datetime import date, time
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from curriculum.models import Level, Subject
+from schedule.models import Classroom, GlobalSchedule, Period
+
+from .models import StudentCurator, StudentParent, StudentSubjectLevel
+from .scope import get_role_scope, scope_cache_key
+
+User = get_user_model()
+
+
+@override_settings(ROLE_SCOPE_CACHE_TTL=60)
+class RoleScopeTestCase(TestCase):
+    """
+    Užklausos matomumo srities (crm.scope) testai
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.curator = User.objects.create_user(
+            email='curator@test.com', password=None, first_name='Cur', last_name='Ator',
+            roles=['curator', 'mentor'], default_role='curator'
+        )
+        self.parent = User.objects.create_user(
+            email='parent@test.com', password=None, first_name='Par', last_name='Ent',
+            roles=['parent'], default_role='parent'
+        )
+        self.student = User.objects.create_user(
+            email='student@test.com', password=None, first_name='Stu', last_name='Dent',
+            roles=['student'], default_role='student'
+        )
+        self.other = User.objects.create_user(
+            email='other@test.com', password=None, first_name='Oth', last_name='Er',
+            roles=['student'], default_role='student'
+        )
+        StudentCurator.objects.create(student=self.student, curator=self.curator, start_date=date(2025, 9, 1))
+        StudentParent.objects.create(student=self.student, parent=self.parent)
+
+        self.math = Subject.objects.create(name='Matematika')
+        self.art = Subject.objects.create(name='Dailė')
+        self.basic = Level.objects.create(name='Bendrasis')
+        self.advanced = Level.objects.create(name='Išplėstinis')
+        StudentSubjectLevel.objects.create(student=self.student, subject=self.math, level=self.basic)
+        StudentSubjectLevel.objects.create(student=self.other, subject=self.art, level=self.advanced)
+
+    def _request(self, user, current_role=None):
+        request = self.factory.get('/api/schedule/')
+        request.user = user
+        if current_role:
+            request.current_role = current_role
+        return request
+
+    def test_scope_is_computed_once_per_request(self):
+        request = self._request(self.curator)
+        self.assertIs(get_role_scope(request), get_role_scope(request))
+        # Pasikeitus validuotai rolei sukuriamas naujas scope
+        request.current_role = 'mentor'
+        self.assertEqual(get_role_scope(request).role, 'mentor')
+
+    def test_filter_students_uses_single_query(self):
+        scope = get_role_scope(self._request(self.parent))
+        with CaptureQueriesContext(connection) as queries:
+            ids = list(scope.filter_students(User.objects.all(), field='pk').values_list('pk', flat=True))
+        self.assertEqual(ids, [self.student.pk])
+        self.assertEqual(len(queries), 1)
+
+    def test_unknown_role_sees_nothing(self):
+        scope = get_role_scope(self._request(self.curator, current_role='mentor'))
+        self.assertFalse(scope.filter_students(StudentSubjectLevel.objects.all()).exists())
+
+    def test_curator_schedule_matches_subject_level_pairs(self):
+        period = Period.objects.create(starttime=time(8, 0))
+
+        def schedule(subject, level):
+            classroom = Classroom.objects.create(name=f'{subject.name} {level.name}')
+            return GlobalSchedule.objects.create(
+                date=date(2025, 9, 1), period=period, classroom=classroom,
+                subject=subject, level=level, user=self.curator
+            )
+
+        visible = schedule(self.math, self.basic)
+        # Kryžminės poros (math/advanced, art/basic) ir kito studento pora nematomos
+        schedule(self.math, self.advanced)
+        schedule(self.art, self.basic)
+        schedule(self.art, self.advanced)
+
+        scope = get_role_scope(self._request(self.curator))
+        queryset = GlobalSchedule.objects.filter(scope.subject_level_exists())
+        self.assertEqual(list(queryset), [visible])
+
+    def test_can_view_student_is_cached_and_invalidated(self):
+        scope = get_role_scope(self._request(self.curator))
+        self.assertTrue(scope.can_view_student(self.student.pk))
+        self.assertFalse(scope.can_view_student(self.other.pk))
+
+        # Kita užklausa ima id rinkinį iš talpyklos
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(get_role_scope(self._request(self.curator)).can_view_student(str(self.student.pk)))
+        self.assertEqual(len(queries), 0)
+
+        # Naujas ryšys išvalo talpyklą
+        StudentCurator.objects.create(student=self.other, curator=self.curator, start_date=date(2025, 9, 1))
+        self.assertTrue(get_role_scope(self._request(self.curator)).can_view_student(self.other.pk))
+
+    def test_reload_before_commit_is_invalidated_on_commit(self):
+        relation = StudentCurator.objects.get(student=self.student, curator=self.curator)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            relation.delete()
+            # Kitas worker'is (dar nematantis ištrynimo) įrašo seną id rinkinį į talpyklą
+            cache.set(scope_cache_key(self.curator.pk, 'curated'), frozenset({self.student.pk}), 60)
+            self.assertTrue(get_role_scope(self._request(self.curator)).can_view_student(self.student.pk))
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(get_role_scope(self._request(self.curator)).can_view_student(self.student.pk))
@@ -16,6 +16,7 @@ from .models import (
     StudentSubjectLevel,
     MentorSubject
 )
+from .scope import get_role_scope
 
 
 
@@ -30,11 +31,9 @@ class StudentParentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header dabartinės rolės nustatymui
-        current_role = getattr(self.request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(self.request.user, 'default_role', None)
-        
+        # SEC-011: rolė validuojama server-side (RoleValidationMiddleware), scope skaičiuojamas kartą per užklausą
+        current_role = get_role_scope(self.request).role
+
         # Jei vartotojas yra tėvas, grąžinti tik jo vaikus
         # Jei vartotojas yra studentas, grąžinti tik jo tėvus
         # Jei ne vienas iš jų, grąžinti tuščią queryset
@@ -54,11 +53,9 @@ class StudentCuratorViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header dabartinės rolės nustatymui
-        current_role = getattr(self.request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(self.request.user, 'default_role', None)
-        
+        # SEC-011: rolė validuojama server-side (RoleValidationMiddleware), scope skaičiuojamas kartą per užklausą
+        current_role = get_role_scope(self.request).role
+
         # Jei vartotojas yra kuratorius, grąžinti tik jo studentus
         # Jei vartotojas yra studentas, grąžinti tik jo kuratorius
         # Jei ne vienas iš jų, grąžinti tuščią queryset
@@ -78,11 +75,9 @@ class StudentSubjectLevelViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header dabartinės rolės nustatymui
-        current_role = getattr(self.request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(self.request.user, 'default_role', None)
-        
+        # SEC-011: rolė validuojama server-side (RoleValidationMiddleware), scope skaičiuojamas kartą per užklausą
+        current_role = get_role_scope(self.request).role
+
         # Jei vartotojas yra studentas, grąžinti tik jo dalykus
         # Jei vartotojas yra mentorius arba kuratorius, grąžinti visus studentų dalykus (tam tikriems endpoint'ams)
         # Jei ne vienas iš jų, grąžinti tuščią queryset
@@ -95,11 +90,9 @@ class StudentSubjectLevelViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def students_by_subject_level(self, request):
         """Grąžina studentus pagal dalyką ir lygį ugdymo planų priskyrimui"""
-        # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header teisių patikrinimui
-        current_role = getattr(request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(request.user, 'default_role', None)
-        
+        # SEC-011: rolė validuojama server-side (RoleValidationMiddleware), scope skaičiuojamas kartą per užklausą
+        current_role = get_role_scope(request).role
+
         if current_role not in ['mentor', 'curator']:
             return Response(
                 {'error': 'Tik mentoriai ir kuratoriai gali matyti studentų sąrašą'}, 
@@ -153,11 +146,9 @@ class MentorSubjectViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header dabartinės rolės nustatymui
-        current_role = getattr(self.request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(self.request.user, 'default_role', None)
-        
+        # SEC-011: rolė validuojama server-side (RoleValidationMiddleware), scope skaičiuojamas kartą per užklausą
+        current_role = get_role_scope(self.request).role
+
         # Jei vartotojas yra mentorius, grąžinti tik jo dalykus
         # Jei ne mentorius, grąžinti tuščią queryset
         if current_role == 'mentor':
@@ -167,11 +158,9 @@ class MentorSubjectViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_subjects(self, request):
         """Grąžina prisijungusio mentoriaus dalykus su pilna informacija"""
-        # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header teisių patikrinimui
-        current_role = getattr(request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(request.user, 'default_role', None)
-        
+        # SEC-011: rolė validuojama server-side (RoleValidationMiddleware), scope skaičiuojamas kartą per užklausą
+        current_role = get_role_scope(request).role
+
         # CHANGE: Pagerinta role validation - leisti manager ir curator roles
         # Manager ir curator gali matyti visus dalykus, mentor tik savo
         if current_role not in ['mentor', 'manager', 'curator']:
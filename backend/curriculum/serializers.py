@@ -1,8 +1,13 @@
 # /backend/curriculum/serializers.py
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from core.fieldsets import SparseFieldsetMixin
 from .models import Subject, Level, Objective, Component, Skill, Competency, Virtue, CompetencyAtcheve, Lesson
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class SubjectSerializer(serializers.ModelSerializer):
@@ -96,9 +101,11 @@ class VirtueSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Pamokų serializeris - valdo pamokų duomenų serializavimą
+    CHANGE: ?fields= / ?expand= (core.fieldsets) - M2M pavadinimų sąrašai (levels_names, skills_list,
+    virtues_names, competency_atcheve_*) grąžinami tik paprašius; id sąrašai lieka
     """
     mentor_name = serializers.CharField(source='mentor.get_full_name', read_only=True)
     mentor = serializers.PrimaryKeyRelatedField(queryset=get_user_model().objects.filter(roles__contains=['mentor']), required=False, allow_null=True)
@@ -147,6 +154,42 @@ class LessonSerializer(serializers.ModelSerializer):
             'focus_list', 'competency_atcheve_name', 'competency_atcheve_details'
         ]
         read_only_fields = ('created_at', 'updated_at')
+        expandable = {
+            'levels_names': None, 'skills_list': None, 'virtues_names': None,
+            'competency_atcheve_name': None, 'competency_atcheve_details': None,
+        }
+        fieldset_paths = {
+            'mentor_name': ('mentor__first_name', 'mentor__last_name'),
+            'subject_name': ('subject__name',),
+            'topic_name': ('topic',),
+            'objectives_list': ('objectives',),
+            'components_list': ('components',),
+            'focus_list': ('focus',),
+        }
+        fieldset_prefetch = {
+            'levels_names': ('levels',),
+            'skills_list': ('skills',),
+            'virtues_names': ('virtues',),
+            'competency_atcheve_name': ('competency_atcheves',),
+            'competency_atcheve_details': ('competency_atcheves',),
+        }
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request=None):
+        """
+        Užkrauna visus laukus, kuriuos naudoja serializeris (be N+1 užklausų kiekvienai pamokai).
+        Su ?fields= / ?expand= - tik pasirinktų laukų stulpeliai ir M2M ryšiai.
+        """
+        competency_atcheves = Prefetch(
+            'competency_atcheves',
+            queryset=CompetencyAtcheve.objects.select_related('competency').prefetch_related('virtues'),
+        )
+        names, expand = cls.requested_fields(request)
+        if names is None:
+            return queryset.select_related('mentor', 'subject').prefetch_related(
+                'levels', 'skills', 'virtues', competency_atcheves,
+            )
+        return cls.restrict_queryset(queryset, names, expand, prefetch=[competency_atcheves])
 
     def get_levels_names(self, obj):
         return [level.name for level in obj.levels.all()]
@@ -202,7 +245,7 @@ class LessonSerializer(serializers.ModelSerializer):
         """
         Sukuria pamoką su ManyToMany laukais
         """
-        print(f"Creating lesson with data: {validated_data}")
+        logger.debug("Creating lesson with data: %s", validated_data)
         
         # Išimti ManyToMany laukus iš validated_data
         virtues_data = validated_data.pop('virtues', [])
@@ -210,9 +253,8 @@ class LessonSerializer(serializers.ModelSerializer):
         skills_data = validated_data.pop('skills', [])
         competency_atcheves_data = validated_data.pop('competency_atcheves', [])
         
-        print(f"Virtues data: {virtues_data}")
-        print(f"Levels data: {levels_data}")
-        print(f"Competency atcheves data: {competency_atcheves_data}")
+        logger.debug("Lesson M2M data: virtues=%s, levels=%s, competency_atcheves=%s",
+                     virtues_data, levels_data, competency_atcheves_data)
         
         # Sukurti pamoką
         lesson = Lesson.objects.create(**validated_data)
@@ -225,14 +267,14 @@ class LessonSerializer(serializers.ModelSerializer):
         # Pridėti competency_atcheves
         lesson.competency_atcheves.set(competency_atcheves_data)
         
-        print(f"Created lesson: {lesson}")
+        logger.debug("Created lesson: %s", lesson.id)
         return lesson
 
     def update(self, instance, validated_data):
         """
         Atnaujina pamoką su ManyToMany laukais
         """
-        print(f"Updating lesson {instance.id} with data: {validated_data}")
+        logger.debug("Updating lesson %s with data: %s", instance.id, validated_data)
         
         # Išimti ManyToMany laukus iš validated_data
         virtues_data = validated_data.pop('virtues', None)
@@ -240,9 +282,8 @@ class LessonSerializer(serializers.ModelSerializer):
         skills_data = validated_data.pop('skills', None)
         competency_atcheves_data = validated_data.pop('competency_atcheves', None)
         
-        print(f"Virtues data: {virtues_data}")
-        print(f"Levels data: {levels_data}")
-        print(f"Competency atcheves data: {competency_atcheves_data}")
+        logger.debug("Lesson M2M data: virtues=%s, levels=%s, competency_atcheves=%s",
+                     virtues_data, levels_data, competency_atcheves_data)
         
         # Atnaujinti kitus laukus
         for attr, value in validated_data.items():
@@ -259,5 +300,5 @@ class LessonSerializer(serializers.ModelSerializer):
         if competency_atcheves_data is not None:
             instance.competency_atcheves.set(competency_atcheves_data)
         
-        print(f"Updated lesson: {instance}")
+        logger.debug("Updated lesson: %s", instance.id)
         return instance 
\ No newline at end of file
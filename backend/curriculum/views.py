@@ -5,6 +5,7 @@
 
 from rest_framework import viewsets, status
 from rest_framework.response import Response
+from crm.scope import get_role_scope
 from .models import Subject, Level, Objective, Component, Skill, Competency, Virtue, CompetencyAtcheve, Lesson
 from .serializers import (
     SubjectSerializer, LevelSerializer, ObjectiveSerializer, ComponentSerializer,
@@ -177,39 +178,29 @@ class LessonViewSet(viewsets.ModelViewSet):
         SEC-017: Secure queryset filtering based on validated role
         No longer relies on vulnerable X-Current-Role header
         """
-        # Get validated role from middleware (already validated server-side)
-        current_role = getattr(self.request, 'current_role', None)
+        # Get validated role from middleware (already validated server-side) - vienas scope per užklausą
+        scope = get_role_scope(self.request)
+        current_role = scope.role
         user = self.request.user
-        
-        # If no current_role, try to get default role from user
-        if not current_role:
-            current_role = getattr(user, 'default_role', None)
-        
+
         if current_role == 'mentor':
             # Mentors can see their own lessons
-            return Lesson.objects.filter(mentor=user)
+            queryset = Lesson.objects.filter(mentor=user)
         elif current_role == 'student':
-            # Students can see lessons they're enrolled in
-            try:
-                return Lesson.objects.filter(levels__in=user.subject_levels.values_list('level', flat=True))
-            except AttributeError:
-                # If user doesn't have subject_levels, return empty queryset
-                return Lesson.objects.none()
+            # Students can see lessons they're enrolled in (subquery, ne id sąrašas)
+            queryset = Lesson.objects.filter(levels__in=scope.subject_levels.values('level'))
         elif current_role == 'curator':
-            # Curators can see lessons for their students
-            try:
-                from crm.models import StudentCurator
-                curated_students = StudentCurator.objects.filter(curator=user).values_list('student', flat=True)
-                return Lesson.objects.filter(levels__in=user.subject_levels.filter(student__in=curated_students).values_list('level', flat=True)).distinct()
-            except (AttributeError, ImportError):
-                # If models don't exist or user doesn't have subject_levels, return empty queryset
-                return Lesson.objects.none()
+            # Curators can see lessons for their students' levels
+            queryset = Lesson.objects.filter(levels__in=scope.subject_levels.values('level')).distinct()
         elif current_role in ['admin', 'manager']:
             # Managers and admins can see all lessons
-            return Lesson.objects.all()
+            queryset = Lesson.objects.all()
         else:
             # Unknown role, return empty queryset
             return Lesson.objects.none()
+        # M2M ir FK laukai serializeriui - fiksuotas užklausų skaičius nepriklausomai nuo pamokų kiekio
+        fieldset_request = self.request if self.action in ('list', 'retrieve') else None
+        return LessonSerializer.optimize_queryset(queryset, fieldset_request)
 
     def get_object(self):
         """
@@ -0,0 +1,224 @@
+# backend/grades/analytics.py
+# Cohort grade analytics for A-DIENYNAS
+# PURPOSE: Distribution (histogram, quantiles, achievement bands), per-group comparison and per-student
+#          rolling mean / trend ("at risk" list) for a filtered cohort of grades, loaded with one values_list
+#          query and computed column-wise with NumPy
+# UPDATES: Used by GradeViewSet.analytics (cached per role scope + grades version, bumped by grades.summaries,
+#          + achievement band version, bumped by grades.signals)
+
+import hashlib
+import logging
+import math
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from curriculum.models import Subject
+
+from . import bands
+
+logger = logging.getLogger(__name__)
+
+# Bendra (tarp worker'ių) vertinimų duomenų versija - pasikeitus vertinimams talpyklos raktai nebegalioja
+VERSION_KEY = 'grades:analytics:version'
+CACHE_KEY = 'grades:analytics:{version}:{bands}:{scope}:{params}'
+
+QUANTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_EDGES = list(range(0, 101, 10))
+SECONDS_PER_DAY = 86400.0
+
+# group_by parametras -> Grade stulpelis (grupių palyginimui)
+GROUP_FIELDS = {
+    'subject': 'lesson__subject_id',
+    'mentor': 'mentor_id',
+}
+
+
+def get_version():
+    try:
+        return cache.get(VERSION_KEY, '')
+    except Exception as e:
+        logger.warning(f"Grade analytics version lookup failed: {str(e)}")
+        return None
+
+
+def bump_version():
+    """Pasikeitė vertinimai - visų worker'ių analitikos talpyklos įrašai nebegalioja"""
+    try:
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.error(f"Grade analytics version bump failed: {str(e)}")
+
+
+def cache_key(scope_key, params):
+    """Raktas priklauso nuo vertinimų ir pasiekimų lygių (levels pasiskirstymas) versijų"""
+    version, bands_version = get_version(), bands.get_version()
+    if version is None or bands_version is None:
+        return None
+    digest = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:16]
+    return CACHE_KEY.format(version=version, bands=bands_version, scope=scope_key, params=digest)
+
+
+def load_columns(grades, group_by):
+    """
+    Vertinimai -> stulpeliai (mokinys, grupė, procentai, diena) viena values_list užklausa.
+    Diena - dienos nuo anksčiausio vertinimo (naudojami tik skirtumai tarp laikų); rikiavimas - NumPy, ne DB.
+    """
+    rows = list(grades.order_by().values_list('student_id', GROUP_FIELDS[group_by], 'percentage', 'created_at'))
+    if not rows:
+        return [], [], [], []
+    students, groups, percentages, created = zip(*rows)
+    timestamps = np.fromiter((moment.timestamp() for moment in created), dtype=np.float64, count=len(created))
+    return students, groups, percentages, (timestamps - timestamps.min()) / SECONDS_PER_DAY
+
+
+def _round(value):
+    return None if value is None or math.isnan(value) else round(float(value), 2)
+
+
+def _np_quantiles(sorted_values, starts, counts):
+    """Tiesinė interpoliacija (numpy 'linear'); sorted_values surikiuoti kiekvienoje grupėje"""
+    result = []
+    last = starts + counts - 1
+    for q in QUANTILES:
+        position = starts + (counts - 1) * (q / 100)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, last)
+        result.append(sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low))
+    return result
+
+
+def _statistics(students, groups, percentages, days, window):
+    students = np.asarray(students, dtype=np.int64)
+    groups = np.asarray(groups, dtype=np.int64)
+    values = np.asarray(percentages, dtype=np.float64)
+    days = np.asarray(days, dtype=np.float64)
+    total = len(values)
+    order = np.lexsort((days, students))
+    students, groups, values, days = students[order], groups[order], values[order], days[order]
+
+    ordered = np.sort(values)
+    whole = np.array([0]), np.array([total])
+    histogram = np.histogram(values, bins=HISTOGRAM_EDGES)[0]
+    band_counts = [
+        (level.code, int(np.searchsorted(ordered, level.max_percentage, 'right')
+                         - np.searchsorted(ordered, level.min_percentage, 'left')))
+        for level in bands.band_table.levels()
+    ]
+
+    # Grupės: surikiuota pagal (grupė, procentai) - kvantiliai iš kiekvienos grupės atkarpos
+    keys, inverse = np.unique(groups, return_inverse=True)
+    group_counts = np.bincount(inverse)
+    group_sums = np.bincount(inverse, weights=values)
+    group_sorted = values[np.lexsort((values, inverse))]
+    group_starts = np.concatenate(([0], np.cumsum(group_counts)[:-1]))
+
+    # Mokiniai: eilutės surikiuotos pagal (mokinys, laikas)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(students)) + 1))
+    ends = np.append(starts[1:], total)
+    counts = ends - starts
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    window_starts = np.maximum(starts, ends - window)
+    rolling = (cumulative[ends] - cumulative[window_starts]) / (ends - window_starts)
+    sum_t = np.add.reduceat(days, starts)
+    sum_p = np.add.reduceat(values, starts)
+    sum_tp = np.add.reduceat(days * values, starts)
+    sum_tt = np.add.reduceat(days * days, starts)
+    denominator = counts * sum_tt - sum_t * sum_t
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(denominator > 1e-9, (counts * sum_tp - sum_t * sum_p) / denominator, np.nan)
+
+    return {
+        'mean': values.mean(),
+        'std': values.std(),
+        'min': ordered[0],
+        'max': ordered[-1],
+        'quantiles': [quantile[0] for quantile in _np_quantiles(ordered, *whole)],
+        'histogram': histogram.tolist(),
+        'bands': band_counts,
+        'groups': list(zip(
+            keys.tolist(), group_counts.tolist(), (group_sums / group_counts).tolist(),
+            zip(*[quantile.tolist() for quantile in _np_quantiles(group_sorted, group_starts, group_counts)]),
+        )),
+        'students': list(zip(
+            students[starts].tolist(), counts.tolist(), (sum_p / counts).tolist(), rolling.tolist(),
+            (slope * 7).tolist(),
+        )),
+    }
+
+
+def _names(group_by, keys):
+    if group_by == 'subject':
+        return dict(Subject.objects.filter(pk__in=keys).values_list('pk', 'name'))
+    return _user_names(keys)
+
+
+def _user_names(keys):
+    return {
+        pk: f'{first_name} {last_name}'.strip()
+        for pk, first_name, last_name in get_user_model().objects.filter(pk__in=keys).values_list(
+            'pk', 'first_name', 'last_name'
+        )
+    }
+
+
+def cohort_analytics(grades, group_by='subject', window=None, risk_threshold=None):
+    """
+    Kohortos analitika: pasiskirstymas, grupių palyginimas (group_by: subject/mentor) ir mokiniai,
+    kurių paskutinių `window` vertinimų slenkantis vidurkis žemiau risk_threshold (trend - procentiniai
+    punktai per savaitę, mažiausių kvadratų tiesė per visus mokinio vertinimus).
+    """
+    config = settings.GRADE_ANALYTICS
+    window = window or config['ROLLING_WINDOW']
+    risk_threshold = config['RISK_THRESHOLD'] if risk_threshold is None else risk_threshold
+    students, groups, percentages, days = load_columns(grades, group_by)
+    result = {
+        'count': len(percentages),
+        'window': window,
+        'risk_threshold': risk_threshold,
+        'group_by': group_by,
+    }
+    if not percentages:
+        return dict(result, summary=None, histogram={'edges': HISTOGRAM_EDGES, 'counts': []}, levels={},
+                    groups=[], students=0, at_risk_count=0, at_risk=[])
+
+    stats = _statistics(students, groups, percentages, days, window)
+
+    at_risk = sorted(
+        (row for row in stats['students'] if row[3] < risk_threshold), key=lambda row: (row[3], row[0])
+    )
+    limited = at_risk[:config['MAX_AT_RISK']]
+    group_names = _names(group_by, [row[0] for row in stats['groups']])
+    student_names = _user_names([row[0] for row in limited])
+
+    return dict(
+        result,
+        summary={
+            'mean': _round(stats['mean']),
+            'std': _round(stats['std']),
+            'min': _round(stats['min']),
+            'max': _round(stats['max']),
+            'quantiles': {f'p{q}': _round(value) for q, value in zip(QUANTILES, stats['quantiles'])},
+        },
+        histogram={'edges': HISTOGRAM_EDGES, 'counts': stats['histogram']},
+        levels=dict(stats['bands']),
+        groups=[
+            {
+                'id': key, 'name': group_names.get(key, ''), 'count': count, 'mean': _round(mean),
+                'quantiles': {f'p{q}': _round(value) for q, value in zip(QUANTILES, quantiles)},
+            }
+            for key, count, mean, quantiles in stats['groups']
+        ],
+        students=len(stats['students']),
+        at_risk_count=len(at_risk),
+        at_risk=[
+            {
+                'student_id': student_id, 'name': student_names.get(student_id, ''), 'count': count,
+                'mean': _round(mean), 'rolling_mean': _round(rolling), 'trend': _round(trend),
+            }
+            for student_id, count, mean, rolling, trend in limited
+        ],
+    )
@@ -6,3 +6,9 @@ class GradesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'grades'
     verbose_name = 'Pažymiai'
+
+    def ready(self):
+        """
+        Import signal handlers when the app is ready
+        """
+        import grades.signals  # noqa
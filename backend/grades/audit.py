@@ -0,0 +1,120 @@
+# backend/grades/audit.py
+# Write-behind GradeCalculation audit buffer for A-DIENYNAS
+# PURPOSE: Keep calculate_level free of synchronous writes: calculator audit rows are sampled, queued in
+#          worker memory and inserted with bulk_create by a per-process flusher thread (size/time thresholds)
+# UPDATES: Used by GradeViewSet.calculate_level; flushed at worker shutdown (atexit, gunicorn worker_exit)
+
+import atexit
+import logging
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import GradeCalculation
+
+logger = logging.getLogger(__name__)
+
+
+class CalculationAuditBuffer:
+    """
+    Vieno proceso GradeCalculation eilė. Įrašymas - foniniame thread'e, kai eilėje BATCH_SIZE įrašų
+    arba praėjus FLUSH_INTERVAL sekundžių. Eilė ribojama MAX_PENDING: perpildžius nauji įrašai atmetami
+    (skaičiuojama dropped), nepavykęs įrašymas grąžina įrašus į eilę.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._pending = []
+        self._last_flush = 0.0
+        self.dropped = 0
+
+    def _ensure_process(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            # Po fork'o (gunicorn preload_app) eilė ir thread'as nepaveldimi
+            self._pid = pid
+            self._pending = []
+            self._wakeup = threading.Event()
+            self._last_flush = time.monotonic()
+            atexit.register(self.flush)
+            if settings.GRADE_CALCULATION_AUDIT['BACKGROUND']:
+                threading.Thread(
+                    target=self._run, args=(pid,), name=f'grade-calculation-audit-{pid}', daemon=True,
+                ).start()
+
+    def record(self, percentage, level):
+        """Įtraukia skaičiavimą į eilę (pagal ENABLED ir SAMPLE_RATE). Grąžina ar įrašas įtrauktas."""
+        config = settings.GRADE_CALCULATION_AUDIT
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return False
+        calculation = GradeCalculation(
+            percentage=percentage, calculated_level_id=level.pk, calculation_date=timezone.now(),
+        )
+        with self._lock:
+            self._ensure_process()
+            if len(self._pending) >= config['MAX_PENDING']:
+                self.dropped += 1
+                return False
+            self._pending.append(calculation)
+            full = len(self._pending) >= config['BATCH_SIZE']
+        if not config['BACKGROUND']:
+            self.maybe_flush()
+        elif full:
+            self._wakeup.set()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def maybe_flush(self):
+        config = settings.GRADE_CALCULATION_AUDIT
+        with self._lock:
+            due = (len(self._pending) >= config['BATCH_SIZE']
+                   or time.monotonic() - self._last_flush >= config['FLUSH_INTERVAL'])
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Įrašo visą eilę (bulk_create po BATCH_SIZE). Grąžina įrašytų skaičių."""
+        with self._lock:
+            if self._pid != os.getpid() or not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        try:
+            GradeCalculation.objects.bulk_create(batch, batch_size=settings.GRADE_CALCULATION_AUDIT['BATCH_SIZE'])
+        except Exception as e:
+            logger.error(f"GradeCalculation audit flush failed ({len(batch)} rows): {str(e)}")
+            with self._lock:
+                room = settings.GRADE_CALCULATION_AUDIT['MAX_PENDING'] - len(self._pending)
+                self.dropped += max(0, len(batch) - room)
+                self._pending = batch[:max(0, room)] + self._pending
+            return 0
+        return len(batch)
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+            self.dropped = 0
+
+    def _run(self, pid):
+        wakeup = self._wakeup
+        while self._pid == pid:
+            wakeup.wait(settings.GRADE_CALCULATION_AUDIT['FLUSH_INTERVAL'])
+            wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # Foninio thread'o DB jungtis neuždaroma request_finished signalu
+                connection.close()
+
+
+buffer = CalculationAuditBuffer()
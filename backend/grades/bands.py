@@ -0,0 +1,90 @@
+# backend/grades/bands.py
+# Process-wide achievement band table for A-DIENYNAS grades
+# PURPOSE: Map percentage -> AchievementLevel with bisect over rows' min/max_percentage (no query per lookup)
+# UPDATES: Created for AchievementLevel.get_level_by_percentage. Invalidation across gunicorn workers via
+#          shared version key in Django cache, bumped by grades.signals when AchievementLevel rows change
+
+import copy
+import logging
+import threading
+import uuid
+from bisect import bisect_right
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Bendro (tarp worker'ių) versijos raktas
+VERSION_KEY = 'grades:achievement_bands:version'
+
+
+def get_version():
+    """Grąžina bendrą intervalų versiją ('' jei dar nenustatyta, None - talpyklos klaida)"""
+    try:
+        return cache.get(VERSION_KEY, '')
+    except Exception as e:
+        logger.warning(f"Achievement band version lookup failed: {str(e)}")
+        return None
+
+
+def bump_version():
+    """Pakeičia bendrą versiją - visi worker'iai kito paieškos metu lentelę užkraus iš DB iš naujo"""
+    try:
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.error(f"Achievement band version bump failed: {str(e)}")
+    band_table.invalidate()
+
+
+class BandTable:
+    """
+    Pasiekimų lygių intervalų lentelė: lygiai surikiuoti pagal min_percentage, paieška - bisect.
+    Procentai, nepatenkantys į jokį [min, max] intervalą, grąžina None.
+    Grąžinama lygio objekto kopija, kad užklausos nedalintų to paties objekto.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._starts = []
+        self._levels = []
+        self.loads = 0
+
+    def _load(self):
+        from .models import AchievementLevel
+
+        levels = sorted(AchievementLevel.objects.all(), key=lambda level: (level.min_percentage, level.pk))
+        return [level.min_percentage for level in levels], levels
+
+    def _current(self):
+        version = get_version()
+        if version is None:
+            return self._load()
+        with self._lock:
+            if self._version is not None and self._version == version:
+                return self._starts, self._levels
+        # Versija skaitoma PRIEŠ užkraunant iš DB, kad lygiagretus pakeitimas nebūtų prarastas
+        starts, levels = self._load()
+        with self._lock:
+            self._starts, self._levels, self._version = starts, levels, version
+            self.loads += 1
+        return starts, levels
+
+    def lookup(self, percentage):
+        starts, levels = self._current()
+        index = bisect_right(starts, percentage) - 1
+        if index < 0 or percentage > levels[index].max_percentage:
+            return None
+        return copy.copy(levels[index])
+
+    def levels(self):
+        """Visi lygiai pagal min_percentage (kopijos)"""
+        return [copy.copy(level) for level in self._current()[1]]
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._starts, self._levels = [], []
+
+
+band_table = BandTable()
@@ -0,0 +1,234 @@
+# backend/grades/gradebook.py
+# Gradebook grid submit for A-DIENYNAS
+# PURPOSE: Validate and save a whole class grid of grades (student, lesson, imu_plan, percentage, notes)
+#          with a constant number of queries: roles, lessons and IMU plans are checked with one query each,
+#          achievement levels come from grades.bands, rows are upserted on (student, lesson, imu_plan)
+#          or, without a plan, on the partial unique index (student, lesson) WHERE imu_plan IS NULL
+# UPDATES: Used by GradeViewSet.gradebook_submit (POST /api/grades/grades/gradebook/)
+#          Grid upserts refresh GradeSummary rows explicitly (bulk writes skip Grade signals)
+#          Also backs GradeViewSet.get_or_create (single-row idempotent upsert)
+#          Added students x lessons matrix read (GradeViewSet.gradebook_matrix): grid + SQL GROUP BY aggregates
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from rest_framework import serializers
+
+from curriculum.models import Lesson
+from plans.models import IMUPlan
+
+from .models import AchievementLevel, Grade
+from .summaries import refresh_for_lessons
+
+# INSERT stulpeliai ir upsert metu atnaujinami laukai (created_at paliekamas)
+INSERT_FIELDS = [
+    'student', 'lesson', 'imu_plan', 'mentor', 'percentage', 'achievement_level', 'notes', 'created_at', 'updated_at',
+]
+UPSERT_FIELDS = ['mentor', 'percentage', 'achievement_level', 'notes', 'updated_at']
+UPSERT_BATCH_SIZE = 500
+
+# Konflikto taikinys: su planu - unique_together, be plano - dalinis indeksas grade_unique_without_plan
+CONFLICT_PLANNED = (['student', 'lesson', 'imu_plan'], '')
+CONFLICT_UNPLANNED = (['student', 'lesson'], ' WHERE {imu_plan} IS NULL')
+
+
+def _row_key(row):
+    return row['student'], row['lesson'], row.get('imu_plan')
+
+
+def validate_grid(rows, mentor_id):
+    """
+    Tikrina visą tinklelį: studentų ir mentoriaus roles, pamokas, IMU planų priklausomybę ir
+    procentų intervalus. Klaidos grąžinamos kiekvienai eilutei (ValidationError {'grades': [...]}).
+    Grąžina pasiekimų lygį kiekvienai eilutei.
+    """
+    User = get_user_model()
+    student_ids = {row['student'] for row in rows}
+    roles = dict(User.objects.filter(pk__in=student_ids | {mentor_id}).values_list('pk', 'roles'))
+    lesson_ids = set(Lesson.objects.filter(pk__in={row['lesson'] for row in rows}).values_list('pk', flat=True))
+    plan_ids = {row['imu_plan'] for row in rows if row.get('imu_plan')}
+    plans = {
+        pk: (student_id, lesson_id)
+        for pk, student_id, lesson_id in IMUPlan.objects.filter(pk__in=plan_ids).values_list(
+            'pk', 'student_id', 'lesson_id'
+        )
+    }
+
+    if 'mentor' not in (roles.get(mentor_id) or []):
+        raise serializers.ValidationError({'mentor': ['Vertinimą gali duoti tik mentorius']})
+
+    errors = [{} for _ in rows]
+    levels = []
+    seen = set()
+    for index, row in enumerate(rows):
+        row_errors = errors[index]
+        if 'student' not in (roles.get(row['student']) or []):
+            row_errors['student'] = ['Vertinimas gali būti duotas tik mokiniui']
+        elif row['student'] == mentor_id:
+            row_errors['student'] = ['Studentas ir mentorius negali būti tas pats asmuo']
+        if row['lesson'] not in lesson_ids:
+            row_errors['lesson'] = ['Pamoka nerasta']
+        if row.get('imu_plan'):
+            plan = plans.get(row['imu_plan'])
+            if plan is None:
+                row_errors['imu_plan'] = ['IMU planas nerastas']
+            elif plan != (row['student'], row['lesson']):
+                row_errors['imu_plan'] = ['IMU planas nepriklauso šiam mokiniui ir pamokai']
+        if _row_key(row) in seen:
+            row_errors['non_field_errors'] = ['Vertinimas tinklelyje kartojasi']
+        seen.add(_row_key(row))
+
+        level = AchievementLevel.get_level_by_percentage(row['percentage'])
+        if level is None:
+            row_errors['percentage'] = [f"Procentai {row['percentage']}% neatitinka jokio pasiekimų lygio"]
+        levels.append(level)
+
+    if any(errors):
+        raise serializers.ValidationError({'grades': errors})
+    return levels
+
+
+def save_grid(rows, mentor_id):
+    """
+    Išsaugo tinklelį vienu INSERT ... ON CONFLICT DO UPDATE sakiniu kiekvienai grupei: eilutės su imu_plan -
+    konfliktas (student, lesson, imu_plan), be imu_plan - dalinis unikalus indeksas (student, lesson).
+    Lygiagretūs pateikimai nekelia IntegrityError ir nekuria dublikatų. Grąžina (išsaugoti vertinimai
+    tinklelio tvarka, sukurtų skaičius) - sukurta/atnaujinta nustatoma iš RETURNING.
+    """
+    levels = validate_grid(rows, mentor_id)
+    now = timezone.now()
+    grades = [
+        Grade(
+            student_id=row['student'], lesson_id=row['lesson'], imu_plan_id=row.get('imu_plan'),
+            mentor_id=mentor_id, percentage=row['percentage'], achievement_level=level,
+            notes=row.get('notes', ''), created_at=now, updated_at=now,
+        )
+        for row, level in zip(rows, levels)
+    ]
+    keys = [_row_key(row) for row in rows]
+    # Vienoda eilučių tvarka visiems pateikimams - mažiau tarpusavio užraktų (deadlock) tarp transakcijų
+    ordered = sorted(grades, key=lambda grade: (grade.student_id, grade.lesson_id, grade.imu_plan_id or 0))
+
+    created = 0
+    with transaction.atomic():
+        for conflict, group in (
+            (CONFLICT_PLANNED, [grade for grade in ordered if grade.imu_plan_id]),
+            (CONFLICT_UNPLANNED, [grade for grade in ordered if not grade.imu_plan_id]),
+        ):
+            for start in range(0, len(group), UPSERT_BATCH_SIZE):
+                returned = upsert_grades(group[start:start + UPSERT_BATCH_SIZE], *conflict)
+                created += sum(1 for _, inserted in returned if inserted)
+        saved = _existing(keys)
+        refresh_for_lessons({(student_id, lesson_id) for student_id, lesson_id, _ in keys})
+
+    return [saved[key] for key in keys], created
+
+
+def upsert_grades(grades, conflict_fields, where=''):
+    """
+    INSERT ... ON CONFLICT (conflict_fields) [WHERE ...] DO UPDATE ... RETURNING id, sukurta.
+    Naujos eilutės created_at = updated_at (abu - tas pats laikas), atnaujintos - created_at senesnis.
+    Grade.save() ir signalai nekviečiami - validacija validate_grid, suvestinės - refresh_for_lessons.
+    """
+    if not grades:
+        return []
+    quote = connection.ops.quote_name
+    fields = [Grade._meta.get_field(name) for name in INSERT_FIELDS]
+    column = {field.name: quote(field.column) for field in fields}
+    placeholders = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    params = [
+        field.get_db_prep_save(getattr(grade, field.attname), connection)
+        for grade in grades for field in fields
+    ]
+    sql = (
+        f"INSERT INTO {quote(Grade._meta.db_table)} ({', '.join(column.values())}) "
+        f"VALUES {', '.join([placeholders] * len(grades))} "
+        f"ON CONFLICT ({', '.join(column[name] for name in conflict_fields)})"
+        f"{where.format(**column)} "
+        f"DO UPDATE SET {', '.join(f'{column[name]} = EXCLUDED.{column[name]}' for name in UPSERT_FIELDS)} "
+        f"RETURNING {quote(Grade._meta.pk.column)}, {column['created_at']} = {column['updated_at']}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(pk, bool(inserted)) for pk, inserted in cursor.fetchall()]
+
+
+def _existing(keys):
+    """(student, lesson, imu_plan) -> Grade tinklelio raktams viena užklausa"""
+    wanted = set(keys)
+    queryset = Grade.objects.filter(
+        student_id__in={key[0] for key in keys}, lesson_id__in={key[1] for key in keys}
+    ).select_related('achievement_level')
+    return {
+        (grade.student_id, grade.lesson_id, grade.imu_plan_id): grade
+        for grade in queryset
+        if (grade.student_id, grade.lesson_id, grade.imu_plan_id) in wanted
+    }
+
+
+def _stats(grouped, key_field):
+    """GROUP BY (raktas, lygio kodas) eilutės -> {raktas: {'count', 'average', 'levels'}}"""
+    stats = {}
+    for row in grouped:
+        entry = stats.setdefault(row[key_field], {'count': 0, 'total': 0, 'levels': {}})
+        entry['count'] += row['count']
+        entry['total'] += row['total']
+        if row['achievement_level__code']:
+            entry['levels'][row['achievement_level__code']] = row['count']
+    return {
+        key: {
+            'count': entry['count'],
+            'average': round(entry['total'] / entry['count'], 2) if entry['count'] else None,
+            'levels': entry['levels'],
+        }
+        for key, entry in stats.items()
+    }
+
+
+def grade_matrix(plans, grades):
+    """
+    Mokiniai x pamokos tinklelis iš IMU planų (eilutės/stulpeliai) ir jų vertinimų.
+    Fiksuotas užklausų skaičius: planai, langeliai ir po vieną GROUP BY eilutėms ir stulpeliams.
+    Langelis - naujausias vertinimas [procentai, lygio kodas] arba None; suvestinės apima visus
+    vertinimus intervale. Mokiniai rikiuojami pagal pavardę, pamokos - pagal pirmą datą.
+    """
+    students, lessons = {}, {}
+    for student_id, first_name, last_name, lesson_id, title, day in plans.values_list(
+        'student_id', 'student__first_name', 'student__last_name', 'lesson_id', 'lesson__title',
+        'global_schedule__date',
+    ):
+        students.setdefault(student_id, (last_name, first_name))
+        if lesson_id is not None and (lesson_id not in lessons or day < lessons[lesson_id][0]):
+            lessons[lesson_id] = (day, title)
+
+    student_ids = sorted(students, key=lambda pk: (students[pk], pk))
+    lesson_ids = sorted(lessons, key=lambda pk: (lessons[pk][0], pk))
+    row_index = {pk: index for index, pk in enumerate(student_ids)}
+    column_index = {pk: index for index, pk in enumerate(lesson_ids)}
+
+    cells = [[None] * len(lesson_ids) for _ in student_ids]
+    for student_id, lesson_id, percentage, code in grades.order_by('pk').values_list(
+        'student_id', 'lesson_id', 'percentage', 'achievement_level__code'
+    ):
+        row, column = row_index.get(student_id), column_index.get(lesson_id)
+        if row is not None and column is not None:
+            cells[row][column] = [percentage, code]
+
+    grouped = grades.order_by()
+    total = {'count': Count('id'), 'total': Sum('percentage')}
+    student_stats = _stats(grouped.values('student_id', 'achievement_level__code').annotate(**total), 'student_id')
+    lesson_stats = _stats(grouped.values('lesson_id', 'achievement_level__code').annotate(**total), 'lesson_id')
+    empty = {'count': 0, 'average': None, 'levels': {}}
+
+    return {
+        'students': [
+            {'id': pk, 'name': f'{students[pk][1]} {students[pk][0]}'.strip()} for pk in student_ids
+        ],
+        'lessons': [
+            {'id': pk, 'title': lessons[pk][1], 'date': lessons[pk][0]} for pk in lesson_ids
+        ],
+        'cells': cells,
+        'student_stats': [student_stats.get(pk, empty) for pk in student_ids],
+        'lesson_stats': [lesson_stats.get(pk, empty) for pk in lesson_ids],
+    }
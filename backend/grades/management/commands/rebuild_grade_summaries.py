@@ -0,0 +1,31 @@
+# backend/grades/management/commands/rebuild_grade_summaries.py
+
+# Django management komanda mokinių vertinimų suvestinių (GradeSummary) perkūrimui
+# CHANGE: Sukurta komanda - suvestinės perskaičiuojamos iš Grade lentelės (grades.summaries)
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from grades.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    """
+    Perkuria GradeSummary įrašus iš vertinimų (pvz. po tiesioginių DB pakeitimų)
+    """
+    help = 'Perkuria mokinių vertinimų suvestines pagal dalykus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--student', type=int, action='append', dest='students',
+            help='Perkurti tik nurodyto mokinio suvestines (galima kartoti)'
+        )
+
+    def handle(self, *args, **options):
+        """Pagrindinė komandos logika"""
+        start = time.perf_counter()
+        count = rebuild_summaries(student_ids=options['students'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Perkurta {count} suvestinių ({time.perf_counter() - start:.2f} s)'
+        ))
@@ -0,0 +1,38 @@
+# backend/grades/management/commands/recalculate_achievement_levels.py
+
+# Django management komanda visų vertinimų pasiekimų lygių perskaičiavimui
+# CHANGE: Sukurta komanda - vienas UPDATE kiekvienai vertinimų partijai (grades.recalculation)
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from grades.recalculation import recalculate_achievement_levels
+
+
+class Command(BaseCommand):
+    """
+    Perskaičiuoja Grade.achievement_level pagal AchievementLevel procentų intervalus
+    """
+    help = 'Perskaičiuoja visų vertinimų pasiekimų lygius (vienas UPDATE kiekvienai partijai)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.GRADE_RECALCULATION['BATCH_SIZE'],
+            help='Vertinimų skaičius vienoje partijoje (vienas UPDATE ir transakcija)'
+        )
+
+    def handle(self, *args, **options):
+        """Pagrindinė komandos logika"""
+        start = time.perf_counter()
+
+        def progress(updated, processed):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Peržiūrėta {processed}, atnaujinta {updated}')
+
+        result = recalculate_achievement_levels(options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Atnaujinta {result['updated']} iš {result['processed']} vertinimų "
+            f"({result['batches']} partijos, {time.perf_counter() - start:.2f} s)"
+        ))
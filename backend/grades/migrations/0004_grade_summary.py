@@ -0,0 +1,77 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def build_summaries(apps, schema_editor):
+    """Pradinės suvestinės iš esamų vertinimų (vėliau palaiko grades.summaries)"""
+    Grade = apps.get_model('grades', 'Grade')
+    GradeSummary = apps.get_model('grades', 'GradeSummary')
+    summaries = {}
+    grouped = Grade.objects.order_by().values('student_id', 'lesson__subject_id', 'achievement_level__code').annotate(
+        count=Count('id'), total=Sum('percentage'), last=Max('updated_at'),
+    )
+    for row in grouped:
+        key = (row['student_id'], row['lesson__subject_id'])
+        summary = summaries.setdefault(key, GradeSummary(
+            student_id=key[0], subject_id=key[1], grade_count=0, percentage_total=0, level_counts={},
+        ))
+        summary.grade_count += row['count']
+        summary.percentage_total += row['total']
+        if row['achievement_level__code']:
+            summary.level_counts[row['achievement_level__code']] = row['count']
+        if summary.last_graded_at is None or row['last'] > summary.last_graded_at:
+            summary.last_graded_at = row['last']
+    for summary in summaries.values():
+        summary.average_percentage = round(summary.percentage_total / summary.grade_count, 2)
+    GradeSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curriculum', '0008_subject_color'),
+        ('grades', '0003_achievementlevel_alter_grade_options_and_more'),
+        ('plans', '0008_alter_imuplan_lesson'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_count', models.PositiveIntegerField(default=0, verbose_name='Vertinimų skaičius')),
+                ('percentage_total', models.PositiveIntegerField(default=0, verbose_name='Procentų suma')),
+                ('average_percentage', models.FloatField(default=0, verbose_name='Vidutiniai procentai')),
+                ('level_counts', models.JSONField(default=dict, help_text='Pasiekimų lygio kodas -> vertinimų skaičius', verbose_name='Vertinimai pagal lygius')),
+                ('last_graded_at', models.DateTimeField(blank=True, null=True, verbose_name='Paskutinis vertinimas')),
+            ],
+            options={
+                'verbose_name': 'Vertinimų suvestinė',
+                'verbose_name_plural': 'Vertinimų suvestinės',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', '-created_at'], name='grade_student_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='gradesummary',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_summaries', to=settings.AUTH_USER_MODEL, verbose_name='Mokinys'),
+        ),
+        migrations.AddField(
+            model_name='gradesummary',
+            name='subject',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_summaries', to='curriculum.subject', verbose_name='Dalykas'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='gradesummary',
+            unique_together={('student', 'subject')},
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
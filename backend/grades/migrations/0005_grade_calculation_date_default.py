@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0004_grade_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gradecalculation',
+            name='calculation_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Kada buvo atliktas skaičiavimas', verbose_name='Skaičiavimo data'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def remove_duplicate_unplanned(apps, schema_editor):
+    """
+    Prieš unikalumo apribojimą: iš kelių vertinimų be IMU plano tam pačiam (mokinys, pamoka) paliekamas
+    naujausias; paveiktų mokinių suvestinės (GradeSummary) perskaičiuojamos
+    """
+    Grade = apps.get_model('grades', 'Grade')
+    GradeSummary = apps.get_model('grades', 'GradeSummary')
+    unplanned = Grade.objects.filter(imu_plan__isnull=True)
+    duplicated = (
+        unplanned.order_by().values('student_id', 'lesson_id').annotate(rows=Count('id')).filter(rows__gt=1)
+    )
+    students = set()
+    for key in duplicated:
+        grades = unplanned.filter(**{name: key[name] for name in ('student_id', 'lesson_id')})
+        keep = grades.order_by('-updated_at', '-pk').values_list('pk', flat=True).first()
+        grades.exclude(pk=keep).delete()
+        students.add(key['student_id'])
+    if not students:
+        return
+
+    GradeSummary.objects.filter(student_id__in=students).delete()
+    summaries = {}
+    grouped = (
+        Grade.objects.filter(student_id__in=students).order_by()
+        .values('student_id', 'lesson__subject_id', 'achievement_level__code')
+        .annotate(count=Count('id'), total=Sum('percentage'), last=Max('updated_at'))
+    )
+    for row in grouped:
+        key = (row['student_id'], row['lesson__subject_id'])
+        summary = summaries.setdefault(key, GradeSummary(
+            student_id=key[0], subject_id=key[1], grade_count=0, percentage_total=0, level_counts={},
+        ))
+        summary.grade_count += row['count']
+        summary.percentage_total += row['total']
+        if row['achievement_level__code']:
+            summary.level_counts[row['achievement_level__code']] = row['count']
+        if summary.last_graded_at is None or row['last'] > summary.last_graded_at:
+            summary.last_graded_at = row['last']
+    for summary in summaries.values():
+        summary.average_percentage = round(summary.percentage_total / summary.grade_count, 2)
+    GradeSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curriculum', '0008_subject_color'),
+        ('grades', '0005_grade_calculation_date_default'),
+        ('plans', '0008_alter_imuplan_lesson'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_unplanned, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='grade',
+            constraint=models.UniqueConstraint(condition=models.Q(('imu_plan__isnull', True)), fields=('student', 'lesson'), name='grade_unique_without_plan'),
+        ),
+    ]
@@ -8,6 +8,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 
@@ -75,20 +76,14 @@ class AchievementLevel(models.Model):
         """
         Grąžina pasiekimų lygį pagal procentus
         CHANGE: Frontend logikos implementacija
+        CHANGE: Intervalai imami iš min_percentage/max_percentage (grades.bands lentelė proceso atmintyje,
+        bisect paieška be DB užklausos; lentelė atnaujinama pasikeitus AchievementLevel įrašams)
         """
+        from .bands import band_table
+
         try:
-            percentage = int(percentage)
-            if 40 <= percentage <= 54:
-                return cls.objects.get(code='S')
-            elif 55 <= percentage <= 69:
-                return cls.objects.get(code='B')
-            elif 70 <= percentage <= 84:
-                return cls.objects.get(code='P')
-            elif 85 <= percentage <= 100:
-                return cls.objects.get(code='A')
-            else:
-                return None
-        except (ValueError, cls.DoesNotExist):
+            return band_table.lookup(int(percentage))
+        except (TypeError, ValueError):
             return None
 
 
@@ -169,6 +164,18 @@ class Grade(models.Model):
         verbose_name_plural = _('Vertinimai')
         ordering = ['-created_at']
         unique_together = ['student', 'lesson', 'imu_plan']
+        constraints = [
+            # NULL imu_plan unique_together nesaugo - vienas vertinimas be plano (grades.gradebook upsert)
+            models.UniqueConstraint(
+                fields=['student', 'lesson'],
+                condition=models.Q(imu_plan__isnull=True),
+                name='grade_unique_without_plan',
+            ),
+        ]
+        indexes = [
+            # student_summary paskutiniai vertinimai
+            models.Index(fields=['student', '-created_at'], name='grade_student_created_idx'),
+        ]
     
     def __str__(self):
         level_info = f"{self.achievement_level.code} ({self.percentage}%)"
@@ -246,9 +253,11 @@ class GradeCalculation(models.Model):
         verbose_name=_('Apskaičiuotas lygis'),
         help_text=_('Automatiškai apskaičiuotas pasiekimų lygis')
     )
+    # default vietoj auto_now_add: grades.audit įrašo bulk_create vėliau, laikas - skaičiavimo momentas
     calculation_date = models.DateTimeField(
         verbose_name=_('Skaičiavimo data'),
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         help_text=_('Kada buvo atliktas skaičiavimas')
     )
     
@@ -259,3 +268,40 @@ class GradeCalculation(models.Model):
     
     def __str__(self):
         return f"{self.percentage}% → {self.calculated_level.code} ({self.calculation_date})"
+
+
+class GradeSummary(models.Model):
+    """
+    Mokinio vertinimų suvestinė pagal dalyką (palaikoma grades.summaries)
+    CHANGE: Naujas modelis - student_summary atsakomas viena indeksuota užklausa vietoj
+    skaičiavimo per visus mokinio vertinimus
+    """
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='grade_summaries',
+        verbose_name=_('Mokinys')
+    )
+    subject = models.ForeignKey(
+        'curriculum.Subject',
+        on_delete=models.CASCADE,
+        related_name='grade_summaries',
+        verbose_name=_('Dalykas')
+    )
+    grade_count = models.PositiveIntegerField(_('Vertinimų skaičius'), default=0)
+    percentage_total = models.PositiveIntegerField(_('Procentų suma'), default=0)
+    average_percentage = models.FloatField(_('Vidutiniai procentai'), default=0)
+    level_counts = models.JSONField(
+        _('Vertinimai pagal lygius'),
+        default=dict,
+        help_text=_('Pasiekimų lygio kodas -> vertinimų skaičius')
+    )
+    last_graded_at = models.DateTimeField(_('Paskutinis vertinimas'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Vertinimų suvestinė')
+        verbose_name_plural = _('Vertinimų suvestinės')
+        unique_together = ['student', 'subject']
+
+    def __str__(self):
+        return f"{self.student} - {self.subject} ({self.grade_count}, {self.average_percentage}%)"
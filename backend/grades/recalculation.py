@@ -0,0 +1,143 @@
+# backend/grades/recalculation.py
+# Set-based achievement level recalculation for A-DIENYNAS grades
+# PURPOSE: Recompute Grade.achievement_level for all grades with one UPDATE ... SET achievement_level_id =
+#          CASE ... END per primary key batch (AchievementLevel bands are loaded once), instead of
+#          a query + save() per grade
+# UPDATES: Used by `manage.py recalculate_achievement_levels` and GradeViewSet.recalculate_all (background thread)
+#          Rebuilds GradeSummary level histograms after levels change (UPDATE skips Grade signals)
+
+import logging
+import threading
+import uuid
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from .models import AchievementLevel, Grade
+from .summaries import rebuild_summaries
+
+logger = logging.getLogger(__name__)
+
+# Foninio darbo būsena (bendra visiems worker'iams per cache) ir užraktas vienam vykdomam darbui
+STATUS_KEY = 'grades:recalculation:{job_id}'
+LOCK_KEY = 'grades:recalculation:lock'
+
+
+def _bands():
+    """[(lygio id, min %, max %)] - vieną kartą visam perskaičiavimui"""
+    return list(AchievementLevel.objects.order_by('min_percentage').values_list(
+        'id', 'min_percentage', 'max_percentage'
+    ))
+
+
+def _pk_batches(batch_size):
+    """Vertinimų pk intervalai [(pirmas, paskutinis, įrašų skaičius)] po batch_size įrašų"""
+    pks = Grade.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size)
+    while True:
+        batch = list(islice(pks, batch_size))
+        if not batch:
+            return
+        yield batch[0], batch[-1], len(batch)
+
+
+def recalculate_achievement_levels(batch_size=None, progress=None):
+    """
+    Perskaičiuoja visų vertinimų pasiekimų lygius pagal AchievementLevel intervalus.
+    Vertinimai, kurių procentai nepatenka į jokį intervalą, nekeičiami (kaip ir anksčiau).
+    Kiekviena partija - atskira transakcija su vienu UPDATE (trumpi užraktai didelėje lentelėje).
+    progress(atnaujinta, peržiūrėta) kviečiamas po kiekvienos partijos.
+    Grąžina {'updated': n, 'processed': n, 'batches': n}.
+    """
+    batch_size = batch_size or settings.GRADE_RECALCULATION['BATCH_SIZE']
+    bands = _bands()
+    result = {'updated': 0, 'processed': 0, 'batches': 0}
+    if not bands:
+        return result
+
+    level_case = Case(
+        *[When(percentage__gte=low, percentage__lte=high, then=Value(level_id)) for level_id, low, high in bands],
+        default=F('achievement_level_id'),
+        output_field=Grade._meta.get_field('achievement_level').target_field,
+    )
+    # Tik eilutės, kurių lygis turi pasikeisti (~Q apima ir NULL achievement_level_id)
+    changed = reduce(or_, [
+        Q(percentage__gte=low, percentage__lte=high) & ~Q(achievement_level_id=level_id)
+        for level_id, low, high in bands
+    ])
+
+    for first_pk, last_pk, size in _pk_batches(batch_size):
+        with transaction.atomic():
+            updated = Grade.objects.filter(changed, pk__gte=first_pk, pk__lte=last_pk).update(
+                achievement_level_id=level_case
+            )
+        result['updated'] += updated
+        result['processed'] += size
+        result['batches'] += 1
+        if progress:
+            progress(result['updated'], result['processed'])
+    if result['updated']:
+        rebuild_summaries()
+    return result
+
+
+def job_status(job_id):
+    """Foninio perskaičiavimo būsena arba None (nežinomas / pasibaigęs TTL)"""
+    return cache.get(STATUS_KEY.format(job_id=job_id))
+
+
+def _set_status(job_id, **status):
+    cache.set(STATUS_KEY.format(job_id=job_id), status, settings.GRADE_RECALCULATION['STATUS_TTL'])
+
+
+def _run_job(job_id, batch_size):
+    started_at = timezone.now().isoformat()
+
+    def progress(updated, processed):
+        _set_status(job_id, status='running', updated=updated, processed=processed, started_at=started_at)
+
+    try:
+        result = recalculate_achievement_levels(batch_size, progress=progress)
+        _set_status(job_id, status='done', started_at=started_at, finished_at=timezone.now().isoformat(), **result)
+        logger.info("Pasiekimų lygių perskaičiavimas %s baigtas: %s", job_id, result)
+    except Exception as exc:
+        logger.exception("Pasiekimų lygių perskaičiavimas %s nepavyko", job_id)
+        _set_status(job_id, status='failed', error=str(exc), started_at=started_at)
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _run_background_job(job_id, batch_size):
+    try:
+        _run_job(job_id, batch_size)
+    finally:
+        # Foninio thread'o DB jungtis neuždaroma request_finished signalu
+        connection.close()
+
+
+def start_recalculation(batch_size=None):
+    """
+    Paleidžia perskaičiavimą foniniame thread'e (GRADE_RECALCULATION['BACKGROUND']) arba iš karto.
+    Vienu metu vykdomas tik vienas darbas - jau vykdomo darbo id grąžinamas pakartotinai.
+    Grąžina (job_id, būsena).
+    """
+    job_id = uuid.uuid4().hex
+    if not cache.add(LOCK_KEY, job_id, settings.GRADE_RECALCULATION['LOCK_TTL']):
+        running = cache.get(LOCK_KEY)
+        return running, job_status(running)
+
+    _set_status(job_id, status='queued')
+    if settings.GRADE_RECALCULATION['BACKGROUND']:
+        thread = threading.Thread(
+            target=_run_background_job, args=(job_id, batch_size),
+            name=f'grade-recalculation-{job_id[:8]}', daemon=True,
+        )
+        thread.start()
+    else:
+        _run_job(job_id, batch_size)
+    return job_id, job_status(job_id)
@@ -4,7 +4,7 @@
 # CHANGE: Sukurtas naujas serializers.py failas su AchievementLevel ir Grade serializers
 
 from rest_framework import serializers
-from .models import AchievementLevel, Grade, GradeCalculation
+from .models import AchievementLevel, Grade, GradeCalculation, GradeSummary
 
 
 class AchievementLevelSerializer(serializers.ModelSerializer):
@@ -140,16 +140,33 @@ class GradeListSerializer(serializers.ModelSerializer):
         ]
 
 
+class SubjectGradeSummarySerializer(serializers.ModelSerializer):
+    """
+    Mokinio vertinimų suvestinė vienam dalykui (GradeSummary)
+    CHANGE: Naujas serializer - student_summary dalykų sąrašas
+    """
+    subject_name = serializers.CharField(source='subject.name', read_only=True)
+    
+    class Meta:
+        model = GradeSummary
+        fields = [
+            'subject', 'subject_name', 'grade_count', 'average_percentage',
+            'level_counts', 'last_graded_at'
+        ]
+
+
 class StudentGradeSummarySerializer(serializers.Serializer):
     """
     Mokinio vertinimų suvestinės serializer
     CHANGE: Naujas serializer statistikos rodymui
+    CHANGE: Pridėtas subjects - suvestinės pagal dalykus
     """
     student_id = serializers.IntegerField()
     student_name = serializers.CharField()
     total_grades = serializers.IntegerField()
     average_percentage = serializers.FloatField()
     achievement_levels = serializers.DictField()
+    subjects = SubjectGradeSummarySerializer(many=True)
     recent_grades = GradeListSerializer(many=True)
 
 
@@ -164,4 +181,37 @@ class LessonGradeSummarySerializer(serializers.Serializer):
     graded_students = serializers.IntegerField()
     average_percentage = serializers.FloatField()
     achievement_levels = serializers.DictField()
-    grades = GradeListSerializer(many=True) 
\ No newline at end of file
+    grades = GradeListSerializer(many=True)
+
+
+class GradebookRowSerializer(serializers.Serializer):
+    """
+    Vienas vertinimų tinklelio langelis (grades.gradebook)
+    """
+    student = serializers.IntegerField()
+    lesson = serializers.IntegerField()
+    imu_plan = serializers.IntegerField(required=False, allow_null=True)
+    percentage = serializers.IntegerField(min_value=0, max_value=100)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class GradebookSubmitSerializer(serializers.Serializer):
+    """
+    Vertinimų tinklelio pateikimas: mentor - tik manager rolei (mentoriui - jis pats)
+    """
+    mentor = serializers.IntegerField(required=False)
+    grades = GradebookRowSerializer(many=True, allow_empty=False, max_length=1000)
+
+
+class GradebookCellSerializer(serializers.ModelSerializer):
+    """
+    Išsaugotas tinklelio langelis (kompaktiškas, be susijusių objektų)
+    """
+    achievement_level_code = serializers.CharField(source='achievement_level.code', read_only=True)
+
+    class Meta:
+        model = Grade
+        fields = [
+            'id', 'student', 'lesson', 'imu_plan', 'mentor', 'percentage',
+            'achievement_level', 'achievement_level_code', 'notes', 'updated_at'
+        ]
@@ -0,0 +1,43 @@
+# /backend/grades/signals.py
+# AchievementLevel and Grade signal handlers for A-DIENYNAS
+# PURPOSE: Invalidate grades.bands percentage lookup table in every worker when achievement bands change
+# UPDATES: Created together with the process-wide band table
+#          Grade save/delete refreshes the affected GradeSummary rows (grades.summaries) in the same transaction
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .bands import bump_version
+from .models import AchievementLevel, Grade
+from .summaries import refresh_for_lessons
+
+# Grade (student_id, lesson_id) būsena užkrovimo metu - perkėlus vertinimą atnaujinama ir senoji suvestinė
+SNAPSHOT_ATTR = '_summary_key'
+
+
+@receiver(post_save, sender=AchievementLevel)
+@receiver(post_delete, sender=AchievementLevel)
+def invalidate_band_table(sender, instance, **kwargs):
+    bump_version()
+    # Kiti worker'iai galėjo perkrauti lentelę dar nepatvirtintos transakcijos metu (sena versija DB)
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_init, sender=Grade)
+def remember_summary_key(sender, instance, **kwargs):
+    setattr(instance, SNAPSHOT_ATTR, (instance.__dict__.get('student_id'), instance.__dict__.get('lesson_id')))
+
+
+@receiver(post_save, sender=Grade)
+def refresh_summary_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.student_id, instance.lesson_id)
+    refresh_for_lessons({current, getattr(instance, SNAPSHOT_ATTR, current)})
+    setattr(instance, SNAPSHOT_ATTR, current)
+
+
+@receiver(post_delete, sender=Grade)
+def refresh_summary_on_delete(sender, instance, **kwargs):
+    refresh_for_lessons({(instance.student_id, instance.lesson_id)})
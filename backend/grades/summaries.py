@@ -0,0 +1,132 @@
+# backend/grades/summaries.py
+# Maintained per-(student, subject) grade summaries for A-DIENYNAS
+# PURPOSE: Keep GradeSummary (count, sum, average, level histogram, last graded) in step with Grade:
+#          affected (student, subject) keys are recomputed with one GROUP BY and upserted in the same
+#          transaction as the grade change
+# UPDATES: Called from grades.signals (Grade save/delete), grades.gradebook (grid upsert),
+#          grades.recalculation (level changes) and `manage.py rebuild_grade_summaries`
+#          Every refresh also invalidates cached cohort analytics (grades.analytics version)
+#          Affected summary rows are locked (placeholder insert + SELECT ... FOR UPDATE in key order) before
+#          aggregating, so concurrent grade writers for the same key are serialized and none is overwritten
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from curriculum.models import Lesson
+
+from . import analytics
+from .models import Grade, GradeSummary
+
+SUMMARY_FIELDS = ['grade_count', 'percentage_total', 'average_percentage', 'level_counts', 'last_graded_at']
+
+
+def _aggregate(grades):
+    """Vertinimai -> {(student_id, subject_id): GradeSummary} viena GROUP BY užklausa"""
+    summaries = {}
+    grouped = grades.order_by().values('student_id', 'lesson__subject_id', 'achievement_level__code').annotate(
+        count=Count('id'), total=Sum('percentage'), last=Max('updated_at'),
+    )
+    for row in grouped:
+        key = (row['student_id'], row['lesson__subject_id'])
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = GradeSummary(
+                student_id=key[0], subject_id=key[1], grade_count=0, percentage_total=0, level_counts={},
+            )
+        summary.grade_count += row['count']
+        summary.percentage_total += row['total']
+        if row['achievement_level__code']:
+            summary.level_counts[row['achievement_level__code']] = row['count']
+        if summary.last_graded_at is None or row['last'] > summary.last_graded_at:
+            summary.last_graded_at = row['last']
+    for summary in summaries.values():
+        summary.average_percentage = round(summary.percentage_total / summary.grade_count, 2)
+    return summaries
+
+
+def _upsert(summaries):
+    if summaries:
+        GradeSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['student', 'subject'],
+            update_fields=SUMMARY_FIELDS,
+        )
+
+
+def _lock(keys, student_ids, subject_ids):
+    """
+    Užrakina raktų suvestinių eilutes iki transakcijos pabaigos: trūkstamos įterpiamos kaip tuščios
+    (ON CONFLICT DO NOTHING), tada SELECT ... FOR UPDATE raktų tvarka (be deadlock'ų tarp rašytojų).
+    Lygiagretus rašytojas laukia čia, o ne prie upsert - GROUP BY jau mato patvirtintus kito vertinimus
+    (READ COMMITTED: kiekviena užklausa - naujas snapshot'as).
+    """
+    ordered = sorted(keys)
+    GradeSummary.objects.bulk_create(
+        [
+            GradeSummary(student_id=student_id, subject_id=subject_id, level_counts={})
+            for student_id, subject_id in ordered
+        ],
+        ignore_conflicts=True,
+    )
+    list(
+        GradeSummary.objects.select_for_update()
+        .filter(student_id__in=student_ids, subject_id__in=subject_ids)
+        .order_by('student_id', 'subject_id')
+        .values_list('pk', flat=True)
+    )
+
+
+def refresh_summaries(keys):
+    """
+    Perskaičiuoja nurodytų (student_id, subject_id) suvestines: raktų užraktas, viena GROUP BY,
+    vienas DELETE (raktams be vertinimų) ir vienas upsert, nepriklausomai nuo raktų skaičiaus
+    """
+    keys = {key for key in keys if None not in key}
+    if not keys:
+        return
+    student_ids = {student_id for student_id, _ in keys}
+    subject_ids = {subject_id for _, subject_id in keys}
+    with transaction.atomic():
+        transaction.on_commit(analytics.bump_version)
+        _lock(keys, student_ids, subject_ids)
+        summaries = _aggregate(Grade.objects.filter(student_id__in=student_ids, lesson__subject_id__in=subject_ids))
+        _upsert([summary for key, summary in summaries.items() if key in keys])
+        empty = keys - set(summaries)
+        if empty:
+            stale = GradeSummary.objects.filter(student_id__in={key[0] for key in empty},
+                                                subject_id__in={key[1] for key in empty})
+            stale_ids = [
+                pk for pk, student_id, subject_id in stale.values_list('pk', 'student_id', 'subject_id')
+                if (student_id, subject_id) in empty
+            ]
+            if stale_ids:
+                GradeSummary.objects.filter(pk__in=stale_ids).delete()
+
+
+def refresh_for_lessons(student_lessons):
+    """(student_id, lesson_id) poros -> suvestinių atnaujinimas (pamokų dalykai - viena užklausa)"""
+    student_lessons = {(student_id, lesson_id) for student_id, lesson_id in student_lessons if lesson_id}
+    if not student_lessons:
+        return
+    subjects = dict(
+        # _base_manager - ir ištrintų (soft delete) pamokų vertinimai įeina į suvestinę
+        Lesson._base_manager.filter(pk__in={lesson_id for _, lesson_id in student_lessons})
+        .values_list('pk', 'subject_id')
+    )
+    refresh_summaries({(student_id, subjects.get(lesson_id)) for student_id, lesson_id in student_lessons})
+
+
+def rebuild_summaries(student_ids=None):
+    """Visų (arba nurodytų mokinių) suvestinių perkūrimas iš Grade lentelės"""
+    grades = Grade.objects.all()
+    existing = GradeSummary.objects.all()
+    if student_ids is not None:
+        grades = grades.filter(student_id__in=student_ids)
+        existing = existing.filter(student_id__in=student_ids)
+    with transaction.atomic():
+        transaction.on_commit(analytics.bump_version)
+        summaries = _aggregate(grades)
+        existing.delete()
+        GradeSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+    return len(summaries)
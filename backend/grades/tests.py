@@ -1,4 +1,615 @@
 # backend/grades/tests.py
-from django.test import TestCase
+import io
+import statistics
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.synthetic import build_synthetic_school, delete_synthetic_school, synthetic_users
+from core.testing import SyntheticDataTestCase
+from users.user_cache import user_cache
+
+from . import analytics
+from .audit import buffer as audit_buffer
+from .bands import VERSION_KEY, band_table
+from .models import AchievementLevel, Grade, GradeCalculation, GradeSummary
+from .recalculation import recalculate_achievement_levels
+from .summaries import rebuild_summaries
+
+
+class RecalculationTestCase(SyntheticDataTestCase):
+    """
+    Pasiekimų lygių perskaičiavimo (grades.recalculation) testai
+    """
+
+    login_role = None
+
+    def setUp(self):
+        super().setUp()
+        self.levels = {level.code: level for level in AchievementLevel.objects.all()}
+
+    def _expected(self, percentage):
+        for level in self.levels.values():
+            if level.min_percentage <= percentage <= level.max_percentage:
+                return level.id
+        return None
+
+    def _corrupt(self):
+        # Dalis vertinimų be lygio, dalis - su neteisingu
+        pks = list(Grade.objects.order_by('pk').values_list('pk', flat=True))
+        Grade.objects.filter(pk__in=pks[::3]).update(achievement_level=None)
+        Grade.objects.filter(pk__in=pks[1::3], percentage__lt=85).update(achievement_level=self.levels['A'])
+        return Grade.objects.exclude(achievement_level_id=None).filter(pk__in=pks[1::3], percentage__lt=85).count()
+
+    def test_recalculates_with_one_update_per_batch(self):
+        wrong = self._corrupt()
+        missing = Grade.objects.filter(achievement_level=None, percentage__gte=40).count()
+        total = Grade.objects.count()
+
+        with CaptureQueriesContext(connection) as queries:
+            result = recalculate_achievement_levels(batch_size=7)
+
+        batches = -(-total // 7)
+        self.assertEqual(result, {'updated': wrong + missing, 'processed': total, 'batches': batches})
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), batches)
+        for grade in Grade.objects.all():
+            if self._expected(grade.percentage) is not None:
+                self.assertEqual(grade.achievement_level_id, self._expected(grade.percentage))
+
+        # Pakartotinai - nieko nekeičia
+        self.assertEqual(recalculate_achievement_levels(batch_size=7)['updated'], 0)
+
+    def test_uses_band_columns(self):
+        AchievementLevel.objects.filter(code='A').update(min_percentage=95)
+        AchievementLevel.objects.filter(code='P').update(max_percentage=94)
+        recalculate_achievement_levels()
+        for grade in Grade.objects.filter(percentage__range=(85, 94)):
+            self.assertEqual(grade.achievement_level_id, self.levels['P'].id)
+
+    @override_settings(GRADE_RECALCULATION={
+        'BATCH_SIZE': 50, 'BACKGROUND': False, 'LOCK_TTL': 60, 'STATUS_TTL': 60,
+    })
+    def test_endpoint_runs_job_and_reports_status(self):
+        self._corrupt()
+        mentor = synthetic_users().filter(default_role='mentor').first()
+        self.login(mentor)
+        self.assertEqual(self.client.post('/api/grades/grades/recalculate_all/').status_code, 403)
+
+        manager = synthetic_users().filter(default_role='manager').first()
+        self.login(manager)
+        response = self.client.post('/api/grades/grades/recalculate_all/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.json()['updated_count'], 0)
+
+        status = self.client.get('/api/grades/grades/recalculate_status/', {'job_id': response.json()['job_id']})
+        self.assertEqual(status.json()['status'], 'done')
+        self.assertEqual(status.json()['processed'], Grade.objects.count())
+        self.assertEqual(
+            self.client.get('/api/grades/grades/recalculate_status/', {'job_id': 'missing'}).status_code, 404
+        )
+
+
+class BandTableTestCase(TestCase):
+    """
+    Pasiekimų lygių intervalų lentelės (grades.bands) testai
+    """
+
+    def setUp(self):
+        cache.clear()
+        band_table.invalidate()
+        call_command('init_achievement_levels', stdout=io.StringIO())
+
+    def test_lookup_matches_bands_without_queries(self):
+        AchievementLevel.get_level_by_percentage(50)
+        with self.assertNumQueries(0):
+            levels = {percentage: AchievementLevel.get_level_by_percentage(percentage) for percentage in range(-5, 106)}
+        for percentage, level in levels.items():
+            expected = (
+                None if not 40 <= percentage <= 100 else
+                'S' if percentage <= 54 else 'B' if percentage <= 69 else 'P' if percentage <= 84 else 'A'
+            )
+            self.assertEqual(level.code if level else None, expected, percentage)
+        self.assertIsNone(AchievementLevel.get_level_by_percentage('abc'))
+        self.assertIsNone(AchievementLevel.get_level_by_percentage(None))
+
+    def test_admin_edit_takes_effect(self):
+        self.assertEqual(AchievementLevel.get_level_by_percentage(88).code, 'A')
+        level_a = AchievementLevel.objects.get(code='A')
+        level_a.min_percentage = 90
+        level_a.save()
+        level_p = AchievementLevel.objects.get(code='P')
+        level_p.max_percentage = 89
+        level_p.save()
+        self.assertEqual(AchievementLevel.get_level_by_percentage(88).code, 'P')
+
+        level_a.delete()
+        self.assertIsNone(AchievementLevel.get_level_by_percentage(95))
+
+    def test_shared_version_invalidates_other_workers(self):
+        self.assertEqual(AchievementLevel.get_level_by_percentage(45).code, 'S')
+        # Kitas worker'is pakeitė intervalus ir versiją (šio proceso signalai nevykdomi)
+        AchievementLevel.objects.filter(code='S').update(max_percentage=44)
+        AchievementLevel.objects.filter(code='B').update(min_percentage=45)
+        self.assertEqual(AchievementLevel.get_level_by_percentage(45).code, 'S')
+        cache.set(VERSION_KEY, 'other-worker', None)
+        loads = band_table.loads
+        self.assertEqual(AchievementLevel.get_level_by_percentage(45).code, 'B')
+        self.assertEqual(band_table.loads, loads + 1)
+
+
+class GradebookSubmitTestCase(SyntheticDataTestCase):
+    """
+    Vertinimų tinklelio pateikimo (grades.gradebook) testai
+    """
+
+    school = {'students': 30, 'mentors': 2, 'weeks': 2, 'class_size': 15}
+    login_role = 'mentor'
+
+    def _grid(self, count, percentage=75):
+        from plans.models import IMUPlan
+
+        plans = IMUPlan.objects.order_by('id')[:count]
+        return [
+            {'student': plan.student_id, 'lesson': plan.lesson_id, 'imu_plan': plan.id,
+             'percentage': percentage, 'notes': 'tinklelis'}
+            for plan in plans
+        ]
+
+    def _submit(self, grid, **extra):
+        return self.client.post(
+            '/api/grades/grades/gradebook/', {'grades': grid, **extra}, content_type='application/json'
+        )
+
+    def test_upserts_grid_in_constant_queries(self):
+        small, large = self._grid(5, percentage=60), self._grid(30)
+        self._submit(self._grid(5))
+        with CaptureQueriesContext(connection) as small_queries:
+            self._submit(small)
+        existing = Grade.objects.filter(imu_plan_id__in=[row['imu_plan'] for row in large]).count()
+        with CaptureQueriesContext(connection) as large_queries:
+            response = self._submit(large)
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(small_queries), len(large_queries))
+        data = response.json()
+        self.assertEqual(data['count'], 30)
+        self.assertEqual((data['created'], data['updated']), (30 - existing, existing))
+        self.assertEqual([cell['imu_plan'] for cell in data['grades']], [row['imu_plan'] for row in large])
+        self.assertTrue(all(cell['achievement_level_code'] == 'P' for cell in data['grades']))
+        for row in large:
+            grade = Grade.objects.get(imu_plan_id=row['imu_plan'])
+            self.assertEqual((grade.percentage, grade.mentor_id, grade.notes), (75, self.user.id, 'tinklelis'))
+
+    def test_rows_without_plan_are_updated_in_place(self):
+        row = dict(self._grid(1)[0], imu_plan=None)
+        self.assertEqual(self._submit([row]).json()['created'], 1)
+        response = self._submit([dict(row, percentage=90)])
+        self.assertEqual(response.json()['updated'], 1)
+        grades = Grade.objects.filter(student_id=row['student'], lesson_id=row['lesson'], imu_plan=None)
+        self.assertEqual([grade.percentage for grade in grades], [90])
+
+    def test_get_or_create_is_idempotent_upsert(self):
+        from django.db import IntegrityError, transaction
+
+        row = self._grid(1)[0]
+        payload = {'student': row['student'], 'lesson': row['lesson'], 'mentor': self.user.id, 'percentage': 55}
+        url = '/api/grades/grades/get_or_create/'
+        first = self.client.post(url, payload, content_type='application/json')
+        self.assertEqual(first.status_code, 201, first.content)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.post(url, dict(payload, percentage=92), content_type='application/json')
+        self.assertEqual(second.status_code, 200, second.content)
+        self.assertEqual(second.json()['id'], first.json()['id'])
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "grades_grade"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('UPDATE')])
+
+        grades = Grade.objects.filter(student_id=row['student'], lesson_id=row['lesson'], imu_plan=None)
+        self.assertEqual([(grade.percentage, grade.achievement_level.code) for grade in grades], [(92, 'A')])
+
+        planned = self.client.post(url, dict(payload, imu_plan=row['imu_plan']), content_type='application/json')
+        self.assertIn(planned.status_code, (200, 201))
+        self.assertEqual(self.client.post(url, dict(payload, percentage=5), content_type='application/json').status_code, 400)
+
+        # Dalinis unikalus indeksas: antras vertinimas be plano tam pačiam (mokinys, pamoka) neleidžiamas
+        grade = grades.get()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Grade.objects.bulk_create([Grade(
+                student_id=grade.student_id, lesson_id=grade.lesson_id, mentor_id=grade.mentor_id,
+                percentage=60, achievement_level=grade.achievement_level,
+            )])
+
+    def test_validates_whole_grid(self):
+        grid = self._grid(3)
+        grid[0]['percentage'] = 10
+        grid[1]['student'] = self.user.id
+        grid[2]['imu_plan'] = grid[0]['imu_plan']
+        response = self._submit(grid)
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['grades']
+        self.assertIn('percentage', errors[0])
+        self.assertIn('student', errors[1])
+        self.assertIn('imu_plan', errors[2])
+        self.assertFalse(Grade.objects.filter(notes='tinklelis').exists())
+
+    def test_requires_mentor_or_manager(self):
+        student = synthetic_users().filter(default_role='student').first()
+        self.login(student)
+        self.assertEqual(self._submit(self._grid(1)).status_code, 403)
+
+        manager = synthetic_users().filter(default_role='manager').first()
+        self.login(manager)
+        self.assertEqual(self._submit(self._grid(1)).status_code, 400)
+        response = self._submit(self._grid(1), mentor=self.user.id)
+        self.assertEqual(response.status_code, 200)
+
+
+class GradebookMatrixTestCase(TestCase):
+    """
+    Mokiniai x pamokos vertinimų tinklelio (GradeViewSet.gradebook_matrix) testai
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+
+    def _request(self, size):
+        from schedule.models import GlobalSchedule
+
+        delete_synthetic_school()
+        build_synthetic_school(**size)
+        manager = synthetic_users().filter(default_role='manager').first()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(manager))
+        slot = GlobalSchedule.objects.filter(imuplan__grade__isnull=False).order_by('date').first()
+        params = {
+            'subject': slot.subject_id, 'level': slot.level_id,
+            'date_from': (slot.date - timedelta(days=30)).isoformat(), 'date_to': slot.date.isoformat(),
+        }
+        self.client.get('/api/grades/grades/gradebook/matrix/', params)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/grades/grades/gradebook/matrix/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(queries), slot
+
+    def test_matrix_matches_grades_in_constant_queries(self):
+        from plans.models import IMUPlan
+
+        _, small_queries, _ = self._request({'students': 10, 'mentors': 2, 'weeks': 2, 'class_size': 5})
+        data, large_queries, slot = self._request({'students': 40, 'mentors': 4, 'weeks': 4, 'class_size': 15})
+        self.assertEqual(small_queries, large_queries)
+
+        plans = IMUPlan.objects.filter(
+            global_schedule__subject=slot.subject_id, global_schedule__level=slot.level_id,
+            global_schedule__date__lte=slot.date,
+        )
+        self.assertEqual({row['id'] for row in data['students']}, set(plans.values_list('student_id', flat=True)))
+        self.assertEqual({column['id'] for column in data['lessons']}, set(plans.values_list('lesson_id', flat=True)))
+        self.assertEqual(len(data['cells']), len(data['students']))
+
+        grades = Grade.objects.filter(imu_plan__in=plans).select_related('achievement_level')
+        self.assertTrue(grades.exists())
+        columns = [column['id'] for column in data['lessons']]
+        rows = [row['id'] for row in data['students']]
+        for grade in grades:
+            cell = data['cells'][rows.index(grade.student_id)][columns.index(grade.lesson_id)]
+            self.assertIsNotNone(cell)
+        for row, stats in zip(rows, data['student_stats']):
+            student_grades = [grade.percentage for grade in grades if grade.student_id == row]
+            self.assertEqual(stats['count'], len(student_grades))
+            if student_grades:
+                self.assertAlmostEqual(stats['average'], sum(student_grades) / len(student_grades), places=2)
+        self.assertEqual(sum(stats['count'] for stats in data['lesson_stats']), grades.count())
+
+    def test_requires_filters(self):
+        build_synthetic_school(students=5, mentors=1, weeks=1, class_size=5)
+        manager = synthetic_users().filter(default_role='manager').first()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(manager))
+        self.assertEqual(self.client.get('/api/grades/grades/gradebook/matrix/').status_code, 400)
+        self.assertEqual(
+            self.client.get('/api/grades/grades/gradebook/matrix/', {'global_schedule': 'x'}).status_code, 400
+        )
+
+
+class GradeSummaryTestCase(SyntheticDataTestCase):
+    """
+    Palaikomų mokinių vertinimų suvestinių (grades.summaries) testai
+    """
+
+    def _expected(self):
+        expected = {}
+        for grade in Grade.objects.select_related('lesson', 'achievement_level'):
+            entry = expected.setdefault((grade.student_id, grade.lesson.subject_id), {'count': 0, 'total': 0, 'levels': {}})
+            entry['count'] += 1
+            entry['total'] += grade.percentage
+            if grade.achievement_level:
+                code = grade.achievement_level.code
+                entry['levels'][code] = entry['levels'].get(code, 0) + 1
+        return expected
+
+    def _assert_consistent(self):
+        expected = self._expected()
+        summaries = {(summary.student_id, summary.subject_id): summary for summary in GradeSummary.objects.all()}
+        self.assertEqual(set(summaries), set(expected))
+        for key, entry in expected.items():
+            summary = summaries[key]
+            self.assertEqual((summary.grade_count, summary.percentage_total), (entry['count'], entry['total']))
+            self.assertEqual(summary.level_counts, entry['levels'])
+            self.assertAlmostEqual(summary.average_percentage, entry['total'] / entry['count'], places=2)
+
+    def test_maintained_on_create_update_delete(self):
+        from plans.models import IMUPlan
+
+        self._assert_consistent()
+        plan = IMUPlan.objects.filter(grade__isnull=True).select_related('global_schedule').first()
+        grade = Grade.objects.create(
+            student_id=plan.student_id, lesson_id=plan.lesson_id, imu_plan=plan,
+            mentor_id=plan.global_schedule.user_id, percentage=55,
+        )
+        self._assert_consistent()
+
+        grade.percentage, grade.achievement_level = 95, None
+        grade.save()
+        self._assert_consistent()
+
+        # Perkeltas į kitą pamoką - atnaujinamos abi suvestinės
+        from curriculum.models import Lesson
+        other = Lesson.objects.exclude(subject_id=grade.lesson.subject_id).first()
+        grade = Grade.objects.get(pk=grade.pk)
+        grade.lesson, grade.imu_plan = other, None
+        grade.save()
+        self._assert_consistent()
+
+        Grade.objects.filter(student_id=grade.student_id).delete()
+        self._assert_consistent()
+        self.assertFalse(GradeSummary.objects.filter(student_id=grade.student_id).exists())
+
+    def test_maintained_by_gradebook_and_rebuild(self):
+        from plans.models import IMUPlan
+
+        mentor = synthetic_users().filter(default_role='mentor').first()
+        grid = [
+            {'student': plan.student_id, 'lesson': plan.lesson_id, 'imu_plan': plan.id, 'percentage': 88}
+            for plan in IMUPlan.objects.order_by('id')[:10]
+        ]
+        response = self.client.post(
+            '/api/grades/grades/gradebook/', {'grades': grid, 'mentor': mentor.id}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self._assert_consistent()
+
+        GradeSummary.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_grade_summaries', stdout=out)
+        self._assert_consistent()
+
+        GradeSummary.objects.update(grade_count=0)
+        student_id = grid[0]['student']
+        self.assertGreater(rebuild_summaries(student_ids=[student_id]), 0)
+        self.assertTrue(GradeSummary.objects.filter(student_id=student_id).exclude(grade_count=0).exists())
+        self.assertFalse(GradeSummary.objects.exclude(student_id=student_id).exclude(grade_count=0).exists())
+
+    def test_student_summary_reads_summary_rows(self):
+        student_id = Grade.objects.values_list('student_id', flat=True).first()
+        grades = Grade.objects.filter(student_id=student_id)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/grades/grades/student_summary/', {'student_id': student_id})
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(data['total_grades'], grades.count())
+        self.assertAlmostEqual(
+            data['average_percentage'], sum(grade.percentage for grade in grades) / grades.count(), places=2
+        )
+        self.assertEqual(sum(data['achievement_levels'].values()), grades.exclude(achievement_level=None).count())
+        self.assertEqual(sum(subject['grade_count'] for subject in data['subjects']), grades.count())
+        self.assertEqual(len(data['recent_grades']), min(5, grades.count()))
+        summary_queries = [query for query in queries.captured_queries if 'grades_gradesummary' in query['sql']]
+        self.assertEqual(len(summary_queries), 1)
+
+        student = synthetic_users().filter(default_role='student').exclude(grades_received__isnull=False).first()
+        if student is not None:
+            response = self.client.get('/api/grades/grades/student_summary/', {'student_id': student.id})
+            self.assertEqual(response.status_code, 404)
+
+
+AUDIT = {
+    'ENABLED': True, 'SAMPLE_RATE': 1.0, 'BATCH_SIZE': 50, 'FLUSH_INTERVAL': 3600,
+    'MAX_PENDING': 100, 'BACKGROUND': False,
+}
+
+
+@override_settings(GRADE_CALCULATION_AUDIT=AUDIT)
+@skipUnlessDBFeature('has_select_for_update')
+class GradeSummaryConcurrencyTestCase(TransactionTestCase):
+    """
+    Du lygiagretūs to paties (mokinys, dalykas) vertinimų rašytojai: suvestinė apima abu vertinimus
+    (eilučių užraktai - tik DB su SELECT ... FOR UPDATE, pvz. PostgreSQL)
+    """
+
+    def test_interleaved_writers_keep_both_grades(self):
+        from curriculum.models import Lesson
+
+        build_synthetic_school(students=2, mentors=1, weeks=1, class_size=2)
+        student = synthetic_users().filter(default_role='student').first()
+        mentor = synthetic_users().filter(default_role='mentor').first()
+        subject_id = Lesson.objects.values_list('subject_id', flat=True).first()
+        first, second = Lesson.objects.filter(subject_id=subject_id).order_by('id')[:2]
+        before = Grade.objects.filter(student=student, lesson__subject_id=subject_id).count()
+        started, errors = threading.Event(), []
+
+        def second_writer():
+            try:
+                started.set()
+                Grade.objects.create(student=student, lesson=second, mentor=mentor, percentage=60)
+            except Exception as e:  # pragma: no cover - rodomas testo klaidoje
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            Grade.objects.create(student=student, lesson=first, mentor=mentor, percentage=90)
+            thread = threading.Thread(target=second_writer)
+            thread.start()
+            started.wait()
+            # Antrasis rašytojas įterpia vertinimą ir laukia suvestinės užrakto, kol ši transakcija atvira
+            time.sleep(0.5)
+        thread.join()
+
+        self.assertEqual(errors, [])
+        summary = GradeSummary.objects.get(student=student, subject_id=subject_id)
+        self.assertEqual(summary.grade_count, before + 2)
+        grades = Grade.objects.filter(student=student, lesson__subject_id=subject_id)
+        self.assertEqual(summary.percentage_total, sum(grades.values_list('percentage', flat=True)))
+
+
+class CalculationAuditTestCase(SyntheticDataTestCase):
+    """
+    Skaičiuoklės GradeCalculation įrašų buferio (grades.audit) testai
+    """
+
+    school = {'students': 2, 'mentors': 1, 'weeks': 1, 'class_size': 2}
+    login_role = 'mentor'
+
+    def setUp(self):
+        super().setUp()
+        audit_buffer.clear()
+
+    def tearDown(self):
+        audit_buffer.clear()
+
+    def _calculate(self, percentage):
+        return self.client.post(
+            '/api/grades/grades/calculate_level/', {'percentage': percentage}, content_type='application/json'
+        )
+
+    def test_calculator_does_not_write(self):
+        self._calculate(70)
+        with CaptureQueriesContext(connection) as queries:
+            response = self._calculate(90)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['calculated_level']['code'], 'A')
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('INSERT')])
+        self.assertFalse(GradeCalculation.objects.exists())
+        self.assertEqual(audit_buffer.pending(), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(audit_buffer.flush(), 2)
+        self.assertEqual(len(queries), 1)
+        calculations = list(GradeCalculation.objects.order_by('calculation_date'))
+        self.assertEqual([calculation.percentage for calculation in calculations], [70, 90])
+        self.assertEqual(calculations[1].calculated_level.code, 'A')
+        self.assertEqual(audit_buffer.pending(), 0)
+
+    def test_size_threshold_flushes_batch(self):
+        with override_settings(GRADE_CALCULATION_AUDIT=dict(AUDIT, BATCH_SIZE=3)):
+            for percentage in (50, 60):
+                self._calculate(percentage)
+            self.assertFalse(GradeCalculation.objects.exists())
+            self._calculate(70)
+        self.assertEqual(GradeCalculation.objects.count(), 3)
+        self.assertEqual(audit_buffer.pending(), 0)
+
+    def test_sampling_disabling_and_bound(self):
+        with override_settings(GRADE_CALCULATION_AUDIT=dict(AUDIT, SAMPLE_RATE=0.0)):
+            self.assertEqual(self._calculate(70).status_code, 200)
+        with override_settings(GRADE_CALCULATION_AUDIT=dict(AUDIT, ENABLED=False)):
+            self.assertEqual(self._calculate(70).status_code, 200)
+        self.assertEqual(audit_buffer.pending(), 0)
+
+        with override_settings(GRADE_CALCULATION_AUDIT=dict(AUDIT, MAX_PENDING=2)):
+            for _ in range(4):
+                self._calculate(80)
+        self.assertEqual((audit_buffer.pending(), audit_buffer.dropped), (2, 2))
+
+
+class CohortAnalyticsTestCase(SyntheticDataTestCase):
+    """
+    Kohortų vertinimų analitikos (grades.analytics, GradeViewSet.analytics) testai
+    """
+
+    school = {'students': 20, 'mentors': 3, 'weeks': 4, 'class_size': 10}
+
+    def _get(self, **params):
+        return self.client.get('/api/grades/grades/analytics/', params)
+
+    def test_matches_direct_computation(self):
+        response = self._get(window=3, risk_threshold=70)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        grades = list(Grade.objects.select_related('lesson').order_by('student_id', 'created_at', 'pk'))
+        values = [grade.percentage for grade in grades]
+        self.assertEqual(data['count'], len(values))
+        self.assertAlmostEqual(data['summary']['mean'], sum(values) / len(values), places=2)
+        self.assertEqual(sum(data['histogram']['counts']), len(values))
+        self.assertEqual(sum(data['levels'].values()), len(values))
+        self.assertAlmostEqual(data['summary']['quantiles']['p50'], statistics.median(values), places=2)
+
+        by_subject = {}
+        for grade in grades:
+            by_subject.setdefault(grade.lesson.subject_id, []).append(grade.percentage)
+        self.assertEqual({group['id']: group['count'] for group in data['groups']},
+                         {key: len(items) for key, items in by_subject.items()})
+        for group in data['groups']:
+            items = by_subject[group['id']]
+            self.assertAlmostEqual(group['mean'], sum(items) / len(items), places=2)
+
+        by_student = {}
+        for grade in grades:
+            by_student.setdefault(grade.student_id, []).append(grade.percentage)
+        rolling = {pk: sum(items[-3:]) / len(items[-3:]) for pk, items in by_student.items()}
+        at_risk = {pk for pk, value in rolling.items() if value < 70}
+        self.assertEqual(data['students'], len(by_student))
+        self.assertEqual(data['at_risk_count'], len(at_risk))
+        self.assertEqual({row['student_id'] for row in data['at_risk']}, at_risk)
+        for row in data['at_risk']:
+            self.assertAlmostEqual(row['rolling_mean'], rolling[row['student_id']], places=2)
+
+    def test_cached_until_grades_change(self):
+        from plans.models import IMUPlan
+
+        first = self._get(group_by='mentor').json()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._get(group_by='mentor').json(), first)
+        self.assertFalse([query for query in queries.captured_queries if 'grades_grade' in query['sql']])
+
+        plan = IMUPlan.objects.filter(grade__isnull=True).select_related('global_schedule').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(
+                student_id=plan.student_id, lesson_id=plan.lesson_id, imu_plan=plan,
+                mentor_id=plan.global_schedule.user_id, percentage=41,
+            )
+        self.assertEqual(self._get(group_by='mentor').json()['count'], first['count'] + 1)
+
+    def test_cached_levels_follow_band_changes(self):
+        first = self._get().json()
+        level = AchievementLevel.objects.get(code='A')
+        level.min_percentage = 95
+        with self.captureOnCommitCallbacks(execute=True):
+            level.save()
+        levels = self._get().json()['levels']
+        self.assertNotEqual(levels, first['levels'])
+        self.assertEqual(levels['A'], Grade.objects.filter(percentage__gte=95).count())
+
+    def test_roles_and_validation(self):
+        from crm.models import StudentCurator
+
+        self.login(synthetic_users().filter(default_role='mentor').first())
+        self.assertEqual(self._get().status_code, 403)
+
+        curator = synthetic_users().filter(default_role='curator').first()
+        self.login(curator)
+        curated = StudentCurator.objects.filter(curator=curator).values('student_id')
+        self.assertEqual(self._get().json()['count'], Grade.objects.filter(student__in=curated).count())
+
+        self.login(self.user)
+        self.assertEqual(self._get(group_by='lesson').status_code, 400)
+        self.assertEqual(self._get(date_from='2025-13-01').status_code, 400)
+        self.assertEqual(self._get(subject=0).json()['summary'], None)
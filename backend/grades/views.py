@@ -3,19 +3,37 @@
 # Grades aplikacijos views - API endpoint'ų valdymas
 # CHANGE: Sukurtas naujas views.py failas su AchievementLevel ir Grade views
 
-from rest_framework import viewsets, status, permissions
+from rest_framework import serializers, viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Avg, Count, Q
 from django.shortcuts import get_object_or_404
-from .models import AchievementLevel, Grade, GradeCalculation
+from django.utils import timezone
+from crm.scope import get_role_scope
+from . import analytics
+from .audit import buffer as audit_buffer
+from .gradebook import grade_matrix, save_grid
+from .models import AchievementLevel, Grade, GradeCalculation, GradeSummary
+from .recalculation import job_status, start_recalculation
 from .serializers import (
     AchievementLevelSerializer, GradeSerializer, GradeListSerializer,
     GradeCalculationSerializer, StudentGradeSummarySerializer,
-    LessonGradeSummarySerializer
+    LessonGradeSummarySerializer, GradebookRowSerializer, GradebookSubmitSerializer, GradebookCellSerializer
 )
 
 
+def _achievement_level_counts(grades):
+    """Vertinimų skaičius pagal pasiekimų lygio kodą viena GROUP BY užklausa"""
+    return dict(
+        grades.filter(achievement_level__isnull=False)
+        .values_list('achievement_level__code')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
 class AchievementLevelViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Pasiekimų lygių viewset - tik skaitymas
@@ -74,33 +92,19 @@ class GradeViewSet(viewsets.ModelViewSet):
         Filtruojame vertinimus pagal parametrus ir dabartinę rolę
         CHANGE: Pridėtas filtravimas ir X-Current-Role header palaikymas
         """
-        # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header dabartinės rolės nustatymui
-        current_role = getattr(self.request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(self.request.user, 'default_role', None)
-        
+        # SEC-011: rolė validuojama server-side, matomi studentai - vienas scope per užklausą
+        scope = get_role_scope(self.request)
+        current_role = scope.role
+
         queryset = super().get_queryset()
-        
-        # Role-based filtravimas
-        if current_role == 'student':
-            # Studentas mato tik savo vertinimus
-            queryset = queryset.filter(student=self.request.user)
-        elif current_role == 'parent':
-            # Tėvas mato savo vaikų vertinimus
-            from crm.models import StudentParent
-            children = StudentParent.objects.filter(parent=self.request.user).values_list('student', flat=True)
-            queryset = queryset.filter(student__in=children)
-        elif current_role == 'mentor':
+
+        # Role-based filtravimas (subquery'iai vietoj materializuotų id sąrašų)
+        if current_role == 'mentor':
             # Mentorius mato tik savo sukurtų vertinimus
             queryset = queryset.filter(mentor=self.request.user)
-        elif current_role == 'curator':
-            # Kuratorius mato savo kuruojamų studentų vertinimus
-            from crm.models import StudentCurator
-            curated_students = StudentCurator.objects.filter(curator=self.request.user).values_list('student', flat=True)
-            queryset = queryset.filter(student__in=curated_students)
-        elif current_role != 'manager':
-            # Jei ne manager ir ne kita žinoma rolė, grąžinti tuščią queryset
-            queryset = queryset.none()
+        else:
+            # Studentas - savo, tėvas - vaikų, kuratorius - kuruojamų studentų, manager - visi
+            queryset = scope.filter_students(queryset)
         
         # Filtravimas pagal mokinį
         student_id = self.request.query_params.get('student')
@@ -161,10 +165,12 @@ class GradeViewSet(viewsets.ModelViewSet):
             level = AchievementLevel.get_level_by_percentage(percentage)
             
             if level:
-                # Įrašome skaičiavimą istorijoje
-                calculation = GradeCalculation.objects.create(
+                # Skaičiavimas istorijoje įrašomas vėliau (grades.audit) - užklausa DB nerašo
+                audit_buffer.record(percentage, level)
+                calculation = GradeCalculation(
                     percentage=percentage,
-                    calculated_level=level
+                    calculated_level=level,
+                    calculation_date=timezone.now()
                 )
                 
                 serializer = GradeCalculationSerializer(calculation)
@@ -195,35 +201,38 @@ class GradeViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            student_grades = Grade.objects.filter(student_id=student_id)
+            # Palaikomos suvestinės pagal dalykus (grades.summaries) - viena indeksuota užklausa
+            summaries = list(
+                GradeSummary.objects.filter(student_id=student_id)
+                .select_related('student', 'subject')
+                .order_by('subject__name')
+            )
             
-            if not student_grades.exists():
+            if not summaries:
                 return Response(
                     {'error': 'Mokinys neturi vertinimų'}, 
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Skaičiuojame statistiką
-            total_grades = student_grades.count()
-            average_percentage = student_grades.aggregate(avg=Avg('percentage'))['avg'] or 0
-            
-            # Grupuojame pagal pasiekimų lygius
+            total_grades = sum(summary.grade_count for summary in summaries)
+            percentage_total = sum(summary.percentage_total for summary in summaries)
             achievement_levels = {}
-            for grade in student_grades:
-                level_code = grade.achievement_level.code
-                if level_code not in achievement_levels:
-                    achievement_levels[level_code] = 0
-                achievement_levels[level_code] += 1
+            for summary in summaries:
+                for code, count in summary.level_counts.items():
+                    achievement_levels[code] = achievement_levels.get(code, 0) + count
             
-            # Paskutiniai vertinimai
-            recent_grades = student_grades.order_by('-created_at')[:5]
+            # Paskutiniai vertinimai (indeksas student, -created_at)
+            recent_grades = Grade.objects.filter(student_id=student_id).select_related(
+                'student', 'lesson', 'achievement_level'
+            ).order_by('-created_at')[:5]
             
             summary_data = {
                 'student_id': int(student_id),
-                'student_name': student_grades.first().student.get_full_name(),
+                'student_name': summaries[0].student.get_full_name(),
                 'total_grades': total_grades,
-                'average_percentage': round(average_percentage, 2),
+                'average_percentage': round(percentage_total / total_grades, 2),
                 'achievement_levels': achievement_levels,
+                'subjects': summaries,
                 'recent_grades': GradeListSerializer(recent_grades, many=True).data
             }
             
@@ -250,7 +259,9 @@ class GradeViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            lesson_grades = Grade.objects.filter(lesson_id=lesson_id)
+            lesson_grades = Grade.objects.filter(lesson_id=lesson_id).select_related(
+                'student', 'lesson', 'achievement_level'
+            )
             
             if not lesson_grades.exists():
                 return Response(
@@ -263,13 +274,8 @@ class GradeViewSet(viewsets.ModelViewSet):
             graded_students = lesson_grades.count()
             average_percentage = lesson_grades.aggregate(avg=Avg('percentage'))['avg'] or 0
             
-            # Grupuojame pagal pasiekimų lygius
-            achievement_levels = {}
-            for grade in lesson_grades:
-                level_code = grade.achievement_level.code
-                if level_code not in achievement_levels:
-                    achievement_levels[level_code] = 0
-                achievement_levels[level_code] += 1
+            # Grupuojame pagal pasiekimų lygius (GROUP BY vietoj užklausos kiekvienam vertinimui)
+            achievement_levels = _achievement_level_counts(lesson_grades)
             
             summary_data = {
                 'lesson_id': int(lesson_id),
@@ -296,28 +302,194 @@ class GradeViewSet(viewsets.ModelViewSet):
         Perskaičiuoja visus vertinimus su naujais pasiekimų lygiais
         POST /api/grades/grades/recalculate_all/
         CHANGE: Masinis perskaičiavimas
+        CHANGE: Vienas UPDATE partijai (grades.recalculation) foniniame thread'e - grąžinamas darbo id (202),
+        būsena - GET recalculate_status/?job_id=. Tik manager rolei.
         """
-        try:
-            updated_count = 0
-            grades = Grade.objects.all()
-            
-            for grade in grades:
-                new_level = AchievementLevel.get_level_by_percentage(grade.percentage)
-                if new_level and new_level != grade.achievement_level:
-                    grade.achievement_level = new_level
-                    grade.save(update_fields=['achievement_level'])
-                    updated_count += 1
-            
+        if not get_role_scope(request).is_manager:
+            return Response(
+                {'error': 'Tik vadybininkas gali perskaičiuoti visus vertinimus'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        job_id, job = start_recalculation()
+        if job and job.get('status') == 'done':
             return Response({
-                'message': f'Sėkmingai atnaujinta {updated_count} vertinimų',
-                'updated_count': updated_count
+                'message': f'Sėkmingai atnaujinta {job["updated"]} vertinimų',
+                'updated_count': job['updated'],
+                'job_id': job_id,
+                'status': job['status'],
             })
-            
-        except Exception as e:
+        if job and job.get('status') == 'failed':
             return Response(
-                {'error': f'Klaida perskaičiuojant: {str(e)}'}, 
+                {'error': f'Klaida perskaičiuojant: {job["error"]}', 'job_id': job_id},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        return Response({
+            'message': 'Perskaičiavimas vykdomas fone',
+            'job_id': job_id,
+            'status': job['status'] if job else 'running',
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'])
+    def recalculate_status(self, request):
+        """
+        Foninio perskaičiavimo būsena
+        GET /api/grades/grades/recalculate_status/?job_id=...
+        """
+        if not get_role_scope(request).is_manager:
+            return Response(
+                {'error': 'Tik vadybininkas gali matyti perskaičiavimo būseną'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        job = job_status(request.query_params.get('job_id', ''))
+        if job is None:
+            return Response({'error': 'Darbas nerastas'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
+
+    @action(detail=False, methods=['post'], url_path='gradebook')
+    def gradebook_submit(self, request):
+        """
+        Išsaugo visos klasės vertinimų tinklelį viena užklausa
+        POST /api/grades/grades/gradebook/
+        {"mentor": id (tik manager), "grades": [{"student", "lesson", "imu_plan", "percentage", "notes"}, ...]}
+        Validacija ir išsaugojimas - fiksuotas SQL užklausų skaičius (grades.gradebook)
+        """
+        current_role = get_role_scope(request).role
+        if current_role not in ('mentor', 'manager'):
+            return Response(
+                {'error': 'Vertinimus gali pateikti tik mentorius arba vadybininkas'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = GradebookSubmitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if current_role == 'mentor':
+            mentor_id = request.user.id
+        else:
+            mentor_id = serializer.validated_data.get('mentor')
+            if mentor_id is None:
+                return Response({'mentor': ['Nurodykite mentorių']}, status=status.HTTP_400_BAD_REQUEST)
+
+        grades, created = save_grid(serializer.validated_data['grades'], mentor_id)
+        return Response({
+            'count': len(grades),
+            'created': created,
+            'updated': len(grades) - created,
+            'grades': GradebookCellSerializer(grades, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'], url_path='gradebook/matrix')
+    def gradebook_matrix(self, request):
+        """
+        Mokiniai x pamokos vertinimų tinklelis su eilučių ir stulpelių suvestinėmis
+        GET /api/grades/grades/gradebook/matrix/?subject=1&level=2&date_from=2025-09-01&date_to=2025-09-30
+        GET /api/grades/grades/gradebook/matrix/?global_schedule=10,11,12
+        Fiksuotas SQL užklausų skaičius nepriklausomai nuo mokinių ir pamokų kiekio (grades.gradebook)
+        """
+        from datetime import datetime
+        from plans.models import IMUPlan
+
+        params = request.query_params
+        plans = IMUPlan.objects.all()
+        if params.get('global_schedule'):
+            try:
+                slot_ids = [int(value) for value in params['global_schedule'].split(',') if value.strip()]
+            except ValueError:
+                return Response({'error': 'Netinkami global_schedule id'}, status=status.HTTP_400_BAD_REQUEST)
+            plans = plans.filter(global_schedule_id__in=slot_ids)
+        else:
+            if not all(params.get(name) for name in ('subject', 'date_from', 'date_to')):
+                return Response(
+                    {'error': 'Nurodykite subject, date_from ir date_to arba global_schedule'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                date_from = datetime.strptime(params['date_from'], '%Y-%m-%d').date()
+                date_to = datetime.strptime(params['date_to'], '%Y-%m-%d').date()
+                plans = plans.filter(
+                    global_schedule__subject_id=int(params['subject']),
+                    global_schedule__date__range=[date_from, date_to],
+                )
+                if params.get('level'):
+                    plans = plans.filter(global_schedule__level_id=int(params['level']))
+            except ValueError:
+                return Response(
+                    {'error': 'Netinkami parametrai. Datos formatas YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # Eilutės - kaip IMUPlanViewSet (mentorius - savo dalykai, kiti - matomi studentai),
+        # vertinimai - kaip get_queryset (mentorius mato tik savo duotus)
+        scope = get_role_scope(request)
+        grades = Grade.objects.all()
+        if scope.role == 'mentor':
+            plans = plans.filter(global_schedule__subject__in=scope.mentor_subject_ids)
+            grades = grades.filter(mentor=request.user)
+        else:
+            plans = scope.filter_students(plans)
+
+        grades = grades.filter(imu_plan__in=plans.values('pk'))
+        return Response(grade_matrix(plans, grades))
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Kohortos vertinimų analitika: histograma, kvantiliai, pasiekimų lygiai, grupių palyginimas
+        ir mokiniai rizikoje (slenkantis paskutinių vertinimų vidurkis + tendencija)
+        GET /api/grades/grades/analytics/?subject=1&level=2&mentor=5&date_from=2025-09-01&date_to=2026-06-30
+            &group_by=subject|mentor&window=5&risk_threshold=50
+        Tik manager (visi) ir curator (kuruojami mokiniai) rolėms; atsakymas talpykloje (grades.analytics)
+        """
+        from datetime import datetime
+
+        scope = get_role_scope(request)
+        if scope.role not in ('manager', 'curator'):
+            return Response(
+                {'error': 'Analitika prieinama tik vadybininkams ir kuratoriams'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        params = request.query_params
+        group_by = params.get('group_by', 'subject')
+        if group_by not in analytics.GROUP_FIELDS:
+            return Response(
+                {'error': f"group_by: {', '.join(analytics.GROUP_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        grades = scope.filter_students(Grade.objects.all())
+        try:
+            if params.get('subject'):
+                grades = grades.filter(lesson__subject_id=int(params['subject']))
+            if params.get('level'):
+                grades = grades.filter(lesson__levels=int(params['level']))
+            if params.get('mentor'):
+                grades = grades.filter(mentor_id=int(params['mentor']))
+            if params.get('date_from'):
+                grades = grades.filter(created_at__date__gte=datetime.strptime(params['date_from'], '%Y-%m-%d').date())
+            if params.get('date_to'):
+                grades = grades.filter(created_at__date__lte=datetime.strptime(params['date_to'], '%Y-%m-%d').date())
+            window = int(params['window']) if params.get('window') else None
+            risk_threshold = float(params['risk_threshold']) if params.get('risk_threshold') else None
+        except ValueError:
+            return Response(
+                {'error': 'Netinkami parametrai. Datos formatas YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if window is not None and window < 1:
+            return Response({'error': 'window turi būti teigiamas'}, status=status.HTTP_400_BAD_REQUEST)
+
+        scope_key = 'all' if scope.is_manager else f'curator:{request.user.pk}'
+        key = analytics.cache_key(scope_key, {
+            name: params.get(name) for name in (
+                'subject', 'level', 'mentor', 'date_from', 'date_to', 'window', 'risk_threshold'
+            )
+        } | {'group_by': group_by})
+        data = cache.get(key) if key else None
+        if data is None:
+            data = analytics.cohort_analytics(grades, group_by, window, risk_threshold)
+            if key:
+                cache.set(key, data, settings.GRADE_ANALYTICS['CACHE_TTL'])
+        return Response(data)
 
     @action(detail=False, methods=['post'])
     def get_or_create(self, request):
@@ -325,71 +497,35 @@ class GradeViewSet(viewsets.ModelViewSet):
         Gauna esamą vertinimą arba sukuria naują
         POST /api/grades/grades/get_or_create/
         CHANGE: Pridėtas get_or_create funkcionalumas esamų įrašų atnaujinimui
+        CHANGE: Vienas INSERT ... ON CONFLICT DO UPDATE (grades.gradebook) vietoj paieškos ir save() -
+        lygiagretūs / pakartoti pateikimai nekuria dublikatų. 201 - sukurta, 200 - atnaujinta.
         """
-        try:
-            student_id = request.data.get('student')
-            lesson_id = request.data.get('lesson')
-            mentor_id = request.data.get('mentor')
-            percentage = request.data.get('percentage')
-            imu_plan_id = request.data.get('imu_plan')
-            notes = request.data.get('notes', '')
-            
-            if not all([student_id, lesson_id, mentor_id, percentage]):
-                return Response(
-                    {'error': 'Trūksta privalomų laukų: student, lesson, mentor, percentage'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # CHANGE: Ieškome esamą įrašą su tais pačiais parametrais
-            existing_grade = None
-            if imu_plan_id:
-                # CHANGE: Jei yra IMU plan, ieškome pagal jį
-                existing_grade = Grade.objects.filter(
-                    student_id=student_id,
-                    lesson_id=lesson_id,
-                    imu_plan_id=imu_plan_id
-                ).first()
-            else:
-                # CHANGE: Jei nėra IMU plan, ieškome pagal student ir lesson
-                existing_grade = Grade.objects.filter(
-                    student_id=student_id,
-                    lesson_id=lesson_id,
-                    imu_plan__isnull=True
-                ).first()
-            
-            if existing_grade:
-                # CHANGE: Atnaujiname esamą įrašą
-
-                existing_grade.percentage = percentage
-                existing_grade.mentor_id = mentor_id
-                existing_grade.notes = notes
-                existing_grade.save()
-                
-                serializer = self.get_serializer(existing_grade)
+        mentor_id = request.data.get('mentor')
+        if not all(request.data.get(name) for name in ('student', 'lesson', 'percentage')) or not mentor_id:
+            return Response(
+                {'error': 'Trūksta privalomų laukų: student, lesson, mentor, percentage'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            else:
-                # CHANGE: Kuriamas naujas įrašas
+        row = GradebookRowSerializer(data={
+            name: request.data.get(name) for name in ('student', 'lesson', 'imu_plan', 'percentage', 'notes')
+            if request.data.get(name) not in (None, '')
+        })
+        row.is_valid(raise_exception=True)
+        try:
+            mentor_id = int(mentor_id)
+        except (TypeError, ValueError):
+            return Response({'mentor': ['Netinkamas mentoriaus ID']}, status=status.HTTP_400_BAD_REQUEST)
 
-                grade_data = {
-                    'student': student_id,      # CHANGE: student_id -> student
-                    'lesson': lesson_id,        # CHANGE: lesson_id -> lesson
-                    'mentor': mentor_id,        # CHANGE: mentor_id -> mentor
-                    'percentage': percentage,
-                    'imu_plan': imu_plan_id,    # CHANGE: imu_plan_id -> imu_plan
-                    'notes': notes
-                }
-                
-                serializer = self.get_serializer(data=grade_data)
-                if serializer.is_valid():
-                    grade = serializer.save()
-                    return Response(serializer.data, status=status.HTTP_201_CREATED)
-                else:
-                    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-                    
-        except Exception as e:
-    
+        try:
+            (grade,), created = save_grid([row.validated_data], mentor_id)
+        except serializers.ValidationError as e:
+            # Vienos eilutės klaidos - kaip serializer.errors
+            detail = e.detail
             return Response(
-                {'error': f'Klaida: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                detail['grades'][0] if 'grades' in detail else detail,
+                status=status.HTTP_400_BAD_REQUEST
             )
+
+        serializer = self.get_serializer(grade)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -41,4 +41,24 @@ tmp_upload_dir = None
 # certfile = "/path/to/certfile"
 
 # Worker process management
-worker_tmp_dir = "/dev/shm"
\ No newline at end of file
+worker_tmp_dir = "/dev/shm"
+
+
+# Request metrics (core.metrics) and slow SQL (core.slow_queries): per-process files in a shared directory
+# GradeCalculation audit rows (grades.audit) queued in worker memory are written on worker exit
+def on_starting(server):
+    from core.metrics import reset_metrics_dir
+    reset_metrics_dir()
+
+
+def worker_exit(server, worker):
+    from core import metrics, slow_queries
+    from grades import audit
+    metrics.store.flush()
+    slow_queries.store.flush()
+    audit.buffer.flush()
+
+
+def child_exit(server, worker):
+    from core.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -1,6 +1,7 @@
 # backend/plans/serializers.py
 import logging
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsetMixin
 from .models import LessonSequence, LessonSequenceItem, IMUPlan
 from curriculum.models import Subject, Level
 from schedule.models import GlobalSchedule
@@ -37,15 +38,12 @@ class LessonSequenceSerializer(serializers.ModelSerializer):
     def get_items(self, obj):
         """Grąžina sekos elementus su pamokų informacija"""
         try:
-            logger.info(f"Getting items for LessonSequence {obj.id}")
-            items = obj.items.all().select_related('lesson__subject')
-            logger.info(f"Found {items.count()} items for LessonSequence {obj.id}")
+            # Naudojamas viewset'o prefetch_related('items__lesson__subject') - be užklausos kiekvienai sekai
+            items = obj.items.all()
             
             result = []
             
             for item in items:
-                logger.debug(f"Processing item {item.id}: lesson={item.lesson}, is_deleted={getattr(item.lesson, 'is_deleted', 'N/A') if item.lesson else 'No lesson'}")
-                
                 # Patikriname ar pamoka egzistuoja ir nėra ištrinta
                 if item.lesson and not item.lesson.is_deleted:
                     result.append({
@@ -68,7 +66,7 @@ class LessonSequenceSerializer(serializers.ModelSerializer):
                         'is_deleted': True
                     })
             
-            logger.info(f"Returning {len(result)} items for LessonSequence {obj.id}")
+            logger.debug("Returning %s items for LessonSequence %s", len(result), obj.id)
             return result
         except Exception as e:
             logger.error(f"Error in get_items for LessonSequence {obj.id}: {e}")
@@ -229,10 +227,12 @@ class LessonSequenceItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'sequence', 'position']
 
 
-class IMUPlanSerializer(serializers.ModelSerializer):
+class IMUPlanSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Individualaus mokinio ugdymo plano serializeris
     REFAKTORINIMAS: Pašalinti plan_status, started_at, completed_at - perkelta į GlobalSchedule
+    CHANGE: ?fields= / ?expand= (core.fieldsets) - global_schedule ir lesson objektai įterpiami tik
+    paprašius, kitaip grąžinamas jų id
     """
     student_name = serializers.CharField(source='student.get_full_name', read_only=True)
     lesson_title = serializers.CharField(source='lesson.title', read_only=True)
@@ -263,6 +263,42 @@ class IMUPlanSerializer(serializers.ModelSerializer):
             'global_schedule', 'global_schedule_date', 'global_schedule_time', 'global_schedule_period_name', 'global_schedule_level', 'global_schedule_classroom'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        expandable = {'global_schedule': 'global_schedule_id', 'lesson': 'lesson_id'}
+        fieldset_paths = {
+            'student_name': ('student__first_name', 'student__last_name'),
+            'lesson_title': ('lesson__title',),
+            'lesson_subject': ('lesson__subject__name',),
+            'attendance_status_display': ('attendance_status',),
+            'global_schedule_date': ('global_schedule__date',),
+            'global_schedule_time': ('global_schedule__period__starttime',),
+            'global_schedule_period_name': ('global_schedule__period__name',),
+            'global_schedule_level': ('global_schedule__level__name',),
+            'global_schedule_classroom': ('global_schedule__classroom__name',),
+        }
+        expand_paths = {
+            'global_schedule': (
+                'global_schedule__date', 'global_schedule__weekday', 'global_schedule__plan_status',
+                'global_schedule__user', 'global_schedule__subject__name', 'global_schedule__level__name',
+                'global_schedule__period__name', 'global_schedule__period__starttime',
+                'global_schedule__period__endtime', 'global_schedule__classroom__name',
+            ),
+            'lesson': ('lesson__title', 'lesson__topic', 'lesson__mentor', 'lesson__subject__name'),
+        }
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request=None):
+        """
+        Be ?fields= / ?expand= - visi susiję objektai viena užklausa (JOIN);
+        su jais - tik pasirinktų laukų stulpeliai ir ryšiai
+        """
+        names, expand = cls.requested_fields(request)
+        if names is None:
+            return queryset.select_related(
+                'student', 'lesson__subject',
+                'global_schedule__period', 'global_schedule__classroom',
+                'global_schedule__subject', 'global_schedule__level',
+            )
+        return cls.restrict_queryset(queryset, names, expand)
     
     def get_global_schedule(self, obj):
         """Grąžina global_schedule objektą su visais duomenimis"""
@@ -290,7 +326,7 @@ class IMUPlanSerializer(serializers.ModelSerializer):
                     'name': obj.global_schedule.classroom.name,
                 } if obj.global_schedule.classroom else None,
                 'plan_status': obj.global_schedule.plan_status,
-                'user': obj.global_schedule.user.id if obj.global_schedule.user else None,
+                'user': obj.global_schedule.user_id,
             }
         return None
     
@@ -305,7 +341,7 @@ class IMUPlanSerializer(serializers.ModelSerializer):
                     'id': obj.lesson.subject.id,
                     'name': obj.lesson.subject.name,
                 } if obj.lesson.subject else None,
-                'mentor': obj.lesson.mentor.id if obj.lesson.mentor else None,
+                'mentor': obj.lesson.mentor_id,
             }
         return None
     
@@ -22,6 +22,9 @@ from .serializers import (
 from users.models import User
 from schedule.models import GlobalSchedule
 from curriculum.models import Lesson, Subject, Level
+from crm.scope import get_role_scope
+
+logger = logging.getLogger(__name__)
 
 
 class LessonSequenceViewSet(viewsets.ModelViewSet):
@@ -295,9 +298,8 @@ class LessonSequenceViewSet(viewsets.ModelViewSet):
         start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
         end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
         
-        logger.info(f"Filtering criteria: subject={data['subject_id']}, level={data['level_id']}")
-        logger.info(f"Date range: {start_date} to {end_date}")
-        logger.info(f"Requesting user: {self.request.user.id} ({self.request.user.first_name} {self.request.user.last_name})")
+        logger.info("Filtering schedules: subject=%s, level=%s, dates=%s..%s, mentor=%s",
+                    data['subject_id'], data['level_id'], start_date, end_date, self.request.user.id)
         
         # CHANGE: Filtruojame GlobalSchedule pagal mentorių (user_id)
         schedules = GlobalSchedule.objects.filter(
@@ -310,12 +312,11 @@ class LessonSequenceViewSet(viewsets.ModelViewSet):
             'period', 'subject', 'level', 'classroom', 'user'
         ).order_by('date', 'period__starttime')
         
-        # DETALUS LOGGING
-        logger.info(f"Found {schedules.count()} matching schedules for mentor {self.request.user.id}:")
-        for schedule in schedules:
-            logger.info(f"  - {schedule.date} {schedule.period} | {schedule.subject.name} | {schedule.classroom.name} | Mentor: {schedule.user.first_name} {schedule.user.last_name}")
+        # Viena suvestinė eilutė vietoj įrašo kiekvienai eilutei (COUNT užklausa nebereikalinga)
+        schedules = list(schedules)
+        logger.info("Found %s matching schedules for mentor %s", len(schedules), self.request.user.id)
         
-        return list(schedules)
+        return schedules
     
     def _process_single_student_optimized(self, student_id, schedules, lessons, logger):
         """Procesavimas vienam studentui su length mismatch handling"""
@@ -428,7 +429,7 @@ class LessonSequenceItemViewSet(viewsets.ModelViewSet):
     """
     Sekos elementų valdymas
     """
-    queryset = LessonSequenceItem.objects.all()
+    queryset = LessonSequenceItem.objects.select_related('lesson__subject')
     serializer_class = LessonSequenceItemSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
@@ -441,7 +442,8 @@ class IMUPlanViewSet(viewsets.ModelViewSet):
     Individualių mokinių ugdymo planų valdymas
     REFAKTORINIMAS: Pašalinti plan_status, started_at, completed_at valdymas - perkelta į GlobalSchedule
     """
-    queryset = IMUPlan.objects.all()
+    # IMUPlanSerializer naudoja student, lesson ir global_schedule (su period/classroom/subject/level) laukus
+    queryset = IMUPlanSerializer.optimize_queryset(IMUPlan.objects.all())
     serializer_class = IMUPlanSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -456,14 +458,12 @@ class IMUPlanViewSet(viewsets.ModelViewSet):
         CHANGE: Pridėtas X-Current-Role header palaikymas
         CHANGE: Pridėtas student_id filtravimas iš query parametrų
         """
-        # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header dabartinės rolės nustatymui
-        current_role = getattr(self.request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(self.request.user, 'default_role', None)
-        
-        print(f'🔍 IMUPLAN: get_queryset called - User: {self.request.user.email}, Current role: {current_role}')
-        print(f'🔍 IMUPLAN: Request path: {self.request.path}')
-        print(f'🔍 IMUPLAN: Query params: {dict(self.request.query_params)}')
+        # SEC-011: rolė validuojama server-side, matomumo sritis - vienas scope per užklausą
+        scope = get_role_scope(self.request)
+        current_role = scope.role
+
+        logger.debug("IMUPLAN get_queryset: user=%s role=%s params=%s",
+                     self.request.user.id, current_role, self.request.query_params)
         
         queryset = super().get_queryset()
         
@@ -477,31 +477,17 @@ class IMUPlanViewSet(viewsets.ModelViewSet):
                 # Jei student_id neteisingas, grąžinti tuščią queryset
                 return queryset.none()
         
-        # Role-based filtravimas
-        if current_role == 'student':
-            # Studentas mato tik savo IMU planus
-            queryset = queryset.filter(student=self.request.user)
-        elif current_role == 'parent':
-            # Tėvas mato savo vaikų IMU planus
-            from crm.models import StudentParent
-            children = StudentParent.objects.filter(parent=self.request.user).values_list('student', flat=True)
-            queryset = queryset.filter(student__in=children)
-        elif current_role == 'mentor':
+        # Role-based filtravimas (subquery'iai vietoj materializuotų id sąrašų)
+        if current_role == 'mentor':
             # Mentorius mato savo dėstomų dalykų IMU planus
-            from crm.models import MentorSubject
-            mentor_subjects = MentorSubject.objects.filter(mentor=self.request.user).values_list('subject', flat=True)
-            queryset = queryset.filter(global_schedule__subject__in=mentor_subjects)
-        elif current_role == 'curator':
-            # Kuratorius mato savo kuruojamų studentų IMU planus
-            from crm.models import StudentCurator
-            curated_students = StudentCurator.objects.filter(curator=self.request.user).values_list('student', flat=True)
-            print(f'👥 IMUPLAN: Curator {self.request.user.email} has curated students: {list(curated_students)}')
-            queryset = queryset.filter(student__in=curated_students)
-            print(f'📊 IMUPLAN: Filtered queryset count: {queryset.count()}')
-        elif current_role != 'manager':
-            # Jei ne manager ir ne kita žinoma rolė, grąžinti tuščią queryset
-            queryset = queryset.none()
-            
+            queryset = queryset.filter(global_schedule__subject__in=scope.mentor_subject_ids)
+        else:
+            # Studentas - savo, tėvas - vaikų, kuratorius - kuruojamų studentų, manager - visi
+            queryset = scope.filter_students(queryset)
+
+        if self.action in ('list', 'retrieve'):
+            # ?fields= / ?expand= - tik pasirinktų laukų stulpeliai ir JOIN'ai
+            queryset = IMUPlanSerializer.optimize_queryset(queryset, self.request)
         return queryset
     
     def get_serializer_class(self):
@@ -1,6 +1,8 @@
 # backend/schedule/serializers.py
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
+from core.fieldsets import SparseFieldsetMixin
 from .models import Period, Classroom, GlobalSchedule
 from curriculum.models import Subject, Level, Lesson
 
@@ -38,10 +40,12 @@ class ClassroomSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class GlobalScheduleSerializer(serializers.ModelSerializer):
+class GlobalScheduleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Globalaus tvarkaraščio serializeris - valdo tvarkaraščio duomenų serializavimą
     REFAKTORINIMAS: Pridėti plan_status, started_at, completed_at laukai
+    CHANGE: ?fields= / ?expand= (core.fieldsets) - period/classroom/subject/level/user objektai
+    įterpiami tik paprašius, kitaip grąžinamas jų id
     """
     # Pilni objektai su visais laukais
     period = serializers.SerializerMethodField()
@@ -77,6 +81,45 @@ class GlobalScheduleSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['weekday']  # Savaitės diena nustatoma automatiškai
         # lesson laukas pašalintas
+        expandable = {
+            'period': 'period_id', 'classroom': 'classroom_id', 'subject': 'subject_id',
+            'level': 'level_id', 'user': 'user_id',
+        }
+        fieldset_paths = {
+            'period_name': ('period__name', 'period__starttime', 'period__endtime'),
+            'classroom_name': ('classroom__name',),
+            'subject_name': ('subject__name',),
+            'level_name': ('level__name',),
+            'mentor_name': ('user__first_name', 'user__last_name'),
+            'plan_status_display': ('plan_status',),
+            'has_imu_plan': (),
+        }
+        expand_paths = {
+            'period': ('period__name', 'period__starttime', 'period__endtime'),
+            'classroom': ('classroom__name', 'classroom__description'),
+            'subject': ('subject__name', 'subject__description', 'subject__color'),
+            'level': ('level__name', 'level__description'),
+            'user': ('user__first_name', 'user__last_name', 'user__email'),
+        }
+    
+    @classmethod
+    def optimize_queryset(cls, queryset, request=None):
+        """
+        Užkrauna susijusius objektus ir has_imu_plan viena užklausa (EXISTS anotacija),
+        kad sąrašo užklausų skaičius nepriklausytų nuo įrašų kiekio.
+        Su ?fields= / ?expand= - tik pasirinktų laukų stulpeliai ir ryšiai.
+        """
+        from plans.models import IMUPlan
+        has_imu_plan = Exists(IMUPlan.objects.filter(global_schedule=OuterRef('pk')))
+        names, expand = cls.requested_fields(request)
+        if names is None:
+            return queryset.select_related('period', 'classroom', 'subject', 'level', 'user').annotate(
+                has_imu_plan=has_imu_plan
+            )
+        queryset = cls.restrict_queryset(queryset, names, expand)
+        if 'has_imu_plan' in names:
+            queryset = queryset.annotate(has_imu_plan=has_imu_plan)
+        return queryset
     
     def get_period(self, obj):
         """Grąžina pilną periodo objektą"""
@@ -133,6 +176,9 @@ class GlobalScheduleSerializer(serializers.ModelSerializer):
     
     def get_has_imu_plan(self, obj):
         """Tikrina ar yra IMUPlan įrašų šiam GlobalSchedule slotui"""
+        if hasattr(obj, 'has_imu_plan'):
+            # Anotuota optimize_queryset() - be atskiros užklausos
+            return obj.has_imu_plan
         from plans.models import IMUPlan
         return IMUPlan.objects.filter(global_schedule=obj).exists()
     
@@ -12,6 +12,7 @@ from .models import Period, Classroom, GlobalSchedule
 from .serializers import PeriodSerializer, ClassroomSerializer, GlobalScheduleSerializer
 from plans.models import IMUPlan
 from curriculum.models import Lesson
+from crm.scope import get_role_scope
 
 
 # Create your views here.
@@ -50,56 +51,34 @@ class GlobalScheduleViewSet(viewsets.ModelViewSet):
         CHANGE: Naudojame X-Current-Role header dabartinės rolės nustatymui
         """
         user = self.request.user
-        
-        # CHANGE: Paimame dabartinę rolę iš header
-        current_role = getattr(self.request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(user, 'default_role', None)
-        
-        
+
+        # SEC-011: validuota rolė ir matomumo sritis - vienas scope per užklausą
+        scope = get_role_scope(self.request)
+        current_role = scope.role
+
         if current_role == 'manager':
             queryset = GlobalSchedule.objects.all()
-            return queryset
         elif current_role == 'mentor':
             # Mentoriai mato tik tuos dalykus, kurie jiems priskirti
-            mentor_subjects = user.mentor_subjects.values_list('subject', flat=True)
             queryset = GlobalSchedule.objects.filter(
                 user=user,
-                subject__in=mentor_subjects
+                subject__in=scope.mentor_subject_ids
             )
-            return queryset
         elif current_role == 'student':
             # Studentai mato tvarkaraštį pagal savo dalykus ir lygius
             queryset = GlobalSchedule.objects.filter(
-                subject__in=user.subject_levels.values_list('subject', flat=True),
-                level__in=user.subject_levels.values_list('level', flat=True)
+                subject__in=scope.subject_levels.values('subject'),
+                level__in=scope.subject_levels.values('level')
             )
-            return queryset
         elif current_role == 'curator':
-            # Kuratoriai mato tvarkaraščius savo studentų pagal StudentSubjectLevel
-            from crm.models import StudentCurator, StudentSubjectLevel
-            from django.db.models import Q
-            
-            # Gauti studentus, kuriuos kuratorius kuruoja
-            curated_students = StudentCurator.objects.filter(curator=user).values_list('student', flat=True)
-            if not curated_students.exists():
-                return GlobalSchedule.objects.none()
-            
-            # Gauti studentų subject levels
-            student_levels = StudentSubjectLevel.objects.filter(student__in=curated_students).select_related('subject', 'level')
-            
-            if not student_levels.exists():
-                return GlobalSchedule.objects.none()
-            
-            # Sukurti Q objektus kiekvienai subject-level kombinacijai
-            q_objects = Q()
-            for sl in student_levels:
-                q_objects |= Q(subject=sl.subject, level=sl.level)
-            
-            queryset = GlobalSchedule.objects.filter(q_objects)
-            return queryset
+            # Kuratoriai mato tvarkaraščius savo studentų pagal StudentSubjectLevel:
+            # (subject, level) poros tikrinamos EXISTS subquery vietoj Q(...) | Q(...) grandinės
+            queryset = GlobalSchedule.objects.filter(scope.subject_level_exists())
         else:
             return GlobalSchedule.objects.none()
+        # ?fields= / ?expand= taikomi tik veiksmams, kurie atvaizduoja get_serializer() rezultatą
+        fieldset_request = self.request if self.action in ('list', 'retrieve', 'weekly', 'daily') else None
+        return GlobalScheduleSerializer.optimize_queryset(queryset, fieldset_request)
     
     def perform_create(self, serializer):
         """
@@ -140,7 +119,7 @@ class GlobalScheduleViewSet(viewsets.ModelViewSet):
         
         schedules = self.get_queryset().filter(
             date__range=[start_of_week, end_of_week]
-        ).select_related('period', 'classroom', 'subject', 'level', 'user')
+        )
         
         serializer = self.get_serializer(schedules, many=True)
         return Response(serializer.data)
@@ -381,7 +360,7 @@ class GlobalScheduleViewSet(viewsets.ModelViewSet):
         FIX: Pataisyta student_id parametro gavimas ir curator teisių tikrinimas
         """
         from datetime import datetime, timedelta
-        from crm.models import StudentSubjectLevel, StudentCurator
+        from crm.models import StudentSubjectLevel
         from users.models import User
         
         # FIX: Gauti student_id iš URL parametro vietoj request.user
@@ -403,10 +382,9 @@ class GlobalScheduleViewSet(viewsets.ModelViewSet):
         week_start = request.query_params.get('week_start')  # YYYY-MM-DD formatas (pirmadienio data)
         
         # Tikriname, ar vartotojas turi teisę gauti tvarkaraščio duomenis
-        current_role = getattr(request, 'current_role', None)
-        if not current_role:
-            current_role = getattr(request.user, 'default_role', None)
-        
+        scope = get_role_scope(request)
+        current_role = scope.role
+
         if current_role not in ['student', 'curator', 'manager', 'mentor']:
             return Response(
                 {"error": "Tik studentai, kuratoriai, vadovai ir mentoriai gali gauti tvarkaraštį"},
@@ -415,8 +393,7 @@ class GlobalScheduleViewSet(viewsets.ModelViewSet):
         
         # FIX: Jei vartotojas yra curator, tikrinti ar jis kuruoja šį studentą
         if current_role == 'curator':
-            curated_students = StudentCurator.objects.filter(curator=request.user).values_list('student', flat=True)
-            if int(student_id) not in curated_students:
+            if not scope.can_view_student(student_id):
                 return Response(
                     {"error": "Neturite teisių matyti šio studento duomenis"}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -460,12 +437,10 @@ class GlobalScheduleViewSet(viewsets.ModelViewSet):
         for sl in student_levels:
             q_objects |= Q(subject=sl.subject, level=sl.level)
         
-        queryset = GlobalSchedule.objects.filter(
+        queryset = GlobalScheduleSerializer.optimize_queryset(GlobalSchedule.objects.filter(
             q_objects,
             date__range=[start_date, end_date]
-        ).select_related(
-            'period', 'classroom', 'subject', 'level', 'user'
-        ).order_by('date', 'period__starttime')
+        ), request).order_by('date', 'period__starttime')
         
         serializer = self.get_serializer(queryset, many=True)
         
@@ -474,7 +449,7 @@ class GlobalScheduleViewSet(viewsets.ModelViewSet):
             "student_name": f"{student.first_name} {student.last_name}".strip() or student.username,
             "week_start": week_start,
             "week_end": end_date.strftime('%Y-%m-%d'),
-            "count": queryset.count(),
+            "count": len(serializer.data),
             "student_subject_levels": [
                 {
                     "subject": sl.subject.name,
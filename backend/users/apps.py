@@ -9,3 +9,9 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
     verbose_name = 'Vartotojai'
+    
+    def ready(self):
+        """
+        Import signal handlers when the app is ready
+        """
+        import users.signals  # noqa
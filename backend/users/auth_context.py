@@ -0,0 +1,134 @@
+# /backend/users/auth_context.py
+# Request-scoped authentication context for A-DIENYNAS
+# PURPOSE: Decode the JWT access token, load the user and resolve current_role once per request
+# UPDATES: Created so RoleValidationMiddleware, JWTAuthenticationBackend and JWTCookieAuthentication
+#          share one token decode and one user lookup instead of repeating them
+#          User lookup goes through users.user_cache (versioned LRU+TTL cache)
+
+import logging
+
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+# Atributas, kuriame konteksta saugome ant Django HttpRequest objekto
+REQUEST_ATTR = '_auth_context'
+
+_UNSET = object()
+
+
+class AuthContext:
+    """
+    Vienos užklausos autentifikacijos kontekstas.
+    Token'as dekoduojamas tik vieną kartą, vartotojas užkraunamas tik vieną kartą,
+    current_role apskaičiuojamas tik vieną kartą kiekvienam vartotojui.
+    """
+
+    def __init__(self, raw_token=None, source=None):
+        self.raw_token = raw_token
+        self.source = source  # 'cookie', 'header' arba None
+        self._token = _UNSET
+        self._user = _UNSET
+        self._roles = {}
+
+    @property
+    def token(self):
+        """Grąžina validuotą AccessToken arba None (dekoduojama tik kartą)"""
+        if self._token is _UNSET:
+            self._token = None
+            if self.raw_token:
+                try:
+                    self._token = AccessToken(self.raw_token)
+                except (InvalidToken, TokenError) as e:
+                    logger.debug(f"Invalid JWT token from {self.source}: {str(e)}")
+        return self._token
+
+    @property
+    def user_id(self):
+        token = self.token
+        if token is None:
+            return None
+        return token.get(settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id'))
+
+    @property
+    def user(self):
+        """Grąžina token'o vartotoją arba None (užklausa į DB tik kartą)"""
+        if self._user is _UNSET:
+            self._user = None
+            user_id = self.user_id
+            if user_id:
+                self._user = self._load_user(user_id)
+                if self._user is not None:
+                    # Store token in user object for later use
+                    self._user._jwt_token = self.token
+        return self._user
+
+    def _load_user(self, user_id):
+        # Versijuota proceso talpykla - DB užklausa tik jei vartotojo nėra talpykloje
+        return user_cache.get_user(user_id)
+
+    def role_for(self, user):
+        """
+        SEC-011: Grąžina validuotą current_role nurodytam vartotojui.
+        Token'o current_role naudojamas tik jei jis yra vartotojo DB rolėse,
+        kitu atveju naudojama numatytoji rolė.
+        """
+        if user is None or not getattr(user, 'is_authenticated', False):
+            return None
+        if user.pk not in self._roles:
+            self._roles[user.pk] = self._resolve_role(user)
+        return self._roles[user.pk]
+
+    def _resolve_role(self, user):
+        token = self.token
+        claimed_role = token.get('current_role') if token is not None else None
+        try:
+            # ROLE SWITCHING TOKEN LOGIC: current_role iš token'o tikrinamas pagal DB user.roles
+            if claimed_role and claimed_role in user.roles:
+                return claimed_role
+            if claimed_role:
+                logger.warning(f"Invalid role from JWT: {claimed_role} for user {user.id}, using default")
+        except Exception as e:
+            logger.error(f"Error validating role {claimed_role} for user {user.id}: {str(e)}")
+        return user.get_default_role()
+
+    @property
+    def current_role(self):
+        """current_role token'o vartotojui"""
+        return self.role_for(self.user)
+
+
+def get_raw_token(request):
+    """
+    SEC-001: Ištraukia JWT access token'ą - pirma iš cookie, tada iš Authorization header.
+    Grąžina (raw_token, source).
+    """
+    cookie_name = settings.SIMPLE_JWT.get('AUTH_COOKIE_NAME', 'access_token')
+    access_token = request.COOKIES.get(cookie_name)
+    if access_token:
+        return access_token, 'cookie'
+
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    parts = auth_header.split()
+    if len(parts) == 2 and parts[0] in settings.SIMPLE_JWT.get('AUTH_HEADER_TYPES', ('Bearer',)):
+        return parts[1], 'header'
+
+    return None, None
+
+
+def get_auth_context(request):
+    """
+    Grąžina (ir prireikus sukuria) užklausos autentifikacijos kontekstą.
+    Veikia tiek su Django HttpRequest, tiek su DRF Request.
+    """
+    http_request = getattr(request, '_request', request)
+    context = getattr(http_request, REQUEST_ATTR, None)
+    if context is None:
+        raw_token, source = get_raw_token(http_request)
+        context = AuthContext(raw_token, source)
+        setattr(http_request, REQUEST_ATTR, context)
+    return context
@@ -2,10 +2,12 @@
 # Authentication Logging Middleware for A-DIENYNAS
 # PURPOSE: Specialized logging for authentication events
 # UPDATES: Created authentication-specific logging middleware
+#          User info from request.user (no DB re-fetch), lazy %-formatting
 
 import logging
 from django.utils.deprecation import MiddlewareMixin
-from django.contrib.auth import get_user_model
+
+from .request_logging import LazyStr, describe_user, get_client_ip
 
 logger = logging.getLogger(__name__)
 
@@ -20,36 +22,35 @@ class AuthLoggingMiddleware(MiddlewareMixin):
         # Log OAuth requests
         if '/accounts/google/login/' in request.path:
             logger.info(
-                f"🔐 OAUTH_LOGIN: Google OAuth login initiated | "
-                f"IP: {self._get_client_ip(request)} | "
-                f"Referrer: {request.META.get('HTTP_REFERER', 'N/A')} | "
-                f"User-Agent: {request.META.get('HTTP_USER_AGENT', 'N/A')[:50]}"
+                "🔐 OAUTH_LOGIN: Google OAuth login initiated | IP: %s | Referrer: %s | User-Agent: %s",
+                LazyStr(get_client_ip, request),
+                request.META.get('HTTP_REFERER', 'N/A'),
+                request.META.get('HTTP_USER_AGENT', 'N/A')[:50],
             )
         
         # Log API authentication requests
         elif request.path.startswith('/api/users/token/'):
             logger.info(
-                f"🔐 API_AUTH: Token request ({request.method}) | "
-                f"IP: {self._get_client_ip(request)} | "
-                f"Path: {request.path}"
+                "🔐 API_AUTH: Token request (%s) | IP: %s | Path: %s",
+                request.method,
+                LazyStr(get_client_ip, request),
+                request.path,
             )
         
         # Log role switching requests
         elif '/switch-role/' in request.path:
-            user_info = self._get_user_info(request)
             logger.info(
-                f"🔄 ROLE_SWITCH: Role switch request | "
-                f"User: {user_info} | "
-                f"IP: {self._get_client_ip(request)}"
+                "🔄 ROLE_SWITCH: Role switch request | User: %s | IP: %s",
+                LazyStr(describe_user, request, False),
+                LazyStr(get_client_ip, request),
             )
         
         # Log logout requests
         elif '/logout/' in request.path:
-            user_info = self._get_user_info(request)
             logger.info(
-                f"🚪 LOGOUT: Logout request | "
-                f"User: {user_info} | "
-                f"IP: {self._get_client_ip(request)}"
+                "🚪 LOGOUT: Logout request | User: %s | IP: %s",
+                LazyStr(describe_user, request, False),
+                LazyStr(get_client_ip, request),
             )
         
         return None
@@ -59,58 +60,35 @@ class AuthLoggingMiddleware(MiddlewareMixin):
         # Log OAuth responses
         if '/accounts/google/login/' in request.path:
             logger.info(
-                f"🔐 OAUTH_RESPONSE: Google OAuth response | "
-                f"Status: {response.status_code} | "
-                f"IP: {self._get_client_ip(request)}"
+                "🔐 OAUTH_RESPONSE: Google OAuth response | Status: %s | IP: %s",
+                response.status_code,
+                LazyStr(get_client_ip, request),
             )
         
         # Log API authentication responses
         elif request.path.startswith('/api/users/token/'):
             logger.info(
-                f"🔐 API_AUTH_RESPONSE: Token response | "
-                f"Status: {response.status_code} | "
-                f"IP: {self._get_client_ip(request)}"
+                "🔐 API_AUTH_RESPONSE: Token response | Status: %s | IP: %s",
+                response.status_code,
+                LazyStr(get_client_ip, request),
             )
         
         # Log role switching responses
         elif '/switch-role/' in request.path:
-            user_info = self._get_user_info(request)
             logger.info(
-                f"🔄 ROLE_SWITCH_RESPONSE: Role switch response | "
-                f"Status: {response.status_code} | "
-                f"User: {user_info} | "
-                f"IP: {self._get_client_ip(request)}"
+                "🔄 ROLE_SWITCH_RESPONSE: Role switch response | Status: %s | User: %s | IP: %s",
+                response.status_code,
+                LazyStr(describe_user, request, False),
+                LazyStr(get_client_ip, request),
             )
         
         # Log logout responses
         elif '/logout/' in request.path:
-            user_info = self._get_user_info(request)
             logger.info(
-                f"🚪 LOGOUT_RESPONSE: Logout response | "
-                f"Status: {response.status_code} | "
-                f"User: {user_info} | "
-                f"IP: {self._get_client_ip(request)}"
+                "🚪 LOGOUT_RESPONSE: Logout response | Status: %s | User: %s | IP: %s",
+                response.status_code,
+                LazyStr(describe_user, request, False),
+                LazyStr(get_client_ip, request),
             )
         
         return response
-    
-    def _get_user_info(self, request):
-        """Extract user information"""
-        if request.user.is_authenticated:
-            User = get_user_model()
-            try:
-                user = User.objects.get(id=request.user.id)
-                return f"{user.email} (ID: {user.id}, Role: {getattr(user, 'current_role', 'N/A')})"
-            except Exception:
-                return f"Authenticated user (ID: {request.user.id})"
-        else:
-            return "Anonymous"
-    
-    def _get_client_ip(self, request):
-        """Get client IP address"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
@@ -4,9 +4,11 @@
 # UPDATES: Created for SEC-001 cookie-based authentication
 
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import AccessToken
-from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from .auth_context import get_auth_context
 
 
 class JWTCookieAuthentication(JWTAuthentication):
@@ -17,22 +19,33 @@ class JWTCookieAuthentication(JWTAuthentication):
     def authenticate(self, request):
         """
         SEC-001: Override authenticate to read token from cookie instead of header
+        Uses the request-scoped AuthContext so the token is decoded and the user loaded only once
         """
         # Try to get token from cookie first
-        access_token = request.COOKIES.get(settings.SIMPLE_JWT['AUTH_COOKIE_NAME'])
+        context = get_auth_context(request)
         
-        if access_token:
-            try:
-                # Validate the token
-                validated_token = self.get_validated_token(access_token)
-                return self.get_user(validated_token), validated_token
-            except (InvalidToken, TokenError):
-                # If cookie token is invalid, try header as fallback
-                pass
+        if context.token is not None:
+            return self.get_context_user(context), context.token
         
-        # Fallback to header-based authentication
+        # If cookie token is invalid or missing, fallback to header-based authentication
         return super().authenticate(request)
     
+    def get_context_user(self, context):
+        """
+        SEC-001: Return the AuthContext user with the same checks as JWTAuthentication.get_user
+        """
+        if context.user_id is None:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        
+        user = context.user
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        
+        return user
+    
     def get_validated_token(self, raw_token):
         """
         SEC-001: Validate token from cookie
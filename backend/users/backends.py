@@ -3,12 +3,8 @@
 # UPDATES: Created to support JWT authentication in Django middleware
 
 from django.contrib.auth.backends import BaseBackend
-from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import AccessToken
-from django.conf import settings
-
-User = get_user_model()
+from .auth_context import get_auth_context
+from .user_cache import user_cache
 
 
 class JWTAuthenticationBackend(BaseBackend):
@@ -21,40 +17,21 @@ class JWTAuthenticationBackend(BaseBackend):
         """
         Authenticate user using JWT token from cookie
         Returns User object for Django authentication system
+        Token decoding and user lookup are shared with the rest of the request via AuthContext
         """
         if not request:
             return None
             
         # Get JWT token from cookie
-        access_token = request.COOKIES.get('access_token')
+        context = get_auth_context(request)
         
-        if not access_token:
+        if context.source != 'cookie':
             return None
             
-        try:
-            # Validate JWT token
-            token = AccessToken(access_token)
-            user_id = token.get('user_id')
-            
-            if user_id:
-                try:
-                    user = User.objects.get(id=user_id)
-                    # Store token in user object for later use
-                    user._jwt_token = token
-                    return user
-                except User.DoesNotExist:
-                    return None
-                    
-        except (InvalidToken, TokenError):
-            return None
-            
-        return None
+        return context.user
     
     def get_user(self, user_id):
         """
         Get user by ID (required by Django authentication backend)
         """
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+        return user_cache.get_user(user_id)
@@ -0,0 +1,74 @@
+# /backend/users/fast_auth_middleware.py
+# Fast path for AuthManager endpoints (auth/validate/, me/)
+# PURPOSE: Answer frequent frontend auth checks from verified JWT claims and the cached user snapshot
+#          without session, messages, allauth, role and logging middleware work
+# UPDATES: Created for AuthManager latency; falls back to the regular view on anything unusual
+
+import logging
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from .auth_context import get_auth_context
+
+logger = logging.getLogger(__name__)
+
+VALIDATE_AUTH_PATH = '/api/users/auth/validate/'
+ME_PATH = '/api/users/me/'
+
+
+class AuthFastPathMiddleware:
+    """
+    Trumpasis kelias validate_auth ir me endpoint'ams.
+    Atsako tik kai užklausa yra GET su galiojančiu JWT ir aktyviu vartotoju -
+    visais kitais atvejais (nėra token'o, klaida, neaktyvus vartotojas) užklausa
+    keliauja įprastu keliu, kad klaidų atsakymai liktų tokie patys.
+    Vartotojas imamas per AuthContext -> users.user_cache (versijuota talpykla),
+    todėl kartotiniai kvietimai DB neliečia.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'AUTH_FAST_PATH_ENABLED', True)
+        self.handlers = {
+            VALIDATE_AUTH_PATH: self._validate_auth,
+            ME_PATH: self._me,
+        }
+
+    def __call__(self, request):
+        handler = self.handlers.get(request.path) if self.enabled and request.method == 'GET' else None
+        if handler is not None:
+            try:
+                response = self._try_fast_path(request, handler)
+            except Exception as e:
+                logger.warning(f"Auth fast path failed for {request.path}, using regular path: {str(e)}")
+                response = None
+            if response is not None:
+                return response
+
+        return self.get_response(request)
+
+    def _try_fast_path(self, request, handler):
+        context = get_auth_context(request)
+        if context.token is None:
+            return None
+
+        user = context.user
+        if user is None or not user.is_active:
+            return None
+
+        current_role = context.role_for(user)
+        logger.debug(f"Auth fast path: {request.path} for user {user.id}")
+        response = JsonResponse(handler(user, current_role))
+        # core.metrics_middleware view label (užklausa nepasiekia URL resolver'io)
+        request.metrics_view = f"AuthFastPath.{handler.__name__.lstrip('_')}"
+        return response
+
+    def _validate_auth(self, user, current_role):
+        from .views import build_validate_auth_payload
+        return build_validate_auth_payload(user, current_role)
+
+    def _me(self, user, current_role):
+        # Tas pats atsakymas kaip users.views.me (UserSerializer be request konteksto)
+        from .serializers import UserSerializer
+        return UserSerializer(user).data
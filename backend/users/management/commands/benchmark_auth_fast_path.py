@@ -0,0 +1,86 @@
+# backend/users/management/commands/benchmark_auth_fast_path.py
+# Micro-benchmark: AuthFastPathMiddleware vs regular middleware/DRF path
+# PURPOSE: Measure latency and DB queries of api/users/auth/validate/ and api/users/me/
+# UPDATES: Created together with users.fast_auth_middleware
+
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from users.user_cache import user_cache
+
+PATHS = ['/api/users/auth/validate/', '/api/users/me/']
+
+
+class Command(BaseCommand):
+    help = 'Palygina validate_auth ir me endpoint\'ų trukmę su AuthFastPathMiddleware ir be jo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Užklausų skaičius kiekvienam matavimui')
+        parser.add_argument('--warmup', type=int, default=20, help='Apšilimo užklausų skaičius')
+
+    def handle(self, *args, **options):
+        # Laikinas vartotojas - visi pakeitimai atšaukiami pabaigoje
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email='benchmark-auth@example.invalid',
+                password=None,
+                first_name='Benchmark',
+                last_name='User',
+                roles=['student'],
+                default_role='student'
+            )
+            token = AccessToken.for_user(user)
+            token['current_role'] = 'student'
+
+            self.stdout.write(f"{'Kelias':<32}{'Režimas':<10}{'vid. ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'SQL':>6}")
+            for path in PATHS:
+                for label, enabled in (('regular', False), ('fast', True)):
+                    result = self._measure(path, str(token), enabled, options['requests'], options['warmup'])
+                    self.stdout.write(
+                        f"{path:<32}{label:<10}{result['mean']:>10.3f}{result['p50']:>10.3f}"
+                        f"{result['p95']:>10.3f}{result['queries']:>6}"
+                    )
+
+            transaction.set_rollback(True)
+
+        user_cache.clear()
+        self.stdout.write(self.style.SUCCESS('Matavimas baigtas'))
+
+    def _measure(self, path, raw_token, enabled, requests, warmup):
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(AUTH_FAST_PATH_ENABLED=enabled, ALLOWED_HOSTS=allowed_hosts):
+            client = Client()
+            client.cookies['access_token'] = raw_token
+
+            for _ in range(warmup):
+                client.get(path)
+
+            # SQL užklausų skaičius vienai (jau apšildytai) užklausai
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path)
+            # request_started signalas išvalo queries_log, todėl skaičius fiksuojamas iš karto
+            query_count = len(queries)
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f'{path}: status {response.status_code}'))
+
+            durations = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                client.get(path)
+                durations.append((time.perf_counter() - start) * 1000)
+
+        durations.sort()
+        return {
+            'mean': statistics.fmean(durations),
+            'p50': durations[len(durations) // 2],
+            'p95': durations[int(len(durations) * 0.95) - 1],
+            'queries': query_count,
+        }
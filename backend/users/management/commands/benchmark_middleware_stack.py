@@ -0,0 +1,102 @@
+# backend/users/management/commands/benchmark_middleware_stack.py
+# Micro-benchmark: full vs lean (API) middleware stack
+# PURPOSE: Measure per-request overhead of MIDDLEWARE for /api/ requests with LEAN_API_ENABLED on/off
+# UPDATES: Created together with core.lean_middleware
+
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from users.user_cache import user_cache
+
+# (kelias, ar siųsti JWT cookie, ar siųsti sesijos cookie - naršyklė po OAuth/admin prisijungimo)
+TARGETS = [
+    ('/api/health/', False, False),
+    ('/api/users/debug/role/', True, False),
+    ('/api/users/debug/role/', True, True),
+]
+
+
+class Command(BaseCommand):
+    help = 'Palygina /api/ užklausų trukmę su pilnu ir trumpu (LEAN_API_ENABLED) middleware stack\'u'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Užklausų skaičius kiekvienam matavimui')
+        parser.add_argument('--warmup', type=int, default=20, help='Apšilimo užklausų skaičius')
+
+    def handle(self, *args, **options):
+        # Laikinas vartotojas - visi pakeitimai atšaukiami pabaigoje
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email='benchmark-middleware@example.invalid',
+                password=None,
+                first_name='Benchmark',
+                last_name='User',
+                roles=['student'],
+                default_role='student'
+            )
+            raw_token = str(AccessToken.for_user(user))
+
+            self.stdout.write(
+                f"{'Kelias':<28}{'Sesija':<8}{'Stack':<8}{'vid. ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'SQL':>6}"
+            )
+            for path, authenticated, with_session in TARGETS:
+                for label, lean in (('full', False), ('lean', True)):
+                    result = self._measure(
+                        path, raw_token if authenticated else None, with_session, lean,
+                        options['requests'], options['warmup']
+                    )
+                    self.stdout.write(
+                        f"{path:<28}{'yes' if with_session else 'no':<8}{label:<8}{result['mean']:>10.3f}"
+                        f"{result['p50']:>10.3f}{result['p95']:>10.3f}{result['queries']:>6}"
+                    )
+
+            transaction.set_rollback(True)
+
+        user_cache.clear()
+        self.stdout.write(self.style.SUCCESS('Matavimas baigtas'))
+
+    def _measure(self, path, raw_token, with_session, lean, requests, warmup):
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        # Fast path išjungiamas, kad būtų matuojamas tik middleware stack'as
+        with override_settings(LEAN_API_ENABLED=lean, AUTH_FAST_PATH_ENABLED=False, ALLOWED_HOSTS=allowed_hosts):
+            client = Client()
+            if raw_token:
+                client.cookies['access_token'] = raw_token
+            if with_session:
+                session = SessionStore()
+                session['benchmark'] = True
+                session.create()
+                client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+            for _ in range(warmup):
+                client.get(path)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path)
+            # request_started signalas išvalo queries_log, todėl skaičius fiksuojamas iš karto
+            query_count = len(queries)
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f'{path}: status {response.status_code}'))
+
+            durations = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                client.get(path)
+                durations.append((time.perf_counter() - start) * 1000)
+
+        durations.sort()
+        return {
+            'mean': statistics.fmean(durations),
+            'p50': durations[len(durations) // 2],
+            'p95': durations[int(len(durations) * 0.95) - 1],
+            'queries': query_count,
+        }
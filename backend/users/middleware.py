@@ -2,10 +2,10 @@
 # SEC-011: Role validation middleware for secure role-based access control
 # PURPOSE: Replace vulnerable X-Current-Role header with server-side role validation
 # UPDATES: Created for SEC-011 security fix
+#          Token decode and role resolution moved to users.auth_context (shared per request)
 
-from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from .auth_context import get_auth_context
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,6 +27,9 @@ class RoleValidationMiddleware:
         # Initialize current_role as None
         request.current_role = None
         
+        # Vienas autentifikacijos kontekstas visai užklausai (backend, DRF autentifikacija, rolė)
+        context = get_auth_context(request)
+        
         # MIDDLEWARE FIX: Don't authenticate here - AuthenticationMiddleware already did it
         # Just process the already authenticated user
         
@@ -41,29 +44,19 @@ class RoleValidationMiddleware:
                 # Set the authenticated user
                 request.user = jwt_user
                 request.user.backend = 'users.backends.JWTAuthenticationBackend'
-                logger.info(f"🔐 JWT AUTH SUCCESS: User {jwt_user.email} authenticated via JWT")
+                logger.debug("🔐 JWT AUTH SUCCESS: User %s authenticated via JWT", jwt_user.id)
             else:
-                logger.info(f"🔐 JWT AUTH FAILED: No valid JWT token found")
+                logger.debug("🔐 JWT AUTH FAILED: No valid JWT token found")
+                if not hasattr(request, 'user'):
+                    # API (lean) stack'e AuthenticationMiddleware praleidžiamas - request.user nustatomas čia
+                    request.user = AnonymousUser()
         
         # Only process authenticated users
         if hasattr(request, 'user') and request.user.is_authenticated:
             try:
-                # Try to get role from JWT token first (most secure)
-                role_from_token = self._get_role_from_jwt_token(request)
-                
-                if role_from_token:
-                    # Validate role exists in user's roles
-                    if self._validate_role(request.user, role_from_token):
-                        request.current_role = role_from_token
-                        logger.debug(f"Role validated from JWT: {role_from_token} for user {request.user.id}")
-                    else:
-                        # Role from token is invalid, use default role
-                        request.current_role = request.user.get_default_role()
-                        logger.warning(f"Invalid role from JWT: {role_from_token} for user {request.user.id}, using default")
-                else:
-                    # Fallback to database default role
-                    request.current_role = request.user.get_default_role()
-                    logger.debug(f"Using default role from database: {request.current_role} for user {request.user.id}")
+                # Role iš JWT token'o validuojama AuthContext'e (token dekoduojamas tik kartą)
+                request.current_role = context.role_for(request.user)
+                logger.debug(f"Resolved current_role: {request.current_role} for user {request.user.id}")
                     
             except Exception as e:
                 # Error in role validation, use default role
@@ -75,44 +68,6 @@ class RoleValidationMiddleware:
         
         return response
 
-    def _get_role_from_jwt_token(self, request):
-        """
-        SEC-011: Extract role information from JWT token
-        """
-        try:
-            # Try to get token from cookie first (SEC-001 implementation)
-            access_token = request.COOKIES.get(settings.SIMPLE_JWT.get('AUTH_COOKIE_NAME', 'access_token'))
-            
-            if not access_token:
-                # Fallback to Authorization header
-                auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-                if auth_header.startswith('Bearer '):
-                    access_token = auth_header.split(' ')[1]
-            
-            if access_token:
-                # Decode and validate token
-                token = AccessToken(access_token)
-                
-                # Get role information from token claims
-                # ROLE SWITCHING TOKEN LOGIC: Token'e tik current_role
-                # roles ir default_role pašalinti - tikrinama iš DB
-                current_role = token.get('current_role')
-                
-                # ROLE SWITCHING TOKEN LOGIC: Naudoti current_role iš token'o
-                # Tikrinti ar current_role leidžiama iš DB user.roles
-                if current_role:
-                    # Validate current_role against DB user.roles
-                    if current_role in request.user.roles:
-                        return current_role
-                    else:
-                        # Fallback to default_role
-                        return request.user.get_default_role()
-                    
-        except (InvalidToken, TokenError, Exception) as e:
-            logger.debug(f"Could not extract role from JWT token: {str(e)}")
-            
-        return None
-
     def _validate_role(self, user, role):
         """
         SEC-011: Validate that the role exists in user's database roles
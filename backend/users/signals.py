@@ -0,0 +1,47 @@
+# /backend/users/signals.py
+# User model signal handlers for A-DIENYNAS
+# PURPOSE: Invalidate users.user_cache when roles, default_role, is_active or password change
+# UPDATES: Created together with the versioned user cache
+#          Version is bumped again on commit (concurrent reload before commit would cache the old row)
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .user_cache import TRACKED_FIELDS, bump_version
+
+User = get_user_model()
+
+SNAPSHOT_ATTR = '_user_cache_snapshot'
+
+
+def _invalidate(user_id):
+    bump_version(user_id)
+    # Lygiagreti užklausa galėjo užkrauti seną eilutę dar nepatvirtintos transakcijos metu
+    transaction.on_commit(lambda: bump_version(user_id))
+
+
+def _snapshot(instance):
+    # Naudojamas __dict__, kad atidėti (deferred) laukai nebūtų užkraunami iš DB
+    return tuple(instance.__dict__.get(field) for field in TRACKED_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_tracked_fields(sender, instance, **kwargs):
+    """Įsimena sekamų laukų reikšmes, kad post_save galėtų aptikti pakeitimus"""
+    setattr(instance, SNAPSHOT_ATTR, _snapshot(instance))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_cache_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Pakeičia vartotojo talpyklos versiją, jei pasikeitė sekami laukai"""
+    current = _snapshot(instance)
+    if not created and current != getattr(instance, SNAPSHOT_ATTR, None):
+        _invalidate(instance.pk)
+    setattr(instance, SNAPSHOT_ATTR, current)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_user_cache_on_delete(sender, instance, **kwargs):
+    _invalidate(instance.pk)
@@ -1,4 +1,242 @@
 # backend/users/tests.py
-from django.test import TestCase
+from django.test import Client, TestCase, RequestFactory, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .auth_context import get_auth_context
+from .auth_logging_middleware import AuthLoggingMiddleware
+from .authentication import JWTCookieAuthentication
+from .backends import JWTAuthenticationBackend
+from .enhanced_logging_middleware import EnhancedLoggingMiddleware
+from .request_logging import PathSampler
+from .user_cache import user_cache
+
+User = get_user_model()
+
+
+class AuthContextTestCase(TestCase):
+    """
+    Užklausos autentifikacijos konteksto testai - token'as dekoduojamas ir vartotojas
+    užkraunamas tik vieną kartą per užklausą
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(
+            email='mentor@test.com',
+            password='testpass123',
+            first_name='Mentor',
+            last_name='User',
+            roles=['mentor', 'curator'],
+            default_role='mentor'
+        )
+
+    def _cookie_request(self, current_role=None):
+        token = AccessToken.for_user(self.user)
+        if current_role:
+            token['current_role'] = current_role
+        request = self.factory.get('/api/users/me/')
+        request.COOKIES['access_token'] = str(token)
+        return request
+
+    def test_context_is_shared_between_django_and_drf_request(self):
+        request = self._cookie_request()
+        self.assertIs(get_auth_context(request), get_auth_context(Request(request)))
+
+    def test_backend_and_drf_authentication_share_one_user_query(self):
+        request = self._cookie_request(current_role='curator')
+        with self.assertNumQueries(1):
+            backend_user = JWTAuthenticationBackend().authenticate(request)
+            drf_user, token = JWTCookieAuthentication().authenticate(Request(request))
+            role = get_auth_context(request).role_for(drf_user)
+        self.assertIs(backend_user, drf_user)
+        self.assertEqual(token['current_role'], 'curator')
+        self.assertEqual(role, 'curator')
+
+    def test_role_not_in_user_roles_falls_back_to_default(self):
+        request = self._cookie_request(current_role='manager')
+        context = get_auth_context(request)
+        self.assertEqual(context.role_for(context.user), 'mentor')
+
+    def test_missing_user_raises_authentication_failed(self):
+        request = self._cookie_request()
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            JWTCookieAuthentication().authenticate(Request(request))
+
+    def test_header_token_is_not_used_by_session_backend(self):
+        token = AccessToken.for_user(self.user)
+        request = self.factory.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertIsNone(JWTAuthenticationBackend().authenticate(request))
+        user, _ = JWTCookieAuthentication().authenticate(Request(request))
+        self.assertEqual(user, self.user)
+
+
+class UserCacheTestCase(TestCase):
+    """
+    Versijuotos vartotojų talpyklos testai
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            password='testpass123',
+            first_name='Student',
+            last_name='User',
+            roles=['student'],
+            default_role='student'
+        )
+
+    def test_second_lookup_is_served_from_cache(self):
+        with self.assertNumQueries(1):
+            user_cache.get_user(self.user.pk)
+            cached = user_cache.get_user(self.user.pk)
+        self.assertEqual(cached.roles, ['student'])
+        self.assertEqual(user_cache.stats()['hits'], 1)
+
+    def test_cached_user_is_a_copy(self):
+        first = user_cache.get_user(self.user.pk)
+        first.backend = 'users.backends.JWTAuthenticationBackend'
+        self.assertFalse(hasattr(user_cache.get_user(self.user.pk), 'backend'))
+
+    def test_role_change_invalidates_cache(self):
+        user_cache.get_user(self.user.pk)
+        user = User.objects.get(pk=self.user.pk)
+        user.roles = ['student', 'curator']
+        user.save()
+        self.assertEqual(user_cache.get_user(self.user.pk).roles, ['student', 'curator'])
+
+    def test_reload_before_commit_is_invalidated_on_commit(self):
+        stale_copy = User.objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            user = User.objects.get(pk=self.user.pk)
+            user.is_active = False
+            user.save()
+            # Kitas worker'is (dar nematantis pakeitimo) užkrauna seną eilutę su nauja versija
+            user_cache.get_user(self.user.pk, loader=lambda user_id: stale_copy)
+            self.assertTrue(user_cache.get_user(self.user.pk).is_active)
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(user_cache.get_user(self.user.pk).is_active)
+
+    def test_shared_version_change_marks_entry_stale(self):
+        user_cache.get_user(self.user.pk)
+        # Kitas worker'is pakeitė versiją bendroje talpykloje
+        cache.set(f'users:user_version:{self.user.pk}', 'other-worker', None)
+        with self.assertNumQueries(1):
+            user_cache.get_user(self.user.pk)
+        self.assertEqual(user_cache.stats()['stale'], 1)
+
+    def test_unrelated_save_keeps_cache(self):
+        user_cache.get_user(self.user.pk)
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            user_cache.get_user(self.user.pk)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class AuthFastPathTestCase(TestCase):
+    """
+    AuthFastPathMiddleware testai - atsakymas turi sutapti su įprastu keliu
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            email='curator@test.com',
+            password='testpass123',
+            first_name='Curator',
+            last_name='User',
+            roles=['curator', 'mentor'],
+            default_role='curator'
+        )
+        token = AccessToken.for_user(self.user)
+        token['current_role'] = 'mentor'
+        self.raw_token = str(token)
+
+    def _get(self, path, fast_path):
+        with override_settings(AUTH_FAST_PATH_ENABLED=fast_path):
+            client = Client()
+            client.cookies['access_token'] = self.raw_token
+            return client.get(path)
+
+    def test_fast_path_matches_regular_path(self):
+        for path in ('/api/users/auth/validate/', '/api/users/me/'):
+            regular = self._get(path, fast_path=False)
+            fast = self._get(path, fast_path=True)
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(fast.json(), regular.json())
+
+    def test_validate_auth_fast_path_uses_token_role_without_queries(self):
+        user_cache.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            response = self._get('/api/users/auth/validate/', fast_path=True)
+        self.assertEqual(response.json()['current_role'], 'mentor')
+
+    def test_missing_token_falls_back_to_regular_path(self):
+        with override_settings(AUTH_FAST_PATH_ENABLED=True):
+            response = Client().get('/api/users/auth/validate/')
+        self.assertEqual(response.status_code, 401)
+
+
+class RequestLoggingTestCase(TestCase):
+    """
+    Užklausų log'inimo middleware testai - be papildomų DB užklausų ir turinio kopijavimo
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(
+            email='manager@test.com',
+            password='testpass123',
+            first_name='Manager',
+            last_name='User',
+            roles=['manager'],
+            default_role='manager'
+        )
+
+    def _request(self, path='/api/plans/imu-plans/'):
+        request = self.factory.get(path)
+        request.user = self.user
+        request.current_role = 'manager'
+        return request
+
+    def test_logging_adds_no_queries(self):
+        middleware = EnhancedLoggingMiddleware(lambda request: HttpResponse(b'{}'))
+        auth_middleware = AuthLoggingMiddleware(lambda request: HttpResponse(b'{}'))
+        with self.assertNumQueries(0), self.assertLogs('users.enhanced_logging_middleware', 'INFO') as logs:
+            middleware(self._request())
+            auth_middleware(self._request('/api/users/logout/'))
+        self.assertIn('manager@test.com', logs.output[0])
+        self.assertIn('Role: manager', logs.output[0])
+
+    def test_streaming_response_size_is_counted_while_streaming(self):
+        middleware = EnhancedLoggingMiddleware(
+            lambda request: StreamingHttpResponse(iter([b'abc', b'de']))
+        )
+        with self.assertLogs('users.enhanced_logging_middleware', 'INFO') as logs:
+            response = middleware(self._request())
+            self.assertEqual(len(logs.output), 1)
+            self.assertEqual(b''.join(response.streaming_content), b'abcde')
+        self.assertIn('Size: 5 bytes', logs.output[-1])
+
+    def test_path_sampler_uses_longest_prefix(self):
+        sampler = PathSampler({
+            'DEFAULT_SAMPLE_RATE': 1.0,
+            'SAMPLE_RATES': {'/api/': 0.5, '/api/health/': 0.0},
+        })
+        self.assertEqual(sampler.rate_for('/api/health/detailed/'), 0.0)
+        self.assertEqual(sampler.rate_for('/api/plans/'), 0.5)
+        self.assertEqual(sampler.rate_for('/admin/'), 1.0)
+        self.assertFalse(sampler.should_log('/api/health/'))
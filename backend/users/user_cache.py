@@ -0,0 +1,155 @@
+# /backend/users/user_cache.py
+# Versioned in-process user cache for A-DIENYNAS authentication paths
+# PURPOSE: Avoid loading the same User row from DB on every authenticated request
+# UPDATES: Created for AuthContext (JWTAuthenticationBackend, JWTCookieAuthentication, RoleValidationMiddleware)
+#          Invalidation across gunicorn workers via shared version key in Django cache (Redis)
+
+import copy
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Bendro (tarp worker'ių) versijos rakto šablonas
+VERSION_KEY = 'users:user_version:{user_id}'
+
+# Laukai, kuriems pasikeitus vartotojo talpyklos įrašas tampa negaliojantis
+# (autorizacijos laukai + /me/ grąžinami duomenys; last_login pakeitimai talpyklos neliečia)
+TRACKED_FIELDS = (
+    'roles', 'default_role', 'is_active', 'is_staff', 'is_superuser', 'password',
+    'email', 'first_name', 'last_name',
+)
+
+
+def _version_key(user_id):
+    return VERSION_KEY.format(user_id=user_id)
+
+
+def get_version(user_id):
+    """Grąžina bendrą vartotojo versiją ('' jei versija dar nenustatyta)"""
+    try:
+        return cache.get(_version_key(user_id), '')
+    except Exception as e:
+        # Talpyklos klaida neturi sugadinti autentifikacijos - versija laikoma nežinoma
+        logger.warning(f"User cache version lookup failed for user {user_id}: {str(e)}")
+        return None
+
+
+def bump_version(user_id):
+    """
+    Pakeičia bendrą vartotojo versiją - visi worker'iai kitos užklausos metu
+    vartotoją užkraus iš DB iš naujo
+    """
+    try:
+        cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.error(f"User cache version bump failed for user {user_id}: {str(e)}")
+    user_cache.invalidate(user_id)
+
+
+class UserCache:
+    """
+    Proceso vartotojų talpykla (LRU + TTL).
+    Įrašas galioja tol, kol nepasibaigęs TTL ir jo versija sutampa su bendra versija.
+    Grąžinama vartotojo objekto kopija, kad užklausos nedalintų to paties objekto.
+    """
+
+    def __init__(self, max_size=2048, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (user, version, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+
+    def get_user(self, user_id, loader=None):
+        """
+        Grąžina vartotoją pagal ID iš talpyklos arba per loader (numatytai - DB).
+        Grąžina None, jei vartotojas nerastas.
+        """
+        loader = loader or self._load_from_db
+        if not getattr(settings, 'USER_CACHE', {}).get('ENABLED', True):
+            return loader(user_id)
+
+        # Versija skaitoma PRIEŠ užkraunant iš DB, kad lygiagretus pakeitimas nebūtų prarastas
+        version = get_version(user_id)
+        if version is None:
+            return loader(user_id)
+
+        # JWT user_id claim yra str, o instance.pk - int, todėl raktas normalizuojamas
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                user, entry_version, expires_at = entry
+                if entry_version != version:
+                    self.stale += 1
+                    del self._entries[key]
+                elif expires_at <= now:
+                    self.expired += 1
+                    del self._entries[key]
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return copy.copy(user)
+            self.misses += 1
+
+        user = loader(user_id)
+        if user is None:
+            return None
+
+        with self._lock:
+            self._entries[key] = (copy.copy(user), version, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.stale = self.expired = 0
+
+    def stats(self):
+        """Talpyklos statistika (hit rate skaitikliai)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'expired': self.expired,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _load_from_db(user_id):
+        User = get_user_model()
+        try:
+            return User.objects.get(pk=user_id)
+        except (User.DoesNotExist, ValueError, TypeError):
+            return None
+
+
+_config = getattr(settings, 'USER_CACHE', {})
+user_cache = UserCache(
+    max_size=_config.get('MAX_SIZE', 2048),
+    ttl=_config.get('TTL', 300),
+)
@@ -246,12 +246,11 @@ def student_details(request, student_id):
     Studento detalių endpoint'as su role-based prieigos kontrole
     CHANGE: Pridėtas studento detalių endpoint'as su saugumo apsauga
     """
-    from crm.models import StudentCurator
-    
+    from crm.scope import get_role_scope
+
     # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header
-    current_role = getattr(request, 'current_role', None)
-    if not current_role:
-        current_role = getattr(request.user, 'default_role', None)
+    scope = get_role_scope(request)
+    current_role = scope.role
     
     # Server-side role-based access control
     if current_role not in ['curator', 'manager']:
@@ -271,7 +270,7 @@ def student_details(request, student_id):
         
         # Curator gali matyti tik savo priskirtus studentus
         if current_role == 'curator':
-            if not StudentCurator.objects.filter(curator=request.user, student=student).exists():
+            if not scope.can_view_student(student.pk):
                 return Response({
                     'error': 'Prieiga uždrausta. Galite peržiūrėti tik savo priskirtų studentų duomenis.'
                 }, status=403)
@@ -295,6 +294,20 @@ def student_details(request, student_id):
 # Backend'as tikrina ar role egzistuoja token'e per RoleValidationMiddleware
 
 
+def build_validate_auth_payload(user, current_role):
+    """
+    validate_auth atsakymo turinys - naudojamas ir view, ir AuthFastPathMiddleware
+    """
+    return {
+        'valid': True,
+        'user_id': user.id,
+        'email': user.email,
+        'roles': user.roles,
+        'default_role': user.default_role,
+        'current_role': current_role or user.default_role,  # SEC-011: Add current role from middleware
+    }
+
+
 @api_view(['GET'])
 def validate_auth(request):
     """
@@ -307,17 +320,8 @@ def validate_auth(request):
         if request.user.is_authenticated:
             # SEC-011: Get current role from middleware
             current_role = getattr(request, 'current_role', None)
-            if not current_role:
-                current_role = request.user.default_role
             
-            return Response({
-                'valid': True,
-                'user_id': request.user.id,
-                'email': request.user.email,
-                'roles': request.user.roles,
-                'default_role': request.user.default_role,
-                'current_role': current_role,  # SEC-011: Add current role from middleware
-            }, status=200)
+            return Response(build_validate_auth_payload(request.user, current_role), status=200)
         else:
             return Response({
                 'valid': False,
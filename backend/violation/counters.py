@@ -0,0 +1,57 @@
+# backend/violation/counters.py
+
+# Per-student violation counters for A-DIENYNAS system
+# Assigns Violation.violation_count from StudentViolationCounter with one atomic upsert instead of COUNT per insert
+# CHANGE: Created - INSERT ... ON CONFLICT DO UPDATE ... RETURNING (row lock: concurrent inserts for the same
+#         student get distinct numbers), decremented by violation.signals on delete, rebuilt from Violation table
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+
+from .models import StudentViolationCounter, Violation
+
+# Statusai, įskaitomi į mokinio pažeidimų skaičių (kaip Violation.get_student_violation_count)
+COUNTED_STATUSES = [Violation.Status.PENDING, Violation.Status.COMPLETED]
+
+
+def next_violation_count(student_id):
+    """
+    Padidina mokinio skaitiklį ir grąžina naujo pažeidimo eilės numerį - viena užklausa.
+    Kviesti transakcijoje kartu su pažeidimo INSERT.
+    """
+    quote = connection.ops.quote_name
+    table = quote(StudentViolationCounter._meta.db_table)
+    student = quote(StudentViolationCounter._meta.get_field('student').column)
+    count = quote(StudentViolationCounter._meta.get_field('violation_count').column)
+    sql = (
+        f"INSERT INTO {table} ({student}, {count}) VALUES (%s, 1) "
+        f"ON CONFLICT ({student}) DO UPDATE SET {count} = {table}.{count} + 1 "
+        f"RETURNING {count}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [student_id])
+        return cursor.fetchone()[0]
+
+
+def release_violation_count(student_id):
+    """Ištrintas pažeidimas - mokinio skaitiklis sumažinamas (ne mažiau 0)"""
+    StudentViolationCounter.objects.filter(student_id=student_id, violation_count__gt=0).update(
+        violation_count=F('violation_count') - 1
+    )
+
+
+def rebuild_counters(student_ids=None):
+    """Skaitiklių perkūrimas iš Violation lentelės (visų arba nurodytų mokinių) - viena GROUP BY"""
+    violations = Violation.objects.filter(status__in=COUNTED_STATUSES)
+    existing = StudentViolationCounter.objects.all()
+    if student_ids is not None:
+        violations = violations.filter(student_id__in=student_ids)
+        existing = existing.filter(student_id__in=student_ids)
+    counters = [
+        StudentViolationCounter(student_id=row['student_id'], violation_count=row['total'])
+        for row in violations.order_by().values('student_id').annotate(total=Count('id'))
+    ]
+    with transaction.atomic():
+        existing.delete()
+        StudentViolationCounter.objects.bulk_create(counters, batch_size=1000)
+    return len(counters)
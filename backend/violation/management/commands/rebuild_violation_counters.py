@@ -0,0 +1,31 @@
+# backend/violation/management/commands/rebuild_violation_counters.py
+
+# Django management komanda mokinių pažeidimų skaitiklių (StudentViolationCounter) perkūrimui
+# CHANGE: Sukurta komanda - skaitikliai perskaičiuojami iš Violation lentelės (violation.counters)
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from violation.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    """
+    Perkuria StudentViolationCounter įrašus iš pažeidimų (pvz. po tiesioginių DB pakeitimų)
+    """
+    help = 'Perkuria mokinių pažeidimų skaitiklius'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--student', type=int, action='append', dest='students',
+            help='Perkurti tik nurodyto mokinio skaitiklį (galima kartoti)'
+        )
+
+    def handle(self, *args, **options):
+        """Pagrindinė komandos logika"""
+        start = time.perf_counter()
+        count = rebuild_counters(student_ids=options['students'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Perkurta {count} skaitiklių ({time.perf_counter() - start:.2f} s)'
+        ))
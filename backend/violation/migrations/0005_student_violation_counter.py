@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_counters(apps, schema_editor):
+    """Pradiniai skaitikliai iš esamų pažeidimų (vėliau palaiko violation.counters)"""
+    Violation = apps.get_model('violation', 'Violation')
+    StudentViolationCounter = apps.get_model('violation', 'StudentViolationCounter')
+    grouped = Violation.objects.filter(status__in=['pending', 'completed']).order_by().values('student_id').annotate(
+        total=Count('id'),
+    )
+    StudentViolationCounter.objects.bulk_create(
+        [StudentViolationCounter(student_id=row['student_id'], violation_count=row['total']) for row in grouped],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_default_role'),
+        ('violation', '0004_remove_amount_currency_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentViolationCounter',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='violation_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Mokinys')),
+                ('violation_count', models.PositiveIntegerField(default=0, verbose_name='Pažeidimų skaičius')),
+            ],
+            options={
+                'verbose_name': 'Mokinio pažeidimų skaitiklis',
+                'verbose_name_plural': 'Mokinių pažeidimų skaitikliai',
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
@@ -4,7 +4,7 @@
 # Defines violation management models for tracking student debts and violations with penalty fee logic
 # CHANGE: Updated violation application with penalty fee logic and violation ranges configuration
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 
@@ -136,18 +136,11 @@ class ViolationRange(models.Model):
     def get_penalty_for_violation_count(cls, count):
         """
         Grąžina mokesčio dydį pagal pažeidimų skaičių
+        CHANGE: Paieška atmintyje laikomoje aktyvių rėžių lentelėje (violation.ranges), be užklausos
         """
-        try:
-            range_obj = cls.objects.filter(
-                is_active=True,
-                min_violations__lte=count
-            ).filter(
-                models.Q(max_violations__isnull=True) | models.Q(max_violations__gte=count)
-            ).order_by('-min_violations').first()
-            
-            return range_obj.penalty_amount if range_obj else 0
-        except cls.DoesNotExist:
-            return 0
+        from .ranges import range_table
+
+        return range_table.penalty(count)
 
 
 class Violation(models.Model):
@@ -279,20 +272,29 @@ class Violation(models.Model):
         elif self.penalty_status != self.PenaltyStatus.PAID:
             self.penalty_paid_at = None
             
-        # Automatiškai nustato mokesčio statusą jei mokesčio dydis 0€
+        if self.pk:
+            self._apply_zero_penalty()
+            super().save(*args, **kwargs)
+            return
+
+        # Naujas įrašas: pažeidimų skaičius - atominis mokinio skaitiklio padidinimas (violation.counters),
+        # toje pačioje transakcijoje kaip INSERT (nepavykus įrašyti skaitiklis atšaukiamas)
+        from .counters import next_violation_count
+
+        with transaction.atomic():
+            self.violation_count = next_violation_count(self.student_id)
+            self.penalty_amount = ViolationRange.get_penalty_for_violation_count(self.violation_count)
+            self._apply_zero_penalty()
+            super().save(*args, **kwargs)
+
+    def _apply_zero_penalty(self):
+        """Automatiškai nustato mokesčio statusą jei mokesčio dydis 0€"""
         if self.penalty_amount == 0:
             self.penalty_status = self.PenaltyStatus.PAID
-            
-        # Skaičiuoja pažeidimų skaičių mokiniui
-        if not self.pk:  # Jei naujas įrašas
-            self.violation_count = self.get_student_violation_count()
-            self.penalty_amount = ViolationRange.get_penalty_for_violation_count(self.violation_count)
-            
-        super().save(*args, **kwargs)
 
     def get_student_violation_count(self):
         """
-        Grąžina mokinio pažeidimų skaičių
+        Grąžina mokinio pažeidimų skaičių (COUNT užklausa; naujiems įrašams - StudentViolationCounter)
         """
         return Violation.objects.filter(
             student=self.student,
@@ -353,4 +355,29 @@ class Violation(models.Model):
         """
         self.violation_count = self.get_student_violation_count()
         self.penalty_amount = ViolationRange.get_penalty_for_violation_count(self.violation_count)
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+class StudentViolationCounter(models.Model):
+    """
+    Mokinio pažeidimų skaitiklis: naujo pažeidimo eilės numeris (violation_count) gaunamas atominiu
+    padidinimu vietoj COUNT užklausos, mažinamas ištrynus pažeidimą (violation.counters / violation.signals)
+    """
+    student = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='violation_counter',
+        verbose_name="Mokinys"
+    )
+    violation_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Pažeidimų skaičius"
+    )
+
+    class Meta:
+        verbose_name = "Mokinio pažeidimų skaitiklis"
+        verbose_name_plural = "Mokinių pažeidimų skaitikliai"
+
+    def __str__(self):
+        return f"{self.student_id}: {self.violation_count}"
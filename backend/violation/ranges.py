@@ -0,0 +1,91 @@
+# backend/violation/ranges.py
+
+# Process-wide violation range table for A-DIENYNAS system
+# Maps violation count -> penalty amount from active ViolationRange rows kept in memory (no query per lookup)
+# CHANGE: Created for ViolationRange.get_penalty_for_violation_count. Invalidation across gunicorn workers via
+#         shared version key in Django cache, bumped by violation.signals when ViolationRange rows change
+
+import logging
+import threading
+import uuid
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Bendro (tarp worker'ių) versijos raktas
+VERSION_KEY = 'violation:ranges:version'
+
+
+def get_version():
+    """Grąžina bendrą rėžių versiją ('' jei dar nenustatyta, None - talpyklos klaida)"""
+    try:
+        return cache.get(VERSION_KEY, '')
+    except Exception as e:
+        logger.warning(f"Violation range version lookup failed: {str(e)}")
+        return None
+
+
+def bump_version():
+    """Pakeičia bendrą versiją - visi worker'iai kitos paieškos metu rėžius užkraus iš DB iš naujo"""
+    try:
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.error(f"Violation range version bump failed: {str(e)}")
+    range_table.invalidate()
+
+
+class RangeTable:
+    """
+    Aktyvių pažeidimų rėžių lentelė: (min, max, suma) surikiuoti pagal min_violations.
+    Kaip ir anksčiau, kai keli rėžiai apima skaičių - laimi didžiausias min_violations; neatitinka nė vienas - 0.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._starts = []
+        self._ranges = []
+        self.loads = 0
+
+    def _load(self):
+        from .models import ViolationRange
+
+        ranges = list(
+            ViolationRange.objects.filter(is_active=True).order_by('min_violations', 'pk')
+            .values_list('min_violations', 'max_violations', 'penalty_amount')
+        )
+        return [row[0] for row in ranges], ranges
+
+    def _current(self):
+        version = get_version()
+        if version is None:
+            return self._load()
+        with self._lock:
+            if self._version is not None and self._version == version:
+                return self._starts, self._ranges
+        # Versija skaitoma PRIEŠ užkraunant iš DB, kad lygiagretus pakeitimas nebūtų prarastas
+        starts, ranges = self._load()
+        with self._lock:
+            self._starts, self._ranges, self._version = starts, ranges, version
+            self.loads += 1
+        return starts, ranges
+
+    def penalty(self, count):
+        starts, ranges = self._current()
+        # Rėžiai su min_violations <= count - nuo didžiausio min; pirmas apimantis count laimi
+        for index in range(bisect_right(starts, count) - 1, -1, -1):
+            _, maximum, amount = ranges[index]
+            if maximum is None or count <= maximum:
+                return amount
+        return Decimal('0')
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._starts, self._ranges = [], []
+
+
+range_table = RangeTable()
@@ -160,31 +160,11 @@ class ViolationCreateSerializer(serializers.ModelSerializer):
         return value
     
     def create(self, validated_data):
-        """Sukuria naują pažeidimą su automatiniais skaičiavimais"""
-        # Gauti mokinio ID
-        student_id = validated_data['student'].id
-        
-        # Suskaičiuoti mokinio pažeidimų skaičių
-        violation_count = Violation.objects.filter(student_id=student_id).count()
-        next_violation_count = violation_count + 1
-        
-        # Gauti pažeidimų diapazonus
-        from .models import ViolationRange
-        violation_ranges = ViolationRange.objects.filter(is_active=True).order_by('min_violations')
-        
-        # Rasti tinkamą diapazoną
-        penalty_amount = 0
-        for range_obj in violation_ranges:
-            if (next_violation_count >= range_obj.min_violations and 
-                (range_obj.max_violations is None or next_violation_count <= range_obj.max_violations)):
-                penalty_amount = range_obj.penalty_amount
-                break
-        
-        # Pridėti automatiškai apskaičiuotus laukus
-        validated_data['violation_count'] = next_violation_count
-        validated_data['penalty_amount'] = penalty_amount
+        """
+        Sukuria naują pažeidimą su automatiniais skaičiavimais
+        CHANGE: violation_count ir penalty_amount priskiria Violation.save() (mokinio skaitiklis + rėžių lentelė)
+        """
         validated_data['created_by'] = self.context['request'].user
-        
         return super().create(validated_data)
 
 
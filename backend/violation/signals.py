@@ -0,0 +1,39 @@
+# backend/violation/signals.py
+
+# Violation signal handlers for A-DIENYNAS system
+# Invalidates cached violation statistics (violation.stats) when violations or categories change
+# CHANGE: Created together with grouped, cached violation statistics
+# CHANGE: Decrements per-student violation counters on delete, invalidates in-memory violation range table
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import ranges
+from .counters import release_violation_count
+from .models import Violation, ViolationCategory, ViolationRange
+from .stats import bump_version
+
+
+@receiver(post_save, sender=Violation)
+@receiver(post_delete, sender=Violation)
+@receiver(post_save, sender=ViolationCategory)
+@receiver(post_delete, sender=ViolationCategory)
+def invalidate_violation_stats(sender, instance, **kwargs):
+    bump_version()
+    # Lygiagreti užklausa galėjo užpildyti talpyklą dar nepatvirtintos transakcijos metu
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_delete, sender=Violation)
+def release_student_violation_count(sender, instance, **kwargs):
+    if instance.status in (Violation.Status.PENDING, Violation.Status.COMPLETED):
+        release_violation_count(instance.student_id)
+
+
+@receiver(post_save, sender=ViolationRange)
+@receiver(post_delete, sender=ViolationRange)
+def invalidate_violation_ranges(sender, instance, **kwargs):
+    ranges.bump_version()
+    # Kiti worker'iai galėjo perskaityti senus rėžius dar nepatvirtintos transakcijos metu
+    transaction.on_commit(ranges.bump_version)
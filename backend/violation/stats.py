@@ -0,0 +1,185 @@
+# backend/violation/stats.py
+
+# Violation statistics aggregation for A-DIENYNAS system
+# Builds violation_stats / violation_category_stats from grouped queries with conditional aggregation
+# CHANGE: Created - one GROUP BY category + one GROUP BY month (TruncMonth) instead of queries per category
+#         and per month; results cached per filter parameters, invalidated by violation.signals
+
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import Violation, ViolationCategory
+
+logger = logging.getLogger(__name__)
+
+# Bendra (tarp worker'ių) pažeidimų duomenų versija - pasikeitus pažeidimams raktai nebegalioja
+VERSION_KEY = 'violation:stats:version'
+CACHE_KEY = 'violation:stats:{version}:{kind}:{params}'
+
+MONTHS = 12
+
+ZERO = Value(0, output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def get_version():
+    try:
+        return cache.get(VERSION_KEY, '')
+    except Exception as e:
+        logger.warning(f"Violation stats version lookup failed: {str(e)}")
+        return None
+
+
+def bump_version():
+    """Pasikeitė pažeidimai ar kategorijos - visų worker'ių statistikos talpyklos įrašai nebegalioja"""
+    try:
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.error(f"Violation stats version bump failed: {str(e)}")
+
+
+def cached(kind, params, compute):
+    """compute() rezultatas talpykloje pagal filtrų parametrus (VIOLATION_STATS['CACHE_TTL'] sekundžių)"""
+    version = get_version()
+    ttl = settings.VIOLATION_STATS['CACHE_TTL']
+    if version is None or not ttl:
+        return compute()
+    digest = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:16]
+    key = CACHE_KEY.format(version=version, kind=kind, params=digest)
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, ttl)
+    return data
+
+
+def filter_violations(queryset, year=None, month=None, week=None):
+    """year/month/week filtrai kaip anksčiau; netinkamos reikšmės - ValueError"""
+    if year:
+        queryset = queryset.filter(created_at__year=int(year))
+    if month:
+        queryset = queryset.filter(created_at__month=int(month))
+    if week:
+        # Apskaičiuoja savaitės pradžią
+        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(weeks=int(week)))
+    return queryset
+
+
+def _counts():
+    return {
+        'total': Count('id'),
+        'completed': Count('id', filter=Q(status=Violation.Status.COMPLETED)),
+        'pending': Count('id', filter=Q(status=Violation.Status.PENDING)),
+        'penalty_total': Coalesce(Sum('penalty_amount'), ZERO),
+        'paid_penalty_total': Coalesce(
+            Sum('penalty_amount', filter=Q(penalty_status=Violation.PenaltyStatus.PAID)), ZERO
+        ),
+    }
+
+
+def category_totals(queryset):
+    """{kategorija: {'total', 'completed', 'pending', 'penalty_total', 'paid_penalty_total'}} viena GROUP BY"""
+    return {
+        row.pop('category'): row
+        for row in queryset.order_by().values('category').annotate(**_counts())
+    }
+
+
+def _month_starts(now):
+    """Paskutinių MONTHS kalendorinių mėnesių pradžios (nuo einamojo atgal)"""
+    year, month = now.year, now.month
+    starts = []
+    for _ in range(MONTHS):
+        starts.append((year, month))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return starts
+
+
+def monthly_totals(queryset):
+    """Paskutinių 12 kalendorinių mėnesių statistika viena GROUP BY TruncMonth užklausa"""
+    now = timezone.localtime()
+    months = _month_starts(now)
+    first_year, first_month = months[-1]
+    since = timezone.make_aware(datetime(first_year, first_month, 1))
+    grouped = {
+        (row['month'].year, row['month'].month): row
+        for row in queryset.filter(created_at__gte=since).order_by()
+        .annotate(month=TruncMonth('created_at')).values('month')
+        .annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status=Violation.Status.COMPLETED)),
+            penalty_total=Coalesce(Sum('penalty_amount'), ZERO),
+        )
+    }
+    monthly = {}
+    for year, month in months:
+        row = grouped.get((year, month), {})
+        monthly[f"{year}-{month:02d}"] = {
+            'total': row.get('total', 0),
+            'completed': row.get('completed', 0),
+            'penalty_amount': row.get('penalty_total', 0),
+        }
+    return monthly
+
+
+def violation_stats(queryset):
+    """Bendra statistika: viena GROUP BY kategorijai (sumos iš jos), viena - mėnesiams, aktyvios kategorijos"""
+    by_category = category_totals(queryset)
+    total_violations = sum(row['total'] for row in by_category.values())
+    completed_violations = sum(row['completed'] for row in by_category.values())
+    pending_violations = sum(row['pending'] for row in by_category.values())
+    total_penalty_amount = sum(row['penalty_total'] for row in by_category.values())
+    paid_penalty_amount = sum(row['paid_penalty_total'] for row in by_category.values())
+
+    category_stats = {}
+    for name, color_type in ViolationCategory.objects.filter(is_active=True).values_list('name', 'color_type'):
+        row = by_category.get(name, {})
+        category_stats[name] = {
+            'total': row.get('total', 0),
+            'completed': row.get('completed', 0),
+            'pending': row.get('pending', 0),
+            'color_type': color_type,
+            'penalty_amount': row.get('penalty_total', 0),
+        }
+
+    return {
+        'total_violations': total_violations,
+        'completed_violations': completed_violations,
+        'pending_violations': pending_violations,
+        'total_penalty_amount': total_penalty_amount,
+        'paid_penalty_amount': paid_penalty_amount,
+        'unpaid_penalty_amount': total_penalty_amount - paid_penalty_amount,
+        'completion_rate': round(completed_violations / total_violations * 100, 2) if total_violations else 0,
+        'penalty_payment_rate': (
+            round(paid_penalty_amount / total_penalty_amount * 100, 2) if total_penalty_amount else 0
+        ),
+        'category_stats': category_stats,
+        'monthly_stats': monthly_totals(queryset),
+    }
+
+
+def category_stats(queryset):
+    """Aktyvių kategorijų statistika viena GROUP BY užklausa"""
+    by_category = category_totals(queryset)
+    rows = []
+    for name, color_type in ViolationCategory.objects.filter(is_active=True).values_list('name', 'color_type'):
+        row = by_category.get(name, {})
+        total_count = row.get('total', 0)
+        completed_count = row.get('completed', 0)
+        rows.append({
+            'category_name': name,
+            'color_type': color_type,
+            'total_count': total_count,
+            'completed_count': completed_count,
+            'pending_count': total_count - completed_count,
+            'completion_rate': round(completed_count / total_count * 100, 2) if total_count else 0,
+            'penalty_amount': row.get('penalty_total', 0),
+        })
+    return rows
@@ -1,3 +1,212 @@
-from django.test import TestCase
+# backend/violation/tests.py
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.synthetic import build_synthetic_school, synthetic_users
+from core.testing import SyntheticDataTestCase
+from users.user_cache import user_cache
+
+from . import ranges, stats
+from .models import StudentViolationCounter, Violation, ViolationCategory, ViolationRange
+
+
+class ViolationStatsTestCase(SyntheticDataTestCase):
+    """
+    Pažeidimų statistikos (violation.stats) testai
+    """
+
+    school = {'students': 20, 'mentors': 2, 'weeks': 1, 'class_size': 5}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Pažeidimai skirtinguose mėnesiuose (31 d. mėnesiai ir metų riba)
+        now = timezone.localtime()
+        for index, violation in enumerate(Violation.objects.order_by('id')):
+            Violation.objects.filter(pk=violation.pk).update(created_at=now - timedelta(days=index * 23))
+
+    def _expected_month_keys(self):
+        now = timezone.localtime()
+        year, month, keys = now.year, now.month, []
+        for _ in range(12):
+            keys.append(f'{year}-{month:02d}')
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        return keys
+
+    def test_stats_match_per_row_computation(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/violations/stats/')
+        self.assertEqual(response.status_code, 200, response.content)
+        violation_queries = [query for query in queries.captured_queries if '"violation_violation"' in query['sql']]
+        self.assertEqual(len(violation_queries), 2)
+
+        data = response.json()
+        violations = list(Violation.objects.all())
+        completed = [violation for violation in violations if violation.status == Violation.Status.COMPLETED]
+        self.assertEqual(data['total_violations'], len(violations))
+        self.assertEqual(data['completed_violations'], len(completed))
+        self.assertEqual(Decimal(data['total_penalty_amount']), sum(v.penalty_amount for v in violations))
+        self.assertEqual(
+            Decimal(data['paid_penalty_amount']),
+            sum(v.penalty_amount for v in violations if v.penalty_status == Violation.PenaltyStatus.PAID)
+        )
+        for category in ViolationCategory.objects.filter(is_active=True):
+            in_category = [v for v in violations if v.category == category.name]
+            self.assertEqual(data['category_stats'][category.name]['total'], len(in_category))
+
+        self.assertEqual(list(data['monthly_stats']), self._expected_month_keys())
+        for key, month in data['monthly_stats'].items():
+            in_month = [
+                v for v in violations
+                if f'{timezone.localtime(v.created_at).year}-{timezone.localtime(v.created_at).month:02d}' == key
+            ]
+            self.assertEqual(month['total'], len(in_month), key)
+
+    def test_category_stats_and_filters(self):
+        year = timezone.localtime().year
+        response = self.client.get('/api/violations/category-stats/', {'year': year})
+        self.assertEqual(response.status_code, 200, response.content)
+        totals = {row['category_name']: row['total_count'] for row in response.json()}
+        for name, total in totals.items():
+            self.assertEqual(total, Violation.objects.filter(category=name, created_at__year=year).count())
+        self.assertEqual(self.client.get('/api/violations/stats/', {'week': 'x'}).status_code, 400)
+
+    def test_cached_until_violations_change(self):
+        first = self.client.get('/api/violations/stats/').json()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/violations/stats/').json(), first)
+        self.assertFalse([query for query in queries.captured_queries if '"violation_violation"' in query['sql']])
+
+        violation = Violation.objects.filter(status=Violation.Status.PENDING).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            violation.mark_as_completed()
+        data = self.client.get('/api/violations/stats/').json()
+        self.assertEqual(data['completed_violations'], first['completed_violations'] + 1)
+
+        ids = list(Violation.objects.filter(status=Violation.Status.PENDING).values_list('id', flat=True)[:2])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                '/api/violations/bulk_action/', {'action': 'mark_completed', 'violation_ids': ids},
+                content_type='application/json'
+            )
+        self.assertEqual(
+            self.client.get('/api/violations/stats/').json()['completed_violations'],
+            data['completed_violations'] + len(ids)
+        )
+
+
+class ViolationCounterTestCase(SyntheticDataTestCase):
+    """
+    Mokinio pažeidimų skaitiklio (violation.counters) ir rėžių lentelės (violation.ranges) testai
+    """
+
+    school = {'students': 10, 'mentors': 2, 'weeks': 1, 'class_size': 5}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.student = synthetic_users().filter(default_role='student').order_by('id').last()
+        cls.category = ViolationCategory.objects.filter(is_active=True).first()
+        ViolationRange.objects.all().delete()
+        ViolationRange.objects.create(name='Pirmi', min_violations=1, max_violations=2, penalty_amount=0)
+        ViolationRange.objects.create(name='Toliau', min_violations=3, penalty_amount=Decimal('5.00'))
+
+    def _create(self):
+        return self.client.post('/api/violations/', {
+            'student': self.student.id, 'category': self.category.name, 'description': 'Testas',
+            'todos': [{'text': 'Atlikti', 'completed': False}],
+        }, content_type='application/json')
+
+    def _counter(self):
+        return StudentViolationCounter.objects.get(student=self.student).violation_count
+
+    def test_counters_match_violations_after_synthetic_build(self):
+        for counter in StudentViolationCounter.objects.all():
+            self.assertEqual(
+                counter.violation_count,
+                Violation.objects.filter(student_id=counter.student_id).count()
+            )
+
+    def test_create_numbers_violations_without_count_or_range_queries(self):
+        existing = Violation.objects.filter(student=self.student).count()
+        self.assertEqual(self._create().status_code, 201)
+        with CaptureQueriesContext(connection) as queries:
+            response = self._create()
+        self.assertEqual(response.status_code, 201, response.content)
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse([query for query in sql if 'COUNT(' in query and '"violation_violation"' in query])
+        self.assertFalse([query for query in sql if '"violation_violationrange"' in query])
+
+        violations = list(Violation.objects.filter(student=self.student).order_by('id'))[existing:]
+        self.assertEqual([violation.violation_count for violation in violations], [existing + 1, existing + 2])
+        for violation in violations:
+            expected = Decimal('5.00') if violation.violation_count >= 3 else Decimal('0')
+            self.assertEqual(violation.penalty_amount, expected)
+            self.assertEqual(violation.penalty_status == Violation.PenaltyStatus.PAID, expected == 0)
+        self.assertEqual(self._counter(), existing + 2)
+
+    def test_delete_releases_count(self):
+        self._create()
+        self._create()
+        count = self._counter()
+        Violation.objects.filter(student=self.student).order_by('-id').first().delete()
+        self.assertEqual(self._counter(), count - 1)
+        ids = list(Violation.objects.filter(student=self.student).values_list('id', flat=True))
+        self.client.post(
+            '/api/violations/bulk_action/', {'action': 'delete', 'violation_ids': ids},
+            content_type='application/json'
+        )
+        self.assertEqual(self._counter(), 0)
+        self._create()
+        self.assertEqual(Violation.objects.get(student=self.student).violation_count, 1)
+
+    def test_range_changes_reload_table(self):
+        self.assertEqual(ViolationRange.get_penalty_for_violation_count(4), Decimal('5.00'))
+        loads = ranges.range_table.loads
+        self.assertEqual(ViolationRange.get_penalty_for_violation_count(10), Decimal('5.00'))
+        self.assertEqual(ranges.range_table.loads, loads)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ViolationRange.objects.create(name='Daug', min_violations=5, penalty_amount=Decimal('10.00'))
+        self.assertEqual(ViolationRange.get_penalty_for_violation_count(4), Decimal('5.00'))
+        self.assertEqual(ViolationRange.get_penalty_for_violation_count(10), Decimal('10.00'))
+        self.assertEqual(ViolationRange.get_penalty_for_violation_count(0), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ViolationRange.objects.filter(name='Daug').get().delete()
+        self.assertEqual(ViolationRange.get_penalty_for_violation_count(10), Decimal('5.00'))
+
+
+class ViolationBulkActionTransactionTestCase(TransactionTestCase):
+    """
+    bulk_action be ATOMIC_REQUESTS: statistikos versija keičiama tik po patvirtintų pakeitimų
+    """
+
+    def test_stats_version_is_bumped_after_update(self):
+        cache.clear()
+        user_cache.clear()
+        build_synthetic_school(students=10, mentors=1, weeks=1, class_size=5)
+        manager = synthetic_users().filter(default_role='manager').first()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(manager))
+        ids = list(Violation.objects.filter(status=Violation.Status.PENDING).values_list('id', flat=True))
+        seen = []
+
+        def bump_version():
+            seen.append(Violation.objects.filter(id__in=ids, status=Violation.Status.PENDING).count())
+
+        with mock.patch.object(stats, 'bump_version', bump_version):
+            response = self.client.post(
+                '/api/violations/bulk_action/', {'action': 'mark_completed', 'violation_ids': ids},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(seen, [0])
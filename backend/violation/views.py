@@ -8,11 +8,11 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Q
-from django.utils import timezone
-from datetime import datetime, timedelta
+from django.db import transaction
 from django.contrib.auth import get_user_model
+from crm.scope import get_role_scope
 
+from . import stats
 from .models import ViolationCategory, ViolationRange, Violation
 from .serializers import (
     ViolationCategorySerializer, ViolationRangeSerializer,
@@ -134,36 +134,35 @@ class ViolationViewSet(viewsets.ModelViewSet):
         """Grąžina pažeidimus pagal vartotojo dabartinę rolę"""
         user = self.request.user
         
-        # SEC-011: Naudojame server-side role validation vietoj manipuliuojamo header
-        current_role = getattr(self.request, 'current_role', None)
-        
-        # Jei nėra header, naudoti default_role
-        if not current_role:
-            current_role = user.default_role
+        # SEC-011: validuota rolė ir matomumo sritis - vienas scope per užklausą
+        scope = get_role_scope(self.request)
+        current_role = scope.role
         
         if current_role == 'manager':
             # Vadovai mato visus pažeidimus
-            return Violation.objects.all().order_by('-created_at')
+            queryset = Violation.objects.all()
         
         elif current_role == 'curator':
             # Kuratoriai mato visus pažeidimus
-            return Violation.objects.all().order_by('-created_at')
+            queryset = Violation.objects.all()
         
         elif current_role == 'mentor':
             # Mentoriai mato tik savo sukurtus pažeidimus
-            return Violation.objects.filter(created_by=user).order_by('-created_at')
+            queryset = Violation.objects.filter(created_by=user)
         
         elif current_role == 'parent':
             # Tėvai mato tik savo vaikų pažeidimus
-            from crm.models import StudentParent
-            child_ids = StudentParent.objects.filter(parent=user).values_list('student_id', flat=True)
-            return Violation.objects.filter(student_id__in=child_ids).order_by('-created_at')
+            queryset = Violation.objects.filter(student_id__in=scope.children_ids)
         
         elif current_role == 'student':
             # Mokiniai mato tik savo pažeidimus
-            return Violation.objects.filter(student=user).order_by('-created_at')
+            queryset = Violation.objects.filter(student=user)
+        
+        else:
+            return Violation.objects.none()
         
-        return Violation.objects.none()
+        # ViolationSerializer naudoja student ir created_by vardus
+        return queryset.select_related('student', 'created_by').order_by('-created_at')
 
     def get_permissions(self):
         """Nustato leidimus pagal veiksmą"""
@@ -219,23 +218,28 @@ class ViolationViewSet(viewsets.ModelViewSet):
         violation_ids = serializer.validated_data['violation_ids']
         violations = Violation.objects.filter(id__in=violation_ids)
 
-        if action_type == 'mark_completed':
-            violations.update(status=Violation.Status.COMPLETED)
-            message = f'Sėkmingai pažymėta {violations.count()} pažeidimų kaip atliktų.'
+        with transaction.atomic():
+            if action_type == 'mark_completed':
+                violations.update(status=Violation.Status.COMPLETED)
+                message = f'Sėkmingai pažymėta {violations.count()} pažeidimų kaip atliktų.'
         
-        elif action_type == 'mark_penalty_paid':
-            violations.update(penalty_status=Violation.PenaltyStatus.PAID)
-            message = f'Sėkmingai pažymėta {violations.count()} mokesčių kaip apmokėtų.'
+            elif action_type == 'mark_penalty_paid':
+                violations.update(penalty_status=Violation.PenaltyStatus.PAID)
+                message = f'Sėkmingai pažymėta {violations.count()} mokesčių kaip apmokėtų.'
         
-        elif action_type == 'recalculate_penalties':
-            for violation in violations:
-                violation.recalculate_penalty()
-            message = f'Sėkmingai perskaičiuota {violations.count()} pažeidimų mokesčiai.'
+            elif action_type == 'recalculate_penalties':
+                for violation in violations:
+                    violation.recalculate_penalty()
+                message = f'Sėkmingai perskaičiuota {violations.count()} pažeidimų mokesčiai.'
         
-        elif action_type == 'delete':
-            count = violations.count()
-            violations.delete()
-            message = f'Sėkmingai ištrinta {count} pažeidimų.'
+            elif action_type == 'delete':
+                count = violations.count()
+                violations.delete()
+                message = f'Sėkmingai ištrinta {count} pažeidimų.'
+
+            # update() nekviečia signalų - statistikos talpykla invaliduojama tiesiogiai,
+            # kai pakeitimai patvirtinti (ne anksčiau, kitaip lygiagreti užklausa išsaugotų senas sumas)
+            transaction.on_commit(stats.bump_version)
 
         return Response({'message': message}, status=status.HTTP_200_OK)
 
@@ -290,6 +294,7 @@ class ViolationViewSet(viewsets.ModelViewSet):
 def violation_stats(request):
     """
     Pažeidimų statistika - grąžina bendrą statistiką apie pažeidimus
+    CHANGE: Viena GROUP BY pagal kategoriją ir viena pagal mėnesį (violation.stats), talpykla pagal filtrus
     """
     # Tik mentoriai, kuratoriai ir vadovai gali matyti statistiką
     if not (request.user.has_role('mentor') or 
@@ -301,76 +306,16 @@ def violation_stats(request):
         )
 
     # Filtravimas pagal parametrus
-    year = request.query_params.get('year')
-    month = request.query_params.get('month')
-    week = request.query_params.get('week')
+    params = {name: request.query_params.get(name) for name in ('year', 'month', 'week')}
+    try:
+        queryset = stats.filter_violations(Violation.objects.all(), **params)
+    except ValueError:
+        return Response({'error': 'Netinkami filtrų parametrai.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    queryset = Violation.objects.all()
-
-    if year:
-        queryset = queryset.filter(created_at__year=year)
-    if month:
-        queryset = queryset.filter(created_at__month=month)
-    if week:
-        # Apskaičiuoja savaitės pradžią
-        week_start = timezone.now() - timedelta(weeks=int(week))
-        queryset = queryset.filter(created_at__gte=week_start)
-
-    # Bendroji statistika
-    total_violations = queryset.count()
-    completed_violations = queryset.filter(status=Violation.Status.COMPLETED).count()
-    pending_violations = queryset.filter(status=Violation.Status.PENDING).count()
-    
-    total_penalty_amount = queryset.aggregate(total=Sum('penalty_amount'))['total'] or 0
-    paid_penalty_amount = queryset.filter(penalty_status=Violation.PenaltyStatus.PAID).aggregate(total=Sum('penalty_amount'))['total'] or 0
-    unpaid_penalty_amount = total_penalty_amount - paid_penalty_amount
-    
-    completion_rate = (completed_violations / total_violations * 100) if total_violations > 0 else 0
-    penalty_payment_rate = (paid_penalty_amount / total_penalty_amount * 100) if total_penalty_amount > 0 else 0
-
-    # Kategorijų statistika
-    category_stats = {}
-    categories = ViolationCategory.objects.filter(is_active=True)
-    for category in categories:
-        category_violations = queryset.filter(category=category.name)
-        category_stats[category.name] = {
-            'total': category_violations.count(),
-            'completed': category_violations.filter(status=Violation.Status.COMPLETED).count(),
-            'pending': category_violations.filter(status=Violation.Status.PENDING).count(),
-            'color_type': category.color_type,
-            'penalty_amount': category_violations.aggregate(total=Sum('penalty_amount'))['total'] or 0
-        }
-
-    # Mėnesio statistika (paskutiniai 12 mėnesių)
-    monthly_stats = {}
-    for i in range(12):
-        month_date = timezone.now() - timedelta(days=30*i)
-        month_violations = queryset.filter(
-            created_at__year=month_date.year,
-            created_at__month=month_date.month
-        )
-        month_key = f"{month_date.year}-{month_date.month:02d}"
-        monthly_stats[month_key] = {
-            'total': month_violations.count(),
-            'completed': month_violations.filter(status=Violation.Status.COMPLETED).count(),
-            'penalty_amount': month_violations.aggregate(total=Sum('penalty_amount'))['total'] or 0
-        }
-
-    stats_data = {
-        'total_violations': total_violations,
-        'completed_violations': completed_violations,
-        'pending_violations': pending_violations,
-        'total_penalty_amount': total_penalty_amount,
-        'paid_penalty_amount': paid_penalty_amount,
-        'unpaid_penalty_amount': unpaid_penalty_amount,
-        'completion_rate': round(completion_rate, 2),
-        'penalty_payment_rate': round(penalty_payment_rate, 2),
-        'category_stats': category_stats,
-        'monthly_stats': monthly_stats
-    }
-
-    serializer = ViolationStatsSerializer(stats_data)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    data = stats.cached(
+        'stats', params, lambda: ViolationStatsSerializer(stats.violation_stats(queryset)).data
+    )
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -378,6 +323,7 @@ def violation_stats(request):
 def violation_category_stats(request):
     """
     Kategorijų statistika - grąžina detalią statistiką pagal kategorijas
+    CHANGE: Viena GROUP BY užklausa visoms kategorijoms (violation.stats), talpykla pagal filtrus
     """
     if not (request.user.has_role('mentor') or 
             request.user.has_role('curator') or 
@@ -388,37 +334,14 @@ def violation_category_stats(request):
         )
 
     # Filtravimas pagal parametrus
-    year = request.query_params.get('year')
-    month = request.query_params.get('month')
-
-    queryset = Violation.objects.all()
-    if year:
-        queryset = queryset.filter(created_at__year=year)
-    if month:
-        queryset = queryset.filter(created_at__month=month)
-
-    categories = ViolationCategory.objects.filter(is_active=True)
-    category_stats = []
-
-    for category in categories:
-        category_violations = queryset.filter(category=category.name)
-        total_count = category_violations.count()
-        completed_count = category_violations.filter(status=Violation.Status.COMPLETED).count()
-        pending_count = total_count - completed_count
-        
-        completion_rate = (completed_count / total_count * 100) if total_count > 0 else 0
-        penalty_amount = category_violations.aggregate(total=Sum('penalty_amount'))['total'] or 0
-
-        category_stats.append({
-            'category_name': category.name,
-            'color_type': category.color_type,
-            'total_count': total_count,
-            'completed_count': completed_count,
-            'pending_count': pending_count,
-            'completion_rate': round(completion_rate, 2),
-            'penalty_amount': penalty_amount
-        })
-
-    serializer = ViolationCategoryStatsSerializer(category_stats, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
-
+    params = {name: request.query_params.get(name) for name in ('year', 'month')}
+    try:
+        queryset = stats.filter_violations(Violation.objects.all(), **params)
+    except ValueError:
+        return Response({'error': 'Netinkami filtrų parametrai.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = stats.cached(
+        'category-stats', params,
+        lambda: ViolationCategoryStatsSerializer(stats.category_stats(queryset), many=True).data
+    )
+    return Response(data, status=status.HTTP_200_OK)